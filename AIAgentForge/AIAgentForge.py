@@ -1,4 +1,5 @@
 # AIAgentForge/AIAgentForge.py
+import contextlib
 import os
 from dotenv import load_dotenv
 load_dotenv()  # .env 파일에서 환경 변수를 로드합니다.
@@ -28,6 +29,9 @@ from AIAgentForge.state.board_state import BoardState
 
 from fastapi import FastAPI
 from AIAgentForge.utils.v1_router import api_v1_router
+from AIAgentForge.utils.jwt_auth import load_signing_keys
+from AIAgentForge.utils.ingest_pool import shutdown_ingest_pool
+from AIAgentForge.utils.supabase_pool import close_http_client
 from uuid import uuid4
 from AIAgentForge.pages.n8n2langgraph import n8n_convert_page
 from AIAgentForge.pages.auth_callback import auth_callback_page
@@ -47,11 +51,24 @@ def setup_langchain_tracing():
 fastapi_app = FastAPI(title="AIAgentForge API")
 fastapi_app.include_router(api_v1_router)
 setup_langchain_tracing()
+# /api/v1 인증에서 토큰을 로컬 검증할 수 있도록 JWKS를 미리 읽어 둡니다.
+load_signing_keys()
 
 # 애플리케이션 인스턴스를 생성합니다.
 app = rx.App(
     api_transformer=fastapi_app,
 )
+
+
+@contextlib.asynccontextmanager
+async def close_shared_clients():
+    """앱 종료 시 공유 커넥션 풀과 업로드 추출 워커를 닫습니다."""
+    yield
+    await close_http_client()
+    shutdown_ingest_pool()
+
+
+app.register_lifespan_task(close_shared_clients)
 #app = rx.App(backend_only=bool(os.environ.get('REFLEX_BACKEND_ONLY')))
 # 보호된 라우트
 app.add_page(
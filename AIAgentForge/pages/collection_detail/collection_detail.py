@@ -86,6 +86,12 @@ def collection_detail_page() -> rx.Component:
             rx.spacer(),
         ),
         rx.hstack(
+            rx.checkbox(
+                LanguageState.t["upload_replace_existing"],
+                checked=DocumentState.replace_existing,
+                on_change=DocumentState.set_replace_existing,
+                is_disabled=DocumentState.is_uploading,
+            ),
             spacing="4",
             margin_bottom="1em",
         ),
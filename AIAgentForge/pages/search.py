@@ -28,6 +28,7 @@ def render_search_result(result: SearchResult) -> rx.Component:
                 align="center",
                 width="100%",
             ),
+            rx.text(result["document_name"], size="2", weight="medium"),
             rx.text(result["content"], as_="p", size="2", color_scheme="gray"),
             spacing="2",
             width="100%",
@@ -88,10 +89,15 @@ def search_page() -> rx.Component:
                             align="start",
                             width="100%",
                         ),
-                        rx.center(
-                            rx.text(LanguageState.t["search_initial_hint"], color_scheme="gray"),
-                            width="100%",
-                            height="10em",
+                        rx.cond(
+                            SearchState.is_answering,
+                            # 출처는 먼저 표시되고, 첫 토큰이 도착할 때까지 답변 자리에 스피너를 보여 줍니다.
+                            rx.center(rx.spinner(size="2"), width="100%"),
+                            rx.center(
+                                rx.text(LanguageState.t["search_initial_hint"], color_scheme="gray"),
+                                width="100%",
+                                height="10em",
+                            ),
                         ),
                     ),
                     rx.cond(
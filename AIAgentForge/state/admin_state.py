@@ -1,9 +1,11 @@
 # AIAgentForge/state/admin_state.py
+import asyncio
 import os
 from .base import BaseState
 from .auth_state import AuthState
 import reflex as rx
 from supabase import create_client, Client
+from ..utils.supabase_pool import service_db
 
 
 class AdminState(BaseState):
@@ -58,7 +60,7 @@ class AdminState(BaseState):
         """관리자: 모든 사용자 로드"""
         try:
             svc = await self._get_service_client()  # 서비스 롤 키 기반 클라이언트 (BaseState에 구현)
-            resp = svc.auth.admin.list_users(page=1, per_page=100)
+            resp = await asyncio.to_thread(svc.auth.admin.list_users, page=1, per_page=100)
 
             # resp가 리스트이든 AdminUserList이든 처리
             users = getattr(resp, "users", resp)
@@ -91,15 +93,15 @@ class AdminState(BaseState):
             return
         meta = {}
         try:
-            svc = self.admin_client() or self.supabase_client
-            prof = (
-                svc.from_("profiles")
+            prof = await (
+                service_db().from_("profiles")
                 .select("username, full_name, avatar_url")
                 .eq("id", user_id)
                 .maybe_single()
                 .execute()
             )
-            meta = prof.data or {}
+            # maybe_single()은 행이 없으면 None을 반환합니다.
+            meta = (prof.data if prof else None) or {}
         except Exception as e:
             print(f"Error loading profile: {e}")
         self.edit_user_id = user_id
@@ -121,12 +123,10 @@ class AdminState(BaseState):
             return
         uid = self.edit_user_id
         try:
-            svc = self.admin_client()
-            if not svc:
-                return
             if self.edit_email:
-                svc.auth.admin.update_user_by_id(uid, {"email": self.edit_email})
-            svc.from_("profiles").upsert(
+                svc = await self._get_service_client()
+                await asyncio.to_thread(svc.auth.admin.update_user_by_id, uid, {"email": self.edit_email})
+            await service_db().from_("profiles").upsert(
                 {
                     "id": uid,
                     "username": (self.edit_username or None),
@@ -148,7 +148,7 @@ class AdminState(BaseState):
             svc = await self._get_service_client()
             if not svc:
                 return
-            svc.auth.admin.delete_user(user_id)
+            await asyncio.to_thread(svc.auth.admin.delete_user, user_id)
             yield AdminState.load_all_users
         except Exception as e:
             print(f"Error deleting user: {e}")
@@ -158,11 +158,7 @@ class AdminState(BaseState):
         self.is_loading_boards = True
         yield
         try:
-            authed = await self._get_service_client()
-            if not authed:
-                self.boards = []
-                return
-            resp = authed.from_("boards").select("*").order("created_at", desc=True).execute()
+            resp = await service_db().from_("boards").select("*").order("created_at", desc=True).execute()
             self.boards = resp.data or []
         except Exception as e:
             print(f"Error loading boards: {e}")
@@ -174,14 +170,13 @@ class AdminState(BaseState):
         if not await self._require_admin():
             return
         try:
-            svc = self.admin_client() or self.supabase_client
             payload = {
                 "name": form_data.get("name") or "",
                 "description": form_data.get("description") or "",
                 "read_permission": form_data.get("read_permission") or "user",
                 "write_permission": form_data.get("write_permission") or "user",
             }
-            svc.from_("boards").insert(payload).execute()
+            await service_db().from_("boards").insert(payload).execute()
             yield AdminState.load_all_boards
         except Exception as e:
             print(f"Error creating board: {e}")
@@ -190,8 +185,7 @@ class AdminState(BaseState):
         if not await self._require_admin():
             return
         try:
-            svc = self.admin_client() or self.supabase_client
-            svc.from_("boards").delete().eq("id", board_id).execute()
+            await service_db().from_("boards").delete().eq("id", board_id).execute()
             yield AdminState.load_all_boards
         except Exception as e:
             print(f"Error deleting board: {e}")
@@ -1,12 +1,39 @@
 # AIAgentForge/state/auth_state.py
+import asyncio
+import time
 import reflex as rx
 from .base import BaseState
+from ..utils.jwt_auth import InvalidTokenError, revoke_token, unverified_claims, verify_token
+from ..utils.supabase_pool import SUPABASE_KEY as SUPABASE_ANON_KEY, SUPABASE_URL, get_http_client
+from gotrue.helpers import parse_auth_response
+from gotrue.types import AuthResponse
 import os
 from urllib.parse import urlencode
 from urllib.parse import urlencode, parse_qs
 import re
 import urllib.parse
 
+# check_auth에서 원격 확인(auth.get_user) 결과를 다시 사용할 시간(초). 이 시간 안에는 로컬 검증만 합니다.
+AUTH_CHECK_CACHE_TTL = float(os.getenv("AUTH_CHECK_CACHE_TTL", "60"))
+# 액세스 토큰 만료까지 이 시간(초)보다 적게 남으면 백그라운드에서 미리 갱신합니다.
+AUTH_REFRESH_MARGIN = float(os.getenv("AUTH_REFRESH_MARGIN", "300"))
+
+
+async def _request_refreshed_session(refresh_token: str) -> AuthResponse:
+    """리프레시 토큰으로 새 세션을 요청합니다. (POST /auth/v1/token?grant_type=refresh_token)
+
+    공유 supabase_client.auth.refresh_session()은 TOKEN_REFRESHED 이벤트에서 공유 클라이언트의 Authorization 헤더를
+    갱신한 사용자의 토큰으로 바꾸고 세션 저장소도 공유하므로 사용하지 않습니다. 여기서는 아무 상태도 바꾸지 않습니다.
+    """
+    response = await get_http_client().post(
+        f"{SUPABASE_URL}/auth/v1/token",
+        params={"grant_type": "refresh_token"},
+        json={"refresh_token": refresh_token},
+        headers={"apikey": SUPABASE_ANON_KEY},
+    )
+    response.raise_for_status()
+    return parse_auth_response(response.json())
+
 class AuthState(BaseState):
     """
     Handles all authentication logic including login, logout, signup,
@@ -32,6 +59,11 @@ class AuthState(BaseState):
     oauth_user_info: dict[str, str] = {}
  
     call_from: str=""
+
+    # check_auth 캐시 (백엔드 전용): 마지막으로 원격 확인한 토큰과 시각
+    _auth_checked_token: str = ""
+    _auth_checked_at: float = 0.0
+    _refreshing: bool = False
     signup_email: str = ""
     signup_display_name: str = ""
     signup_username: str = ""
@@ -215,36 +247,97 @@ class AuthState(BaseState):
             yield rx.redirect("/login")
             return
 
+        now = time.time()
         try:
-            response = self.supabase_client.auth.get_user(self.access_token)
-            if response and response.user:
-                self.user = response.user
-                self.is_authenticated = True
-                yield
-            else:
-                raise Exception("User not found with the given token.")
+            # 서명/만료를 로컬에서 검증합니다. 검증할 수 없으면 None (JWKS를 처음 읽을 때만 네트워크 사용)
+            claims = await asyncio.to_thread(verify_token, self.access_token)
+            invalid = False
+        except InvalidTokenError:
+            # 만료되었거나 서명이 올바르지 않은 토큰
+            claims, invalid = None, True
+
+        if not invalid:
+            exp = (claims or unverified_claims(self.access_token)).get("exp") or 0
+            # 같은 토큰이거나, 로컬 검증된 같은 사용자의 토큰이면 같은 세션으로 봅니다.
+            same_session = self.user is not None and (
+                self._auth_checked_token == self.access_token
+                or (claims is not None and str(self.user.id) == claims["sub"])
+            )
+            fresh = now - self._auth_checked_at < AUTH_CHECK_CACHE_TTL and exp > now
+            if self.is_authenticated and same_session and fresh:
+                # 최근에 확인한 세션: 원격 호출 없이 통과합니다.
+                if exp - now < AUTH_REFRESH_MARGIN and self.refresh_token and not self._refreshing:
+                    yield AuthState.refresh_session_in_background
+                return
+
+            try:
+                response = await asyncio.to_thread(self.supabase_client.auth.get_user, self.access_token)
+                if response and response.user:
+                    self.user = response.user
+                    self.is_authenticated = True
+                    self._auth_checked_token = self.access_token
+                    self._auth_checked_at = now
+                    yield
+                    if exp - now < AUTH_REFRESH_MARGIN and self.refresh_token and not self._refreshing:
+                        yield AuthState.refresh_session_in_background
+                    return
+            except Exception:
+                pass
 
+        # 토큰이 만료되었거나 원격 확인에 실패했으면 리프레시 토큰으로 세션을 갱신합니다.
+        if not self.refresh_token:
+            self._reset_auth_state()
+            yield rx.redirect("/login")
+            return
+
+        try:
+            await self._refresh_session()
+            yield
         except Exception:
-            if not self.refresh_token:
-                self._reset_auth_state()
-                yield rx.redirect("/login")
+            self._reset_auth_state()
+            yield rx.redirect("/login")
 
+    async def _refresh_session(self):
+        """리프레시 토큰으로 세션을 갱신하고 쿠키와 check_auth 캐시를 갱신합니다."""
+        response = await _request_refreshed_session(self.refresh_token)
+        if not response.session:
+            raise Exception("Session refresh did not return a session.")
+        self.access_token = response.session.access_token
+        self.refresh_token = response.session.refresh_token
+        self.user = response.user
+        self.is_authenticated = True
+        self._auth_checked_token = self.access_token
+        self._auth_checked_at = time.time()
+
+    @rx.event(background=True)
+    async def refresh_session_in_background(self):
+        """만료가 가까운 액세스 토큰을 페이지 이동을 막지 않고 미리 갱신합니다."""
+        async with self:
+            if self._refreshing or not self.refresh_token:
+                return
+            self._refreshing = True
+            refresh_token = self.refresh_token
+        # 취소되거나 어디서 실패하든 플래그를 되돌려야 이후 갱신이 막히지 않습니다.
+        try:
             try:
-                response = await self.supabase_client.auth.refresh_session(self.refresh_token)
-
-                if response.session:
+                response = await _request_refreshed_session(refresh_token)
+            except Exception as e:
+                # 실패하면 다음 check_auth에서 만료를 감지해 다시 시도합니다.
+                print(f"Background session refresh failed: {e}")
+                return
+            async with self:
+                # 그 사이 로그아웃되었거나 다른 갱신이 이미 반영되었으면 결과를 버립니다.
+                if response.session and self.refresh_token == refresh_token:
                     self.access_token = response.session.access_token
                     self.refresh_token = response.session.refresh_token
                     self.user = response.user
                     self.is_authenticated = True
-                    yield
-                else:
-                    raise Exception("Session refresh did not return a session.")
+                    self._auth_checked_token = self.access_token
+                    self._auth_checked_at = time.time()
+        finally:
+            async with self:
+                self._refreshing = False
 
-            except Exception:
-                self._reset_auth_state()
-                yield rx.redirect("/login")
-                
     async def check_admin(self):
         async for event in self.check_auth():
             yield event
@@ -254,6 +347,8 @@ class AuthState(BaseState):
         return
             
     def _reset_auth_state(self):
+        self._auth_checked_token = ""
+        self._auth_checked_at = 0.0
         self.access_token = ""
         self.refresh_token = ""
         self.is_authenticated = False
@@ -288,6 +383,11 @@ class AuthState(BaseState):
         yield
         
     async def handle_logout(self):
+        # 이 세션의 토큰이 API 인증 캐시/로컬 검증을 더 이상 통과하지 않도록 폐기 목록에 올립니다.
+        if self.access_token:
+            revoke_token(self.access_token)
+        self._auth_checked_token = ""
+        self._auth_checked_at = 0.0
         self.access_token = ""
         self.refresh_token = ""
         self.is_authenticated = False
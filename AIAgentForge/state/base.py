@@ -6,6 +6,7 @@ from gotrue.types import User
 from typing import ClassVar
 from dotenv import load_dotenv
 from postgrest import SyncPostgrestClient
+from ..utils.supabase_pool import PooledPostgrestClient, user_db
 # --- [삭제된 부분] ---
 # 순환 참조를 유발하는 최상위 import를 제거합니다.
 # from .auth_state import AuthState
@@ -49,6 +50,17 @@ class BaseState(rx.State):
             }
         )
 
+    # 프로세스 공유 HTTP/2 커넥션 풀을 사용하는 비동기 PostgREST 클라이언트 (utils/supabase_pool.py)
+    # 만드는 비용이 거의 없고 execute()를 await하므로 이벤트 루프를 막지 않습니다.
+    async def _get_db(self) -> PooledPostgrestClient:
+        """인증된 사용자 토큰으로 요청하는 비동기 PostgREST 클라이언트를 반환합니다."""
+        from .auth_state import AuthState
+
+        auth_state = await self.get_state(AuthState)
+        if not auth_state.is_authenticated:
+            raise Exception("사용자가 인증되지 않았습니다.")
+        return user_db(auth_state.access_token)
+
     #전체 Client 인스턴스(Supabase Python SDK의 supabase-py 라이브러리에서 제공). 
     # 이는 데이터베이스(Postgrest)뿐만 아니라 인증(auth), 실시간(realtime), 스토리지(storage) 등 
     # Supabase의 모든 기능을 포함합니다
@@ -61,8 +61,8 @@ class CollectionState(BaseState):
 
         lang = await self.get_state(LanguageState)
         try:
-            client = await self._get_authenticated_client()
-            client.from_("collections").delete().eq("id", collection_id).execute()
+            client = await self._get_db()
+            await client.from_("collections").delete().eq("id", collection_id).execute()
             # 목록 새로고침
             yield CollectionState.load_collections
         except Exception as e:
@@ -77,8 +77,8 @@ class CollectionState(BaseState):
         lang = await self.get_state(LanguageState)
 
         try:
-            client = await self._get_authenticated_client()
-            client.from_("collections").delete().eq("id", collection_id).execute()
+            client = await self._get_db()
+            await client.from_("collections").delete().eq("id", collection_id).execute()
             self.alert_message = lang.tr_str("collection_delete_success")
             self.show_alert = True
             yield CollectionState.load_collections
@@ -101,8 +101,8 @@ class CollectionState(BaseState):
                 self.is_loading = False
                 return
 
-            client = await self._get_authenticated_client()
-            response = client.from_("collections") \
+            client = await self._get_db()
+            response = await client.from_("collections") \
                 .select("*") \
                 .eq("owner_id", auth_state.user.id) \
                 .order("created_at", desc=True) \
@@ -134,8 +134,8 @@ class CollectionState(BaseState):
             if not auth_state.user:
                 raise Exception(lang.tr_str("user_not_found"))
 
-            client = await self._get_authenticated_client()
-            client.from_("collections").insert({
+            client = await self._get_db()
+            await client.from_("collections").insert({
                 "name": self.new_collection_name,
                 "owner_id": auth_state.user.id
             }).execute()
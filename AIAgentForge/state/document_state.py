@@ -10,11 +10,11 @@ import asyncio
 from supabase import create_client, Client
 from reflex.vars import Var
 from typing import List
-from ..utils.text_extractor import extract_text_from_file
-from ..utils.chunker import chunk_text
-from ..utils.embedder import generate_embeddings
+from ..utils.ingest_pipeline import BUCKET_NAME, IngestContext, ProgressEvent, run_ingest_pipeline
+from ..utils.ingest_jobs import INGEST_MODE, INGEST_SPOOL_DIR, STATUS_DONE, job_store
+from ..utils.upload_stream import spool_upload
+from ..utils.vector_index import invalidate_collection
 from urllib.parse import parse_qs, quote # quote import 추가
-import uuid
 import logging
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -23,7 +23,6 @@ load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
-BUCKET_NAME = "document-files"
 DOCUMENT_TABLE = "documents"
 
 class DocumentState(BaseState):
@@ -37,6 +36,10 @@ class DocumentState(BaseState):
     upload_progress: dict[str, int] = {}
     upload_status: dict[str, str] = {}
     upload_errors: dict[str, str] = {}
+    # 백그라운드 수집 모드에서 파일 이름 → 작업 ID
+    upload_jobs: dict[str, str] = {}
+    # 같은 이름의 문서를 새 버전으로 교체(변경된 청크만 다시 임베딩)할지 여부
+    replace_existing: bool = False
 
     show_alert: bool = False
     alert_message: str = ""
@@ -55,7 +58,14 @@ class DocumentState(BaseState):
 
         # 3) 문서 로딩 이벤트 실행
         yield DocumentState.load_documents_on_page_load
+
+        # 4) 페이지를 떠난 동안 진행 중이던 백그라운드 수집 작업이 있으면 다시 추적합니다.
+        if INGEST_MODE == "background":
+            yield DocumentState.resume_upload_jobs
     
+    def set_replace_existing(self, value: bool):
+        self.replace_existing = value
+
     def toggle_upload_document(self):
         """upload_document 상태를 토글합니다. (True ↔ False)"""
         self.upload_document = not self.upload_document
@@ -82,16 +92,16 @@ class DocumentState(BaseState):
         
         yield
         try:
-            client = await self._get_authenticated_client()
+            client = await self._get_db()
             
-            collection_response = client.from_("collections").select("name").eq("id", collection_id).single().execute()
+            collection_response = await client.from_("collections").select("name").eq("id", collection_id).single().execute()
             if collection_response.data:
                 default_name = lang.tr_str("name_untitled")
                 self.collection_name = collection_response.data.get("name") or default_name
             else:
                 self.collection_name = lang.tr_str("unknown_collection")
                             
-            response = client.from_("documents").select("*").eq("collection_id", collection_id).execute()
+            response = await client.from_("documents").select("*").eq("collection_id", collection_id).execute()
             self.documents = response.data
         except Exception as e:
             self.alert_message = lang.tr_str("doc_loading_failed", error=str(e))
@@ -100,6 +110,15 @@ class DocumentState(BaseState):
             self.is_loading = False
             yield
             
+    def _apply_progress_event(self, event: ProgressEvent, lang: LanguageState):
+        """업로드 파이프라인의 진행 이벤트를 상태 변수에 반영합니다."""
+        if event.progress is not None:
+            self.upload_progress[event.filename] = event.progress
+        if event.status_key:
+            self.upload_status[event.filename] = lang.tr_str(event.status_key)
+        if event.error_key:
+            self.upload_errors[event.filename] = lang.tr_str(event.error_key, **event.error_kwargs)
+
     # Supabase Bucket에 file을 upload
     async def handle_upload(self, files: list[rx.UploadFile]):
         collection_id = self.router.url.split('/')[-1]
@@ -124,7 +143,15 @@ class DocumentState(BaseState):
             self.is_uploading = False
             return
         user_id = auth_state.user.id
-        
+
+        # URL의 컬렉션을 이 사용자가 소유하는지 확인합니다. (백그라운드 워커는 RLS를 우회하는 서비스 키를 사용합니다)
+        db = await self._get_db()
+        owned = await db.from_("collections").select("id").eq("id", collection_id).eq("owner_id", user_id).execute()
+        if not owned.data:
+            self.alert_message = lang.tr_str("upload_no_permission")
+            self.show_alert = True
+            return
+
         db_client = await self._get_authenticated_client()
 
         self.is_uploading = True
@@ -136,121 +163,51 @@ class DocumentState(BaseState):
             self.upload_errors.pop(filename, None)
         yield
 
-        successful_uploads = 0
-        for file in files:
-            original_filename = file.name
-            try:
-                existing_doc_res = db_client.from_("documents").select("id").eq("name", original_filename).eq("collection_id", collection_id).maybe_single().execute()
-                
-                if existing_doc_res and existing_doc_res.data:
-                    logger.warning(f"File '{original_filename}' already exists in this collection. Skipping.")
-                    self.upload_status[original_filename] = lang.tr_str("status_failed")
-                    self.upload_errors[original_filename] = lang.tr_str("doc_exists_same_name")
-                    self.upload_progress[original_filename] = 100
-                    yield
-                    continue
-                
-                file_content = await file.read()
-                content_type = file.content_type
-
-                self.upload_status[original_filename] = lang.tr_str("upload_storage_uploading")
-                self.upload_progress[original_filename] = 10
-                yield
-
-                file_extension = os.path.splitext(original_filename)[1]
-                storage_filename = f"{uuid.uuid4()}{file_extension}"
-                storage_path = f"{user_id}/{collection_id}/{storage_filename}"
-                
-                logger.info(f"Attempting to upload to storage path: {storage_path}")
-
-                storage_response = supabase_client.storage.from_(BUCKET_NAME).upload(
-                    storage_path,
-                    file_content,
-                    {'content-type': content_type or 'application/octet-stream'}
+        if INGEST_MODE == "background":
+            # 파일을 스풀하고 작업 대기열에 넣은 뒤, 처리는 워커 프로세스에 맡깁니다.
+            # 이 핸들러나 브라우저 탭이 종료되어도 작업은 계속 진행됩니다.
+            for file in files:
+                upload = await spool_upload(file, INGEST_SPOOL_DIR)
+                self.upload_jobs[file.name] = await asyncio.to_thread(
+                    job_store.enqueue,
+                    user_id,
+                    collection_id,
+                    file.name,
+                    file.content_type,
+                    upload.path,
+                    self.replace_existing,
                 )
+            yield DocumentState.poll_upload_jobs
+            return
+
+        # 파일들은 파이프라인에서 동시에 처리되고, 진행 이벤트는 큐를 통해 이 핸들러로 전달됩니다.
+        events: asyncio.Queue[ProgressEvent] = asyncio.Queue()
+        ctx = IngestContext(
+            supabase_client=supabase_client,
+            db_client=db_client,
+            user_id=user_id,
+            collection_id=collection_id,
+            replace_existing=self.replace_existing,
+        )
+        pipeline = asyncio.create_task(run_ingest_pipeline(ctx, files, events.put_nowait))
+
+        while not pipeline.done() or not events.empty():
+            try:
+                event = await asyncio.wait_for(events.get(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            # 쌓인 이벤트를 한꺼번에 반영하여 웹소켓 업데이트 횟수를 줄입니다.
+            while True:
+                self._apply_progress_event(event, lang)
+                if events.empty():
+                    break
+                event = events.get_nowait()
+            yield
+
+        successful_uploads = await pipeline
 
-                if not storage_response.full_path:
-                    error_detail = storage_response.text
-                    raise Exception(f"Storage upload failed: {error_detail}")
-
-                response = db_client.from_("documents").insert({
-                    "name": original_filename,
-                    "collection_id": collection_id,
-                    "owner_id": user_id,
-                    "storage_path": storage_response.full_path
-                }).execute()
-
-                if response.data:
-                    inserted_document = response.data[0]
-                    document_id = inserted_document['id']
-                    print(f"새로 생성된 문서 ID: {document_id}")
-                    
-                self.upload_progress[original_filename] = 20
-                self.upload_status[original_filename] = lang.tr_str("upload_text_extracting")
-                successful_uploads += 1
-                yield
-                    
-                print(" Process Document")
-                
-                self.upload_progress[original_filename] = 30                
-                self.upload_status[original_filename] = lang.tr_str("upload_text_extracting")
-                yield
-                
-                text = extract_text_from_file(file_content, content_type)
-                logger.info(f"Extracted text length for {original_filename}: {len(text)}")
-                if not text:
-                    print(f"No text extracted for {original_filename}, content_type: {content_type}")
-                    
-                self.upload_progress[original_filename] = 50
-                self.upload_status[original_filename] = lang.tr_str("upload_chunking")
-                yield
-
-                chunks = chunk_text(text)
-                logger.info(f"Number of chunks for {original_filename}: {len(chunks)}")
-                if not chunks:
-                    print(f"No chunks created for {original_filename}")
-
-                self.upload_progress[original_filename] = 60
-                self.upload_status[original_filename] = lang.tr_str("upload_embedding")
-                yield
-
-                embeddings = await generate_embeddings([chunk['text'] for chunk in chunks])
-                logger.info(f"Number of embeddings for {original_filename}: {len(embeddings)}")
-
-                self.upload_progress[original_filename] = 80
-                self.upload_status[original_filename] = lang.tr_str("upload_db_updating")
-                yield
-
-                logger.info(f"Using document_id: {document_id} for {original_filename}")
-                records_to_insert = [
-                    {
-                        "owner_id": user_id,
-                        "document_id": document_id,
-                        "content": chunk['text'],
-                        "embedding": embedding,
-                    }
-                    for chunk, embedding in zip(chunks, embeddings)
-                ]
-                logger.info(f"Number of records to insert for {original_filename}: {len(records_to_insert)}")
-                
-                if records_to_insert:
-                    response = supabase_client.table("document_sections").insert(records_to_insert).execute()
-                    logger.info(f"Insert response for {original_filename}: data length={len(response.data) if response.data else 0}, count={response.count}")
-                else:
-                    logger.info(f"No records to insert for {original_filename}")
-
-                self.upload_progress[original_filename] = 100
-                self.upload_status[original_filename] = lang.tr_str("status_done")
-
-                yield
-                    
-            except Exception as e:
-                self.upload_status[original_filename] = lang.tr_str("status_failed")
-                self.upload_errors[original_filename] = lang.tr_str("upload_error", error=str(e))
-                self.upload_progress[original_filename] = 100
-                yield
-                
         if successful_uploads > 0:
+            invalidate_collection(collection_id)
             self.alert_message = lang.tr_str("docs_upload_success_alert", ok=successful_uploads, total=len(files))
             self.show_alert = True
             yield DocumentState.load_documents_on_page_load
@@ -262,6 +219,55 @@ class DocumentState(BaseState):
         self.upload_errors = {}
         yield
                                     
+    async def resume_upload_jobs(self):
+        """현재 컬렉션에서 아직 끝나지 않은 사용자의 수집 작업을 찾아 진행 상황 추적을 재개합니다."""
+        auth_state = await self.get_state(AuthState)
+        collection_id = self.router.url.split('/')[-1]
+        if not auth_state.user or not collection_id:
+            return
+        jobs = await asyncio.to_thread(job_store.active_jobs, auth_state.user.id, collection_id)
+        if not jobs:
+            return
+        self.upload_jobs = {job.filename: job.id for job in jobs}
+        self.is_uploading = True
+        yield DocumentState.poll_upload_jobs
+
+    @rx.event(background=True)
+    async def poll_upload_jobs(self):
+        """작업 행을 주기적으로 조회하여 업로드 진행 상황을 갱신합니다."""
+        async with self:
+            lang = await self.get_state(LanguageState)
+            job_ids = list(self.upload_jobs.values())
+
+        while True:
+            jobs = await asyncio.to_thread(job_store.get_jobs, job_ids)
+            async with self:
+                for job in jobs:
+                    self._apply_progress_event(
+                        ProgressEvent(job.filename, job.progress, job.status_key, job.error_key, job.error_kwargs),
+                        lang,
+                    )
+            if not jobs or all(job.finished for job in jobs):
+                break
+            await asyncio.sleep(1)
+
+        successful_uploads = sum(1 for job in jobs if job.status == STATUS_DONE)
+        async with self:
+            if successful_uploads > 0:
+                invalidate_collection(self.router.url.split('/')[-1])
+                self.alert_message = lang.tr_str("docs_upload_success_alert", ok=successful_uploads, total=len(jobs))
+                self.show_alert = True
+        if successful_uploads > 0:
+            yield DocumentState.load_documents_on_page_load
+
+        await asyncio.sleep(5)
+        async with self:
+            self.is_uploading = False
+            self.upload_jobs = {}
+            self.upload_progress = {}
+            self.upload_status = {}
+            self.upload_errors = {}
+
     async def delete_document(self, doc_id: str):
         self.is_loading = True
         yield
@@ -272,9 +278,9 @@ class DocumentState(BaseState):
             if not auth_state.user:
                 raise Exception(lang.tr_str("user_not_found"))
 
-            db_client = await self._get_authenticated_client()
+            db_client = await self._get_db()
 
-            response = db_client.from_("documents").select("storage_path, owner_id").eq("id", doc_id).execute()
+            response = await db_client.from_("documents").select("storage_path, owner_id, collection_id").eq("id", doc_id).execute()
             if not response.data:
                 raise Exception(lang.tr_str("doc_not_found"))
 
@@ -290,11 +296,12 @@ class DocumentState(BaseState):
                 path_to_remove = storage_path
 
             supabase_client = await self._get_supabase_client()
-            storage_response = supabase_client.storage.from_(BUCKET_NAME).remove([path_to_remove])
+            storage_response = await asyncio.to_thread(supabase_client.storage.from_(BUCKET_NAME).remove, [path_to_remove])
             if not storage_response:
                 raise Exception(lang.tr_str("storage_delete_failed"))
 
-            db_client.from_("documents").delete().eq("id", doc_id).execute()
+            await db_client.from_("documents").delete().eq("id", doc_id).execute()
+            invalidate_collection(doc_data["collection_id"])
 
             self.documents = [doc for doc in self.documents if doc["id"] != doc_id]
 
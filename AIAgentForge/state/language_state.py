@@ -152,6 +152,7 @@ class LanguageState(BaseState):
             "doc_loading_failed": "문서 로딩 실패: {error}",
             "user_not_found": "사용자를 찾을 수 없습니다.",
             "doc_exists_same_name": "이미 같은 이름의 파일이 존재합니다.",
+            "doc_exists_same_content": "내용이 같은 파일이 이미 존재합니다: {name}",
             "upload_waiting": "대기 중...",
             "upload_storage_uploading": "스토리지에 업로드 중...",
             "upload_text_extracting": "텍스트 추출 중",
@@ -164,6 +165,7 @@ class LanguageState(BaseState):
             "docs_upload_success_alert": "{ok} / {total}개의 파일이 성공적으로 업로드되었습니다.",
             "doc_not_found": "문서를 찾을 수 없습니다.",
             "delete_no_permission": "삭제 권한이 없습니다.",
+            "upload_no_permission": "이 컬렉션에 업로드할 권한이 없습니다.",
             "storage_delete_failed": "스토리지 파일 삭제 실패: 파일을 찾을 수 없음 또는 경로 오류.",
             "doc_delete_success": "문서가 성공적으로 삭제되었습니다.",
             "doc_delete_failed": "문서 삭제 실패: {error}",
@@ -177,6 +179,7 @@ class LanguageState(BaseState):
             "btn_choose_files": "파일 선택",
             "upload_drag_drop_hint": "또는 여기에 파일을 드래그 앤 드롭하세요.",
             "heading_uploaded_docs": "업로드된 문서",
+            "upload_replace_existing": "같은 이름의 문서는 새 버전으로 교체 (변경된 부분만 다시 임베딩)",
             
             # Chapter 6 strings
             "collections_title": "내 컬렉션 관리",
@@ -359,6 +362,7 @@ class LanguageState(BaseState):
             "doc_loading_failed": "Failed to load documents: {error}",
             "user_not_found": "User not found.",
             "doc_exists_same_name": "A file with the same name already exists.",
+            "doc_exists_same_content": "A file with identical content already exists: {name}",
             "upload_waiting": "Waiting...",
             "upload_storage_uploading": "Uploading to storage...",
             "upload_text_extracting": "Extracting text",
@@ -371,6 +375,7 @@ class LanguageState(BaseState):
             "docs_upload_success_alert": "{ok} / {total} files uploaded successfully.",
             "doc_not_found": "Document not found.",
             "delete_no_permission": "No permission to delete.",
+            "upload_no_permission": "No permission to upload to this collection.",
             "storage_delete_failed": "Failed to delete storage file: not found or path error.",
             "doc_delete_success": "Document deleted successfully.",
             "doc_delete_failed": "Document deletion failed: {error}",
@@ -385,6 +390,7 @@ class LanguageState(BaseState):
             "btn_choose_files": "Choose Files",
             "upload_drag_drop_hint": "Or drag and drop files here.",
             "heading_uploaded_docs": "Uploaded Documents",
+            "upload_replace_existing": "Replace documents with the same name (re-embed changed parts only)",
                         
             # Chapter 6 strings
             "collections_title": "My Collections",
@@ -566,6 +572,7 @@ class LanguageState(BaseState):
             "doc_loading_failed": "ドキュメントの読み込みに失敗しました: {error}",
             "user_not_found": "ユーザーが見つかりません。",
             "doc_exists_same_name": "同じ名前のファイルが既に存在します。",
+            "doc_exists_same_content": "同じ内容のファイルが既に存在します: {name}",
             "upload_waiting": "待機中...",
             "upload_storage_uploading": "ストレージにアップロード中...",
             "upload_text_extracting": "テキスト抽出中",
@@ -578,6 +585,7 @@ class LanguageState(BaseState):
             "docs_upload_success_alert": "{ok} / {total} 個のファイルが正常にアップロードされました。",
             "doc_not_found": "ドキュメントが見つかりません。",
             "delete_no_permission": "削除権限がありません。",
+            "upload_no_permission": "このコレクションにアップロードする権限がありません。",
             "storage_delete_failed": "ストレージファイルの削除に失敗: 見つからないかパスエラーです。",
             "doc_delete_success": "ドキュメントは正常に削除されました。",
             "doc_delete_failed": "ドキュメントの削除に失敗しました: {error}",
@@ -592,6 +600,7 @@ class LanguageState(BaseState):
             "btn_choose_files": "ファイルを選択",
             "upload_drag_drop_hint": "またはここにファイルをドラッグ＆ドロップしてください。",
             "heading_uploaded_docs": "アップロード済みドキュメント",
+            "upload_replace_existing": "同じ名前のドキュメントを新しい版に置き換える（変更部分のみ再埋め込み）",
                         
             # Chapter 6 strings
             "collections_title": "コレクション管理",
@@ -4,6 +4,7 @@ from .base import BaseState
 from .auth_state import AuthState
 from typing import Optional, Dict, Any
 from postgrest import SyncPostgrestClient
+from ..utils.supabase_pool import anon_db
 
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -72,7 +73,7 @@ class PostState(BaseState):
 
         try:
             # 게시판 정보는 보통 공개되어 있으므로 익명 클라이언트를 사용해도 괜찮습니다.
-            board_res = self.supabase_client.from_("boards").select("name").eq("id", self.curr_board_id).single().execute()
+            board_res = await anon_db().from_("boards").select("name").eq("id", self.curr_board_id).single().execute()
             if board_res.data:
                 self.board_name = board_res.data.get("name", "알 수 없는 게시판")
             else:
@@ -97,15 +98,15 @@ class PostState(BaseState):
         try:
             # --- [수정된 부분] ---
             # RLS 정책을 통과하기 위해 인증된 클라이언트를 가져옵니다.
-            db_client = await self._get_authenticated_client()
+            db_client = await self._get_db()
 
             # 게시판 정보 조회 (인증된 클라이언트 사용)
-            board_res = db_client.from_("boards").select("*").eq("id", self.curr_board_id).single().execute()
+            board_res = await db_client.from_("boards").select("*").eq("id", self.curr_board_id).single().execute()
             self.board_name = board_res.data.get("name", "알 수 없는 게시판")
             self.board_description = board_res.data.get("description", "")
 
             # 게시글 목록 조회 (인증된 클라이언트 사용)
-            posts_res = db_client.from_("posts").select("*").eq("board_id", self.curr_board_id).order("created_at", desc=True).execute()
+            posts_res = await db_client.from_("posts").select("*").eq("board_id", self.curr_board_id).order("created_at", desc=True).execute()
             self.posts = posts_res.data
             logging.info(f"Loaded {len(self.posts)} posts.") # 로드된 게시글 수 로그 추가
 
@@ -126,8 +127,8 @@ class PostState(BaseState):
         try:
             # --- [수정된 부분] ---
             # 검색 시에도 인증된 클라이언트를 사용합니다.
-            db_client = await self._get_authenticated_client()
-            response = db_client.from_("posts").select("*") \
+            db_client = await self._get_db()
+            response = await db_client.from_("posts").select("*") \
                 .eq("board_id", self.curr_board_id) \
                 .or_(f"title.ilike.%{self.search_query}%,content.ilike.%{self.search_query}%") \
                 .order("created_at", desc=True).execute()
@@ -148,8 +149,8 @@ class PostState(BaseState):
 
             user_id = auth_state.user.id
             
-            db_client = await self._get_authenticated_client()
-            db_client.from_("posts").insert({
+            db_client = await self._get_db()
+            await db_client.from_("posts").insert({
                 "title": self.title,
                 "content": self.content,
                 "board_id": self.curr_board_id,
@@ -218,7 +219,7 @@ class PostDetailState(BaseState):
         """게시물에 달린 댓글 목록을 불러오고 날짜를 포맷팅합니다."""
         logging.info("Entering load_comments")
         try:
-            comments_res = db_client.from_("comments").select("*").eq("post_id", self.current_post_id).order("created_at", desc=True).execute()
+            comments_res = await db_client.from_("comments").select("*").eq("post_id", self.current_post_id).order("created_at", desc=True).execute()
             
             formatted_comments = []
             for comment in comments_res.data:
@@ -261,8 +262,8 @@ class PostDetailState(BaseState):
         try:
             # --- [수정된 부분] ---
             # 상세 정보 조회 시에도 인증된 클라이언트를 사용합니다.
-            db_client = await self._get_authenticated_client()
-            response = db_client.from_("posts").select("*").eq("id", self.current_post_id).single().execute()
+            db_client = await self._get_db()
+            response = await db_client.from_("posts").select("*").eq("id", self.current_post_id).single().execute()
             if response.data:
                 self.post = response.data
                 logging.info("Calling load_comments")
@@ -284,8 +285,8 @@ class PostDetailState(BaseState):
         board_id = self.post.get("board_id")
 
         try:
-            client = await self._get_authenticated_client()
-            client.from_("posts").delete().eq("id", self.current_post_id).execute()
+            client = await self._get_db()
+            await client.from_("posts").delete().eq("id", self.current_post_id).execute()
             
             if board_id:
                 return rx.redirect(f"/boards/{board_id}")
@@ -305,8 +306,8 @@ class PostDetailState(BaseState):
             return
 
         try:
-            client = await self._get_authenticated_client()
-            client.from_("posts").update({
+            client = await self._get_db()
+            await client.from_("posts").update({
                 "title": form_data["title"],
                 "content": form_data["content"],
             }).eq("id", self.current_post_id).execute()
@@ -328,9 +329,9 @@ class PostDetailState(BaseState):
                 logging.warning("User is not authenticated. Cannot create post.")
                 return
 
-            db_client = await self._get_authenticated_client()
+            db_client = await self._get_db()
                         
-            db_client.from_("comments").insert({
+            await db_client.from_("comments").insert({
                 "content": content,
                 "post_id": self.current_post_id,
                 "user_id": auth_state.user.id,
@@ -347,9 +348,9 @@ class PostDetailState(BaseState):
     async def delete_comment(self, comment_id: str):
         """댓글을 삭제합니다."""
         try:
-            db_client = await self._get_authenticated_client()
+            db_client = await self._get_db()
 
-            db_client.from_("comments").delete().eq("id", comment_id).execute()
+            await db_client.from_("comments").delete().eq("id", comment_id).execute()
             logging.info("Calling load_comments")
             await self.load_comments(db_client)
         except Exception as e:
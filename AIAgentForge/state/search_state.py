@@ -1,21 +1,30 @@
 # AIAgentForge/state/search_state.py
 import os
+import time
 import reflex as rx
 from .base import BaseState
 from .document_state import DocumentState
 from .auth_state import AuthState
 from openai import AsyncOpenAI
-from ..utils.embedder import generate_embeddings
+from ..utils.embedder import embed_query
+from ..utils.hybrid_search import SEARCH_RPC, build_search_params
+from ..utils.vector_index import search_local
+from ..utils.reranker import RERANK_CANDIDATES, RERANK_ENABLED, RERANK_TOP_K, rerank
 
 # 환경 변수에서 OpenAI API 키를 가져와 클라이언트를 초기화합니다.
 client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
+# 답변 스트리밍 중 화면 갱신 최대 횟수(초당). 토큰마다 웹소켓 업데이트를 보내지 않도록 모아서 보냅니다.
+SEARCH_STREAM_FPS = float(os.getenv("SEARCH_STREAM_FPS", "15"))
+
 class SearchState(BaseState):
     search_query: str = ""
     is_loading: bool = False
     search_results: list[dict] = []
     # LLM의 최종 답변을 저장할 상태 변수 추가
     llm_answer: str = ""
+    # 검색 결과를 보여 준 뒤 답변을 스트리밍하는 중인지 여부
+    is_answering: bool = False
     
     def set_search_query(self, value: str):
         self.search_query = value
@@ -34,10 +43,8 @@ class SearchState(BaseState):
 
         try:
             # Step 1: 쿼리 임베딩 생성
-            embeddings_list = await generate_embeddings([self.search_query])
-            if not embeddings_list:
-                raise ValueError("임베딩 생성에 실패했습니다.")
-            query_embedding = embeddings_list[0]
+            # 반복되거나 거의 같은 쿼리는 쿼리 임베딩 캐시에서 바로 가져옵니다.
+            query_embedding = await embed_query(self.search_query)
 
             auth_state = await self.get_state(AuthState)
             if not auth_state.user:
@@ -52,18 +59,30 @@ class SearchState(BaseState):
             doc_state = await self.get_state(DocumentState)
 
             # Step 2: 데이터베이스에서 관련 문서 검색
-            response = self.supabase_client.rpc(
-                "hybrid_search_multilingual",
-                params={
-                    "query_text": self.search_query,
-                    "query_embedding": query_embedding,
-                    "p_collection_id": doc_state.collection_id,
-                    "p_owner_id": user_id,
-                    "match_count": 5,  # 컨텍스트 길이를 고려하여 5개로 조정
-                }
-            ).execute()
+            search_params = build_search_params(
+                self.search_query,
+                query_embedding,
+                user_id,
+                doc_state.collection_id,
+                # 재정렬을 사용하면 후보를 넉넉히 가져온 뒤 상위 RERANK_TOP_K개만 프롬프트에 넣습니다.
+                match_count=RERANK_CANDIDATES if RERANK_ENABLED else 5,  # 컨텍스트 길이를 고려하여 5개로 조정
+            )
+            # 작은 컬렉션은 프로세스 내 인덱스로 검색하고, 사용할 수 없으면 RPC를 호출합니다.
+            results = await search_local(self.supabase_client, search_params)
+            if results is None:
+                # 공유 커넥션 풀의 비동기 클라이언트로 호출하여 이벤트 루프를 막지 않습니다.
+                db = await self._get_db()
+                results = (await db.rpc(SEARCH_RPC, params=search_params).execute()).data or []
             
-            self.search_results = response.data
+            if RERANK_ENABLED:
+                self.search_results = rerank(self.search_query, results, top_k=RERANK_TOP_K)
+            else:
+                self.search_results = results
+
+            # 답변을 기다리지 않고 검색 결과(출처)부터 보여 줍니다.
+            self.is_loading = False
+            self.is_answering = bool(self.search_results)
+            yield
 
             # Step 3: 검색된 문서를 기반으로 LLM에 질문
             if self.search_results:
@@ -85,20 +104,32 @@ class SearchState(BaseState):
                 답변:
                 """
 
-                # OpenAI API 호출
-                chat_completion = await client.chat.completions.create(
+                # OpenAI API 호출 (스트리밍)
+                stream = await client.chat.completions.create(
                     model="gpt-4o",  # 원하는 모델로 변경 가능
                     messages=[
                         {"role": "system", "content": "You are a helpful AI assistant that answers questions based on the provided context in Korean."},
                         {"role": "user", "content": prompt_message},
                     ],
                     temperature=0.5,
+                    stream=True,
                 )
-                
-                if chat_completion.choices:
-                    self.llm_answer = chat_completion.choices[0].message.content
-                else:
-                    self.llm_answer = "답변을 생성하지 못했습니다."
+
+                # 토큰을 모아 두었다가 최대 SEARCH_STREAM_FPS 간격으로만 화면을 갱신합니다.
+                answer = ""
+                interval = 1.0 / SEARCH_STREAM_FPS if SEARCH_STREAM_FPS > 0 else 0.0
+                last_flush = time.monotonic()
+                async for chunk in stream:
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    answer += chunk.choices[0].delta.content
+                    now = time.monotonic()
+                    if now - last_flush >= interval:
+                        self.llm_answer = answer
+                        last_flush = now
+                        yield
+
+                self.llm_answer = answer or "답변을 생성하지 못했습니다."
             else:
                 self.llm_answer = "관련 문서를 찾지 못해 답변을 생성할 수 없습니다."
 
@@ -108,4 +139,5 @@ class SearchState(BaseState):
             self.search_results = []
         finally:
             self.is_loading = False
+            self.is_answering = False
             yield
\ No newline at end of file
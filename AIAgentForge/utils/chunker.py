@@ -1,16 +1,273 @@
 # langconnect_fullstack/utils/chunker.py
+import os
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterable, Iterator, NamedTuple
+
+import tiktoken
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-def chunk_text(text: str) -> list[dict]:
-    """LangChain을 사용하여 텍스트를 의미 있는 청크로 분할합니다."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,  # 각 청크의 최대 크기
-        chunk_overlap=200,  # 청크 간의 중복되는 문자 수
-        length_function=len,
+CHUNK_SIZE = 1000  # 각 청크의 최대 크기
+CHUNK_OVERLAP = 200  # 청크 간의 중복되는 문자 수
+# 스트리밍 청크 분할 시 한 번에 분할할 버퍼 크기(문자 수). 메모리는 이 창 크기로 제한됩니다.
+STREAM_WINDOW_CHARS = CHUNK_SIZE * 8
+
+# 청크 분할 방식: "tokens"(토큰 예산 기준, 제목/페이지 경계 보존) 또는 "chars"(기존 문자 수 기준)
+CHUNKER_MODE = os.getenv("CHUNKER_MODE", "tokens").lower()
+# 토큰 기준 청크의 최대 토큰 수와 청크 간 중복 토큰 수
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "512"))
+CHUNK_TOKEN_OVERLAP = int(os.getenv("CHUNK_TOKEN_OVERLAP", "64"))
+# 토큰 수 계산에 사용할 tiktoken 인코딩 (text-embedding-3 계열은 cl100k_base)
+CHUNK_ENCODING = os.getenv("CHUNK_ENCODING", "cl100k_base")
+# 이 길이(문자 수)보다 긴 줄은 제목으로 보지 않습니다.
+HEADING_MAX_CHARS = 80
+
+# 명시적인 제목 표시: 마크다운 제목, 제N편/장/절/관/조
+_HEADING_MARKER_RE = re.compile(r"^(?:#{1,6}\s+\S|제\s*\d+\s*[편장절관조])")
+# 번호 제목: 1.2 / 2.3.1 / 1.2. 처럼 두 단계 이상의 절 번호, 또는 로마 숫자(I. II.) 뒤의 제목.
+# "1. 항목" 같은 한 단계 번호는 목록으로 보고 제목으로 취급하지 않습니다.
+_NUMBERED_HEADING_RE = re.compile(r"^(?:\d+(?:\.\d+)+\.?|[IVX]{1,6}\.)\s+(?P<title>\S.*)$")
+# 문장 부호로 끝나는 줄은 본문으로 봅니다.
+_SENTENCE_END_RE = re.compile(r"[.!?。,;:…]$")
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    return tiktoken.get_encoding(CHUNK_ENCODING)
+
+
+def count_tokens(text: str) -> int:
+    """텍스트의 토큰 수를 반환합니다."""
+    return len(_get_encoding().encode(text, disallowed_special=()))
+
+
+@lru_cache(maxsize=8)
+def _get_splitter(unit: str, size: int, overlap: int) -> RecursiveCharacterTextSplitter:
+    """분할기를 한 번만 만들어 재사용합니다. unit은 "chars" 또는 "tokens"입니다."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=size,
+        chunk_overlap=overlap,
+        length_function=count_tokens if unit == "tokens" else len,
         is_separator_regex=False,
     )
+
+def chunk_text(text: str) -> list[dict]:
+    """LangChain을 사용하여 텍스트를 의미 있는 청크로 분할합니다."""
+    text_splitter = _get_splitter("chars", CHUNK_SIZE, CHUNK_OVERLAP)
     # split_text는 문자열 리스트를 반환합니다.
     chunks_text = text_splitter.split_text(text)
     # 파이프라인의 다른 부분에서 사용하기 쉽도록 딕셔너리 리스트로 변환합니다.
     chunks = [{"text": chunk} for chunk in chunks_text]
     return chunks
+
+def _page_at(span_starts: list[int], span_pages: list, offset: int):
+    """버퍼 내 offset 위치가 속한 레코드의 페이지 번호를 반환합니다."""
+    index = bisect_right(span_starts, offset) - 1
+    return span_pages[max(index, 0)] if span_pages else None
+
+def chunk_records(records: Iterable[dict], window_chars: int = STREAM_WINDOW_CHARS) -> Iterator[dict]:
+    """페이지/문단 레코드 스트림을 CHUNKER_MODE에 따라 청크로 분할합니다."""
+    if CHUNKER_MODE == "chars":
+        return chunk_records_by_chars(records, window_chars)
+    return chunk_records_by_tokens(records)
+
+def chunk_records_by_chars(records: Iterable[dict], window_chars: int = STREAM_WINDOW_CHARS) -> Iterator[dict]:
+    """페이지/문단 레코드 스트림을 받아 {"text", "page"} 청크를 순차적으로 생성합니다.
+
+    레코드를 window_chars 크기까지 모은 뒤 분할하고, 마지막 청크는 다음 창과 이어
+    분할되도록 버퍼에 남겨 둡니다. 전체 문서를 메모리에 올리지 않습니다.
+    """
+    text_splitter = _get_splitter("chars", CHUNK_SIZE, CHUNK_OVERLAP)
+    buffer = ""
+    span_starts: list[int] = []
+    span_pages: list = []
+
+    def emit(pieces: list[str]) -> Iterator[dict]:
+        cursor = 0
+        for piece in pieces:
+            offset = buffer.find(piece, cursor)
+            if offset < 0:
+                offset = cursor
+            yield {"text": piece, "page": _page_at(span_starts, span_pages, offset)}
+            cursor = offset + 1
+
+    for record in records:
+        text = record.get("text") or ""
+        if not text:
+            continue
+        span_starts.append(len(buffer))
+        span_pages.append(record.get("page"))
+        buffer += text
+        if len(buffer) < window_chars:
+            continue
+
+        pieces = text_splitter.split_text(buffer)
+        if len(pieces) < 2:
+            continue
+        yield from emit(pieces[:-1])
+
+        # 마지막 청크부터 버퍼를 다시 시작하고, 페이지 구간도 새 버퍼 기준으로 옮깁니다.
+        tail_offset = buffer.rfind(pieces[-1])
+        if tail_offset < 0:
+            tail_offset = max(len(buffer) - len(pieces[-1]), 0)
+        tail_page = _page_at(span_starts, span_pages, tail_offset)
+        kept = [(start - tail_offset, page) for start, page in zip(span_starts, span_pages) if start > tail_offset]
+        span_starts = [0] + [start for start, _ in kept]
+        span_pages = [tail_page] + [page for _, page in kept]
+        buffer = buffer[tail_offset:]
+
+    if buffer.strip():
+        yield from emit(text_splitter.split_text(buffer))
+
+class _Line(NamedTuple):
+    text: str
+    tokens: int
+    page: object
+    offset: int
+    paragraph_start: bool
+
+
+def _iter_lines(records: Iterable[dict]) -> Iterator[tuple[str, object, int, bool]]:
+    """레코드를 (줄, 페이지, 문서 내 문자 오프셋, 문단 시작 여부)로 펼칩니다. 빈 줄은 문단 경계로만 사용합니다."""
+    base = 0
+    for record in records:
+        text = record.get("text") or ""
+        page = record.get("page")
+        # 레코드(페이지/문단) 경계도 문단 경계로 봅니다.
+        paragraph_start = True
+        position = 0
+        for raw in text.splitlines(keepends=True):
+            line = raw.strip()
+            if line:
+                yield line, page, base + position + (len(raw) - len(raw.lstrip())), paragraph_start
+                paragraph_start = False
+            else:
+                paragraph_start = True
+            position += len(raw)
+        base += len(text)
+
+
+def _is_heading(line: str) -> bool:
+    """줄이 절 제목이면 True입니다. 목록 항목("1. 상자를 엽니다")이나 숫자로 시작하는 문장은 제외합니다."""
+    if len(line) > HEADING_MAX_CHARS or _SENTENCE_END_RE.search(line):
+        return False
+    if _HEADING_MARKER_RE.match(line):
+        return True
+    match = _NUMBERED_HEADING_RE.match(line)
+    # "3.5 million users joined"처럼 번호 뒤가 소문자로 이어지면 숫자로 시작하는 문장입니다.
+    return match is not None and not match.group("title")[0].islower()
+
+
+def _lines_tokens(lines: list[_Line]) -> int:
+    # 줄 사이 구분자("\n" 또는 "\n\n")는 각각 토큰 하나로 계산합니다.
+    return sum(line.tokens for line in lines) + max(len(lines) - 1, 0)
+
+
+def chunk_records_by_tokens(
+    records: Iterable[dict],
+    max_tokens: int | None = None,
+    overlap_tokens: int | None = None,
+) -> Iterator[dict]:
+    """레코드 스트림을 토큰 예산 안에서 줄 단위로 묶어 청크를 생성합니다.
+
+    - 제목 줄에서는 항상 새 청크를 시작하고, 페이지가 바뀌면 현재 청크가 예산의 절반 이상일 때 나눕니다.
+    - 예산 안에 들어가는 줄은 분할기를 거치지 않고 그대로 묶습니다. 예산을 넘는 긴 줄만
+      토큰 기준 분할기로 나눕니다.
+    - 크기 때문에 나눌 때만 앞 청크의 마지막 줄들을 overlap_tokens까지 다음 청크에 이어 붙입니다.
+
+    청크는 {"text", "page", "page_end", "offset", "tokens", "heading"} 형태입니다.
+    """
+    max_tokens = max_tokens or CHUNK_TOKENS
+    overlap_tokens = CHUNK_TOKEN_OVERLAP if overlap_tokens is None else overlap_tokens
+    lines: list[_Line] = []
+    heading: str | None = None
+    chunk_heading: str | None = None
+
+    def make_chunk(items: list[_Line]) -> dict:
+        parts = [items[0].text]
+        for item in items[1:]:
+            parts.append("\n\n" if item.paragraph_start else "\n")
+            parts.append(item.text)
+        return {
+            "text": "".join(parts),
+            "page": items[0].page,
+            "page_end": items[-1].page,
+            "offset": items[0].offset,
+            "tokens": _lines_tokens(items),
+            "heading": chunk_heading,
+        }
+
+    for text, page, offset, paragraph_start in _iter_lines(records):
+        tokens = count_tokens(text)
+        is_heading = _is_heading(text)
+
+        if lines and (is_heading or (page != lines[0].page and _lines_tokens(lines) >= max_tokens // 2)):
+            yield make_chunk(lines)
+            lines = []
+        if is_heading:
+            heading = text
+
+        if tokens > max_tokens:
+            # 느린 경로: 한 줄이 예산을 넘으면 토큰 기준 분할기로 나눕니다.
+            # 직전에 제목 줄만 있으면 제목만 담긴 청크를 만들지 않고 첫 조각 앞에 붙입니다.
+            prefix = None
+            if len(lines) == 1 and lines[0].text == heading and lines[0].tokens < overlap_tokens:
+                prefix = lines[0]
+            elif lines:
+                yield make_chunk(lines)
+            lines = []
+            splitter = _get_splitter("tokens", max_tokens - (prefix.tokens + 1 if prefix else 0), overlap_tokens)
+            cursor = 0
+            for piece in splitter.split_text(text):
+                position = text.find(piece, cursor)
+                if position < 0:
+                    position = cursor
+                chunk = {
+                    "text": piece,
+                    "page": page,
+                    "page_end": page,
+                    "offset": offset + position,
+                    "tokens": count_tokens(piece),
+                    "heading": heading,
+                }
+                if prefix:
+                    chunk.update(
+                        text=f"{prefix.text}\n{piece}",
+                        page=prefix.page,
+                        offset=prefix.offset,
+                        tokens=chunk["tokens"] + prefix.tokens + 1,
+                    )
+                    prefix = None
+                yield chunk
+                cursor = position + 1
+            continue
+
+        if lines and _lines_tokens(lines) + 1 + tokens > max_tokens:
+            yield make_chunk(lines)
+            # 마지막 줄들을 overlap_tokens 안에서 다음 청크의 앞부분으로 넘깁니다.
+            carry: list[_Line] = []
+            for item in reversed(lines):
+                if _lines_tokens([item, *carry]) > overlap_tokens:
+                    break
+                carry.insert(0, item)
+            if carry and _lines_tokens(carry) + 1 + tokens > max_tokens:
+                carry = []
+            lines = carry
+        if not lines:
+            chunk_heading = heading
+        lines.append(_Line(text, tokens, page, offset, paragraph_start))
+
+    if lines:
+        yield make_chunk(lines)
+
+def batch_chunks(chunks: Iterable[dict], batch_size: int) -> Iterator[list[dict]]:
+    """청크 스트림을 batch_size 개씩 묶어 리스트로 생성합니다."""
+    batch: list[dict] = []
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,11 +1,16 @@
 # AIAgentForge/utils/dependencies.py
 
+import asyncio
 import os
+import time
 from typing import Annotated
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from supabase import create_client, Client
 from gotrue.types import User
+from cachetools import TTLCache
+
+from AIAgentForge.utils.jwt_auth import InvalidTokenError, is_revoked, token_key, unverified_claims, verify_token
 
 #.env 파일에서 Supabase 설정 로드
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -14,28 +19,71 @@ SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
 # Supabase 클라이언트 생성
 supabase_client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# 검증된 토큰 캐시 (토큰 해시 → (사용자, 만료 시각, 세션 id)). 항목은 TTL과 토큰 만료 중 먼저 오는 시점까지 유효합니다.
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+_token_cache: TTLCache = TTLCache(maxsize=AUTH_TOKEN_CACHE_SIZE, ttl=AUTH_TOKEN_CACHE_TTL)
+# 원격 확인으로 얻은 사용자 객체 (사용자 id → User). 토큰이 갱신되어도 로컬 검증만으로 사용자를 찾습니다.
+_user_cache: TTLCache = TTLCache(maxsize=AUTH_TOKEN_CACHE_SIZE, ttl=AUTH_TOKEN_CACHE_TTL)
+
 # OAuth2 스키마 정의. tokenUrl은 실제 토큰 발급 엔드포인트를 가리키지만,
 # 여기서는 주로 OpenAPI 문서 생성을 위해 사용됩니다.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+def _cache_user(key: str, user: User, claims: dict) -> None:
+    _token_cache[key] = (user, claims.get("exp"), claims.get("session_id"))
+    _user_cache[str(user.id)] = user
+
+
 async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     """
     Authorization 헤더의 Bearer 토큰을 검증하고,
     유효한 경우 Supabase 사용자 객체를 반환하는 의존성 함수입니다.
+
+    토큰은 먼저 로컬에서 서명/만료를 검증하고(utils/jwt_auth.py), 이미 확인한 토큰이나 사용자는 캐시에서 반환합니다.
+    Supabase Auth 원격 확인은 처음 보는 사용자, 로컬 검증이 불가능한 토큰, 폐기된 세션의 토큰에만 사용합니다.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    key = token_key(token)
+    now = time.time()
+
+    cached = _token_cache.get(key)
+    if cached is not None:
+        user, exp, session_id = cached
+        if is_revoked(session_id):
+            # 로그아웃된 세션: 캐시를 버리고 원격으로 다시 확인합니다.
+            _token_cache.pop(key, None)
+        elif exp is None or exp > now:
+            return user
+        else:
+            _token_cache.pop(key, None)
+            raise credentials_exception
+
+    try:
+        # JWKS를 처음 읽을 때 네트워크 호출이 있으므로 스레드에서 실행합니다.
+        claims = await asyncio.to_thread(verify_token, token)
+    except InvalidTokenError:
+        raise credentials_exception
+
+    if claims is not None:
+        user = _user_cache.get(claims["sub"])
+        if user is not None:
+            _cache_user(key, user, claims)
+            return user
+
     try:
         # Supabase 클라이언트를 사용하여 토큰의 유효성을 서버 측에서 확인합니다.
-        response = supabase_client.auth.get_user(token)
+        response = await asyncio.to_thread(supabase_client.auth.get_user, token)
         user = response.user
         if not user:
             raise credentials_exception
-        return user
     except Exception:
         # 토큰이 만료되었거나 유효하지 않은 경우 예외가 발생합니다.
         raise credentials_exception
-
+    # 원격 확인을 통과했으므로 서명을 확인하지 못한 토큰도 만료 시각 클레임을 믿을 수 있습니다.
+    _cache_user(key, user, claims or unverified_claims(token))
+    return user
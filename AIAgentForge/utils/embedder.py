@@ -1,27 +1,277 @@
 # langconnect_fullstack/utils/embedder.py
+import asyncio
+import logging
 import os
-from openai import AsyncOpenAI
+import random
+import unicodedata
+from typing import AsyncIterator, Callable
+
+import tiktoken
+from cachetools import TTLCache
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    APITimeoutError,
+    AsyncOpenAI,
+    RateLimitError,
+)
+
+from .embedding_cache import EMBEDDING_CACHE_ENABLED, content_hash, embedding_cache
+
+logger = logging.getLogger(__name__)
 
 # 환경 변수에서 OpenAI API 키를 가져와 클라이언트를 초기화합니다.
-client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# 재시도는 아래 엔진에서 직접 처리하므로 SDK의 자동 재시도는 끕니다.
+client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"), max_retries=0)
+
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+# 입력 하나의 최대 토큰 수(모델 제한). 초과분은 잘라냅니다.
+EMBEDDING_MAX_INPUT_TOKENS = 8191
+# 요청 하나에 담을 최대 토큰 수와 입력 수
+EMBEDDING_BATCH_TOKENS = int(os.getenv("EMBEDDING_BATCH_TOKENS", "20000"))
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "2048"))
+# 동시에 보낼 수 있는 임베딩 요청 수
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+# 429/5xx/네트워크 오류 시 재시도 횟수와 백오프(초)
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+EMBEDDING_BACKOFF_BASE = float(os.getenv("EMBEDDING_BACKOFF_BASE", "1.0"))
+EMBEDDING_BACKOFF_MAX = float(os.getenv("EMBEDDING_BACKOFF_MAX", "30.0"))
+# 검색 쿼리 임베딩 캐시 (LRU 크기, TTL 초)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+QUERY_EMBEDDING_CACHE_TTL = float(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+
+
+class EmbeddingError(Exception):
+    """재시도 후에도 임베딩 생성에 실패했을 때 발생합니다."""
+
+
+_encoding = None
+_semaphore: asyncio.Semaphore | None = None
+_query_cache: TTLCache = TTLCache(maxsize=QUERY_EMBEDDING_CACHE_SIZE, ttl=QUERY_EMBEDDING_CACHE_TTL)
+# 같은 쿼리에 대한 동시 요청이 API를 한 번만 호출하도록 진행 중인 요청을 공유합니다.
+_query_inflight: dict[str, asyncio.Future] = {}
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(EMBEDDING_MODEL)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+    return _semaphore
 
-async def generate_embeddings(texts: list[str]) -> list[list[float]]:
-    """OpenAI API를 사용하여 텍스트 목록에 대한 임베딩을 비동기적으로 생성합니다."""
+
+def split_by_token_budget(
+    texts: list[str],
+    max_tokens: int | None = None,
+    max_inputs: int | None = None,
+) -> list[tuple[int, list[str]]]:
+    """텍스트 목록을 토큰 예산에 맞춰 (시작 인덱스, 텍스트 목록) 배치로 나눕니다."""
+    max_tokens = max_tokens or EMBEDDING_BATCH_TOKENS
+    max_inputs = max_inputs or EMBEDDING_BATCH_MAX_INPUTS
+    encoding = _get_encoding()
+    batches: list[tuple[int, list[str]]] = []
+    batch: list[str] = []
+    batch_start = 0
+    batch_tokens = 0
+    for index, text in enumerate(texts):
+        # 빈 문자열은 API 오류를 일으키므로 공백 하나로 대체합니다.
+        text = text or " "
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) > EMBEDDING_MAX_INPUT_TOKENS:
+            text = encoding.decode(tokens[:EMBEDDING_MAX_INPUT_TOKENS])
+            tokens = tokens[:EMBEDDING_MAX_INPUT_TOKENS]
+        if batch and (batch_tokens + len(tokens) > max_tokens or len(batch) >= max_inputs):
+            batches.append((batch_start, batch))
+            batch, batch_start, batch_tokens = [], index, 0
+        batch.append(text)
+        batch_tokens += len(tokens)
+    if batch:
+        batches.append((batch_start, batch))
+    return batches
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (RateLimitError, APITimeoutError, APIConnectionError)):
+        return True
+    return isinstance(error, APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Retry-After 헤더가 있으면 따르고, 없으면 지터를 더한 지수 백오프를 사용합니다."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), EMBEDDING_BACKOFF_MAX)
+        except ValueError:
+            pass
+    delay = min(EMBEDDING_BACKOFF_BASE * (2 ** attempt), EMBEDDING_BACKOFF_MAX)
+    return delay * (0.5 + random.random() / 2)
+
+
+async def _embed_batch(texts: list[str]) -> list[list[float]]:
+    """배치 하나를 세마포어 아래에서 임베딩하고, 일시적 오류는 백오프 후 재시도합니다."""
+    async with _get_semaphore():
+        for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+            try:
+                res = await client.embeddings.create(input=texts, model=EMBEDDING_MODEL)
+                return [record.embedding for record in sorted(res.data, key=lambda r: r.index)]
+            except Exception as e:
+                if not _is_retryable(e) or attempt == EMBEDDING_MAX_RETRIES:
+                    raise EmbeddingError(f"임베딩 생성 실패 ({len(texts)}개 입력): {e}") from e
+                delay = _retry_delay(e, attempt)
+                logger.warning(f"Embedding request failed ({e}); retrying in {delay:.1f}s ({attempt + 1}/{EMBEDDING_MAX_RETRIES})")
+                await asyncio.sleep(delay)
+
+
+async def iter_embedding_batches(texts: list[str]) -> AsyncIterator[tuple[list[int], list[list[float]]]]:
+    """텍스트 목록을 임베딩하고, 준비되는 순서대로 (원본 인덱스 목록, 임베딩 목록)을 생성합니다.
+
+    임베딩 캐시에 있는 텍스트는 가장 먼저 한 번에 반환되고, 나머지는 중복을 제거한 뒤
+    토큰 예산으로 나눈 배치를 동시에 요청합니다. 배치 하나라도 최종 실패하면
+    남은 요청을 취소하고 EmbeddingError를 발생시킵니다.
+    """
+    if not texts:
+        return
+
+    # 같은 내용의 텍스트는 한 번만 임베딩하도록 해시별로 원본 인덱스를 모읍니다.
+    hashes = [content_hash(text) for text in texts]
+    positions: dict[str, list[int]] = {}
+    for index, h in enumerate(hashes):
+        positions.setdefault(h, []).append(index)
+
+    if EMBEDDING_CACHE_ENABLED:
+        cached = await asyncio.to_thread(embedding_cache.get_many, EMBEDDING_MODEL, list(positions))
+        if cached:
+            hit_indices = [index for h in cached for index in positions.pop(h)]
+            yield hit_indices, [cached[hashes[index]] for index in hit_indices]
+
+    if not positions:
+        return
+
+    miss_hashes = list(positions)
+    batches = split_by_token_budget([texts[positions[h][0]] for h in miss_hashes])
+
+    async def run(start: int, batch: list[str]) -> tuple[int, list[list[float]]]:
+        return start, await _embed_batch(batch)
+
+    tasks = [asyncio.create_task(run(start, batch)) for start, batch in batches]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            start, batch_embeddings = await next_done
+            batch_hashes = miss_hashes[start:start + len(batch_embeddings)]
+            if EMBEDDING_CACHE_ENABLED:
+                await asyncio.to_thread(
+                    embedding_cache.put_many, EMBEDDING_MODEL, dict(zip(batch_hashes, batch_embeddings))
+                )
+            indices: list[int] = []
+            embeddings: list[list[float]] = []
+            for h, embedding in zip(batch_hashes, batch_embeddings):
+                for index in positions[h]:
+                    indices.append(index)
+                    embeddings.append(embedding)
+            yield indices, embeddings
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_embeddings(
+    texts: list[str],
+    on_progress: Callable[[int, int], None] | None = None,
+) -> list[list[float]]:
+    """OpenAI API를 사용하여 텍스트 목록에 대한 임베딩을 비동기적으로 생성합니다.
+
+    on_progress가 주어지면 배치가 끝날 때마다 (완료된 텍스트 수, 전체 텍스트 수)로 호출됩니다.
+    실패 시 빈 벡터를 돌려주지 않고 EmbeddingError를 발생시킵니다.
+    """
     if not texts:
         # texts가 비어있을 경우 None 대신 빈 리스트를 반환하는 것이 더 일관성 있습니다.
         return []
 
+    embeddings: list[list[float]] = [[] for _ in texts]
+    done = 0
+    async for indices, batch_embeddings in iter_embedding_batches(texts):
+        for index, embedding in zip(indices, batch_embeddings):
+            embeddings[index] = embedding
+        done += len(indices)
+        if on_progress:
+            on_progress(done, len(texts))
+    return embeddings
+
+
+def normalize_query(query: str) -> str:
+    """유니코드 정규화, 공백 정리, 대소문자 통일로 거의 같은 쿼리를 하나의 캐시 키로 모읍니다.
+
+    캐시 키로만 사용합니다. 대소문자가 의미를 가질 수 있으므로 API에는 원래 쿼리를 보냅니다.
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).split()).casefold()
+
+
+async def embed_query(query: str) -> list[float]:
+    """검색 쿼리 하나의 임베딩을 반환합니다. TTL+LRU 캐시에 있으면 API를 호출하지 않습니다."""
+    key = normalize_query(query)
+    if not key:
+        raise EmbeddingError("빈 쿼리는 임베딩할 수 없습니다.")
+
+    embedding = _query_cache.get(key)
+    if embedding is not None:
+        return embedding
+
+    inflight = _query_inflight.get(key)
+    if inflight is not None:
+        return await asyncio.shield(inflight)
+
+    future = asyncio.get_running_loop().create_future()
+    _query_inflight[key] = future
     try:
-        # 임베딩 API를 비동기적으로 호출합니다.
-        res = await client.embeddings.create(
-            input=texts,
-            model="text-embedding-3-small"
-        )
-        # 응답에서 임베딩 데이터만 추출하여 반환합니다.
-        embeddings = [record.embedding for record in res.data]
-        return embeddings
+        embedding = (await _embed_batch([query]))[0]
+        _query_cache[key] = embedding
+        future.set_result(embedding)
+        return embedding
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
     except Exception as e:
-        print(f"임베딩 생성 중 오류 발생: {e}")
-        # 실제 애플리케이션에서는 더 정교한 오류 처리가 필요합니다.
-        # 오류 발생 시, 입력된 텍스트 수만큼 빈 리스트를 반환합니다.
-        return [[] for _ in texts]
\ No newline at end of file
+        future.set_exception(e)
+        # 기다리는 요청이 없을 때 "exception was never retrieved" 경고를 막습니다.
+        future.exception()
+        raise
+    finally:
+        _query_inflight.pop(key, None)
+
+
+async def embed_queries(queries: list[str]) -> list[list[float]]:
+    """여러 검색 쿼리의 임베딩을 입력 순서대로 반환합니다.
+
+    캐시에 없는 쿼리만 중복을 제거하여 embeddings.create 한 번으로 요청하고, 결과는 쿼리 캐시에 저장합니다.
+    """
+    keys = [normalize_query(query) for query in queries]
+    if not all(keys):
+        raise EmbeddingError("빈 쿼리는 임베딩할 수 없습니다.")
+
+    found = {}
+    for key in set(keys):
+        embedding = _query_cache.get(key)
+        if embedding is not None:
+            found[key] = embedding
+    # 키가 같은 쿼리는 처음 나온 원래 쿼리로 한 번만 임베딩합니다.
+    missing: dict[str, str] = {}
+    for key, query in zip(keys, queries):
+        if key not in found:
+            missing.setdefault(key, query)
+    if missing:
+        embeddings = await _embed_batch(list(missing.values()))
+        for key, embedding in zip(missing, embeddings):
+            _query_cache[key] = embedding
+            found[key] = embedding
+    return [found[key] for key in keys]
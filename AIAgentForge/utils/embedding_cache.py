@@ -0,0 +1,132 @@
+# AIAgentForge/utils/embedding_cache.py
+# (모델, sha256(텍스트))를 키로 하는 2단계 임베딩 캐시입니다.
+# 1단계: 프로세스 메모리의 LRU, 2단계: 로컬 SQLite 파일. 동일한 청크는 API를 다시 호출하지 않습니다.
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+# 메모리 LRU에 보관할 최대 임베딩 수 (1536차원 float32 기준 항목당 약 6KB)
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "5000"))
+# SQLite 캐시 파일 경로. 빈 문자열이면 디스크 계층을 사용하지 않습니다.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(".cache", "embedding_cache.sqlite3"))
+
+
+def content_hash(text: str) -> str:
+    """청크 텍스트의 sha256 해시(hex)를 반환합니다."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """메모리 LRU + SQLite 계층으로 구성된 임베딩 캐시입니다. 스레드 안전합니다."""
+
+    def __init__(self, path: str = "", memory_items: int = 5000):
+        self.path = path
+        self.memory_items = memory_items
+        self._memory: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+    def _get_conn(self) -> sqlite3.Connection | None:
+        if not self.path:
+            return None
+        if self._conn is None:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(self.path, check_same_thread=False)
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                self._conn.execute("PRAGMA synchronous=NORMAL")
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings ("
+                    " model TEXT NOT NULL,"
+                    " hash TEXT NOT NULL,"
+                    " embedding BLOB NOT NULL,"
+                    " PRIMARY KEY (model, hash))"
+                )
+            except sqlite3.Error as e:
+                # 디스크 계층을 열 수 없으면 메모리 캐시만 사용합니다.
+                logger.warning(f"Embedding cache disk tier disabled: {e}")
+                self.path = ""
+                self._conn = None
+        return self._conn
+
+    def _remember(self, key: tuple[str, str], blob: bytes) -> None:
+        self._memory[key] = blob
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        """캐시에 있는 해시의 임베딩을 {hash: embedding}으로 반환합니다."""
+        found: dict[str, bytes] = {}
+        with self._lock:
+            missing = []
+            for h in hashes:
+                blob = self._memory.get((model, h))
+                if blob is not None:
+                    self._memory.move_to_end((model, h))
+                    found[h] = blob
+                    self.stats["memory_hits"] += 1
+                else:
+                    missing.append(h)
+
+            conn = self._get_conn()
+            if conn is not None and missing:
+                unique_missing = list(dict.fromkeys(missing))
+                # SQLite 바인딩 변수 개수 제한을 피하기 위해 나누어 조회합니다.
+                for i in range(0, len(unique_missing), 500):
+                    part = unique_missing[i:i + 500]
+                    placeholders = ",".join("?" * len(part))
+                    rows = conn.execute(
+                        f"SELECT hash, embedding FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                        [model, *part],
+                    ).fetchall()
+                    for h, blob in rows:
+                        found[h] = blob
+                        self._remember((model, h), blob)
+                for h in missing:
+                    if h in found:
+                        self.stats["disk_hits"] += 1
+                    else:
+                        self.stats["misses"] += 1
+            else:
+                self.stats["misses"] += len(missing)
+
+        return {h: array("f", blob).tolist() for h, blob in found.items()}
+
+    def put_many(self, model: str, items: dict[str, list[float]]) -> None:
+        """{hash: embedding}을 메모리와 디스크 계층에 저장합니다."""
+        if not items:
+            return
+        blobs = {h: array("f", embedding).tobytes() for h, embedding in items.items() if embedding}
+        with self._lock:
+            for h, blob in blobs.items():
+                self._remember((model, h), blob)
+            conn = self._get_conn()
+            if conn is not None:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO embeddings (model, hash, embedding) VALUES (?, ?, ?)",
+                        [(model, h, blob) for h, blob in blobs.items()],
+                    )
+            self.stats["writes"] += len(blobs)
+
+    def hit_rate(self) -> float:
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_ITEMS)
+
+
+def cache_stats() -> dict:
+    """캐시 적중/미스 카운터를 반환합니다."""
+    return {**embedding_cache.stats, "hit_rate": round(embedding_cache.hit_rate(), 4)}
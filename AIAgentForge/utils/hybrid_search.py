@@ -0,0 +1,65 @@
+# AIAgentForge/utils/hybrid_search.py
+# 하이브리드 검색 RPC 호출 파라미터를 한곳에서 만듭니다.
+# SearchState와 MCP 엔드포인트(v1_router)가 같은 검색 설정을 사용하도록 합니다.
+import os
+
+# 호출할 검색 RPC 이름. v2(SQL/hybrid_search_multilingual_v2)는 문서 이름까지 한 번에 반환합니다.
+# v2 함수를 아직 배포하지 않았다면 SEARCH_RPC=hybrid_search_multilingual로 이전 버전을 사용할 수 있습니다.
+SEARCH_RPC = os.getenv("SEARCH_RPC", "hybrid_search_multilingual_v2")
+LEGACY_SEARCH_RPC = "hybrid_search_multilingual"
+LEGACY_UNSUPPORTED_PARAMS = ("fusion", "semantic_weight", "keyword_weight", "semantic_count", "keyword_count")
+# RRF 상수
+SEARCH_RRF_K = int(os.getenv("SEARCH_RRF_K", "60"))
+# HNSW 검색 후보 수(hnsw.ef_search). 클수록 재현율이 높아지고 느려집니다.
+SEARCH_EF_SEARCH = int(os.getenv("SEARCH_EF_SEARCH", "40"))
+# IVFFlat 인덱스를 사용할 때 탐색할 리스트 수(ivfflat.probes)
+SEARCH_IVFFLAT_PROBES = int(os.getenv("SEARCH_IVFFLAT_PROBES", "10"))
+# 결합 방식: "rrf"(가중 RRF) 또는 "score"(검색별 min-max 정규화 점수의 가중합)
+SEARCH_FUSION = os.getenv("SEARCH_FUSION", "rrf")
+SEARCH_FUSIONS = ("rrf", "score")
+# 의미/키워드 검색 결과의 가중치
+SEARCH_SEMANTIC_WEIGHT = float(os.getenv("SEARCH_SEMANTIC_WEIGHT", "1.0"))
+SEARCH_KEYWORD_WEIGHT = float(os.getenv("SEARCH_KEYWORD_WEIGHT", "1.0"))
+# 결합 전에 각 검색에서 가져올 후보 수. match_count보다 작으면 match_count를 사용합니다.
+SEARCH_SEMANTIC_COUNT = int(os.getenv("SEARCH_SEMANTIC_COUNT", "40"))
+SEARCH_KEYWORD_COUNT = int(os.getenv("SEARCH_KEYWORD_COUNT", "40"))
+
+
+def build_search_params(
+    query_text: str,
+    query_embedding: list[float],
+    owner_id: str,
+    collection_id: str,
+    match_count: int,
+    ef_search: int | None = None,
+    rrf_k: int | None = None,
+    fusion: str | None = None,
+    semantic_weight: float | None = None,
+    keyword_weight: float | None = None,
+    semantic_count: int | None = None,
+    keyword_count: int | None = None,
+) -> dict:
+    """하이브리드 검색 RPC 파라미터를 만듭니다. 지정하지 않은(None) 값은 환경 변수 기본값을 사용합니다."""
+    fusion = fusion or SEARCH_FUSION
+    if fusion not in SEARCH_FUSIONS:
+        raise ValueError(f"Unknown fusion: {fusion} (expected one of {SEARCH_FUSIONS})")
+    params = {
+        "query_text": query_text,
+        "query_embedding": query_embedding,
+        "p_owner_id": owner_id,
+        "p_collection_id": collection_id,
+        "match_count": match_count,
+        "rrf_k": SEARCH_RRF_K if rrf_k is None else rrf_k,
+        "ef_search": ef_search or SEARCH_EF_SEARCH,
+        "ivfflat_probes": SEARCH_IVFFLAT_PROBES,
+        "fusion": fusion,
+        "semantic_weight": SEARCH_SEMANTIC_WEIGHT if semantic_weight is None else semantic_weight,
+        "keyword_weight": SEARCH_KEYWORD_WEIGHT if keyword_weight is None else keyword_weight,
+        "semantic_count": max(semantic_count or SEARCH_SEMANTIC_COUNT, match_count),
+        "keyword_count": max(keyword_count or SEARCH_KEYWORD_COUNT, match_count),
+    }
+    if SEARCH_RPC == LEGACY_SEARCH_RPC:
+        # 이전 버전 RPC는 결합 설정 파라미터를 받지 않습니다.
+        for key in LEGACY_UNSUPPORTED_PARAMS:
+            params.pop(key)
+    return params
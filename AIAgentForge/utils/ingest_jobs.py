@@ -0,0 +1,251 @@
+# AIAgentForge/utils/ingest_jobs.py
+# 업로드 수집(ingestion) 작업 대기열입니다.
+# 업로드된 파일은 스풀 디렉터리(INGEST_SPOOL_DIR)에 저장되고, 작업 행은 로컬 SQLite 테이블에 기록됩니다.
+# 워커 프로세스(utils/ingest_worker.py)가 작업을 가져가 처리하고 진행 상황을 같은 행에 기록하며,
+# DocumentState는 이 행을 조회하여 UI에 반영합니다. 브라우저 탭을 닫아도 작업은 계속됩니다.
+# 작업 행에는 사용자 토큰을 저장하지 않습니다. 컬렉션 소유 여부는 작업을 넣을 때 확인하고,
+# 워커는 서비스 키(SUPABASE_SERVICE_KEY)로 처리하면서 다시 확인합니다.
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+# 실행 방식: "inline"(웹 서버의 이벤트 핸들러에서 처리) 또는 "background"(워커 프로세스에서 처리)
+INGEST_MODE = os.getenv("INGEST_MODE", "inline").lower()
+INGEST_JOBS_PATH = os.getenv("INGEST_JOBS_PATH", os.path.join(".cache", "ingest_jobs.sqlite3"))
+INGEST_SPOOL_DIR = os.getenv("INGEST_SPOOL_DIR", os.path.join(".cache", "ingest_spool"))
+# 이 시간(초) 동안 하트비트가 없는 running 작업은 워커가 죽은 것으로 보고 다시 대기열에 넣습니다.
+INGEST_JOB_STALE_SECONDS = int(os.getenv("INGEST_JOB_STALE_SECONDS", "300"))
+INGEST_JOB_MAX_ATTEMPTS = int(os.getenv("INGEST_JOB_MAX_ATTEMPTS", "3"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+@dataclass
+class IngestJob:
+    id: str
+    owner_id: str
+    collection_id: str
+    filename: str
+    content_type: str | None
+    spool_path: str
+    status: str
+    progress: int
+    status_key: str | None
+    error_key: str | None
+    error_kwargs: dict
+    attempts: int
+    replace_existing: bool = False
+    created_at: float = 0.0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (STATUS_DONE, STATUS_FAILED)
+
+
+class JobStore:
+    """SQLite 기반 작업 대기열입니다. 여러 프로세스가 같은 파일을 공유할 수 있습니다."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ingest_jobs ("
+                " id TEXT PRIMARY KEY,"
+                " owner_id TEXT NOT NULL,"
+                " collection_id TEXT NOT NULL,"
+                " filename TEXT NOT NULL,"
+                " content_type TEXT,"
+                " spool_path TEXT NOT NULL,"
+                " status TEXT NOT NULL,"
+                " progress INTEGER NOT NULL DEFAULT 0,"
+                " status_key TEXT,"
+                " error_key TEXT,"
+                " error_kwargs TEXT NOT NULL DEFAULT '{}',"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " replace_existing INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ingest_jobs_status_idx ON ingest_jobs (status, created_at)"
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> IngestJob:
+        return IngestJob(
+            id=row["id"],
+            owner_id=row["owner_id"],
+            collection_id=row["collection_id"],
+            filename=row["filename"],
+            content_type=row["content_type"],
+            spool_path=row["spool_path"],
+            status=row["status"],
+            progress=row["progress"],
+            status_key=row["status_key"],
+            error_key=row["error_key"],
+            error_kwargs=json.loads(row["error_kwargs"] or "{}"),
+            attempts=row["attempts"],
+            replace_existing=bool(row["replace_existing"]),
+            created_at=row["created_at"],
+        )
+
+    def enqueue(
+        self,
+        owner_id: str,
+        collection_id: str,
+        filename: str,
+        content_type: str | None,
+        spool_path: str,
+        replace_existing: bool = False,
+    ) -> str:
+        """작업을 대기열에 넣습니다. 호출 측이 사용자가 collection_id를 소유하는지 먼저 확인해야 합니다."""
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self._conn().execute(
+            "INSERT INTO ingest_jobs (id, owner_id, collection_id, filename, content_type, spool_path,"
+            " replace_existing, status, status_key, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, owner_id, collection_id, filename, content_type, spool_path,
+             int(replace_existing), STATUS_QUEUED, "upload_waiting", now, now),
+        )
+        return job_id
+
+    def claim(self) -> IngestJob | None:
+        """대기 중인 가장 오래된 작업 하나를 running으로 바꾸고 반환합니다."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM ingest_jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED,),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE ingest_jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (STATUS_RUNNING, time.time(), row["id"]),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        job = self._to_job(row)
+        job.status = STATUS_RUNNING
+        job.attempts += 1
+        return job
+
+    def update(
+        self,
+        job_id: str,
+        progress: int | None = None,
+        status_key: str | None = None,
+        error_key: str | None = None,
+        error_kwargs: dict | None = None,
+        status: str | None = None,
+    ) -> None:
+        """진행 상황을 기록합니다. 호출될 때마다 updated_at이 갱신되어 하트비트 역할도 합니다."""
+        fields = ["updated_at = ?"]
+        values: list = [time.time()]
+        for column, value in (
+            ("progress", progress),
+            ("status_key", status_key),
+            ("error_key", error_key),
+            ("status", status),
+        ):
+            if value is not None:
+                fields.append(f"{column} = ?")
+                values.append(value)
+        if error_kwargs is not None:
+            fields.append("error_kwargs = ?")
+            values.append(json.dumps(error_kwargs, ensure_ascii=False))
+        values.append(job_id)
+        self._conn().execute(f"UPDATE ingest_jobs SET {', '.join(fields)} WHERE id = ?", values)
+
+    def heartbeat(self, job_ids: list[str]) -> None:
+        if not job_ids:
+            return
+        placeholders = ",".join("?" * len(job_ids))
+        self._conn().execute(
+            f"UPDATE ingest_jobs SET updated_at = ? WHERE id IN ({placeholders})",
+            [time.time(), *job_ids],
+        )
+
+    def requeue_stale(self) -> int:
+        """하트비트가 끊긴 running 작업을 다시 대기열에 넣거나, 재시도 횟수를 넘으면 실패 처리합니다."""
+        cutoff = time.time() - INGEST_JOB_STALE_SECONDS
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 실패 처리할 작업은 다시 실행되지 않으므로 스풀 파일도 함께 지웁니다.
+            failed_rows = conn.execute(
+                "SELECT id, spool_path FROM ingest_jobs WHERE status = ? AND updated_at < ? AND attempts >= ?",
+                (STATUS_RUNNING, cutoff, INGEST_JOB_MAX_ATTEMPTS),
+            ).fetchall()
+            if failed_rows:
+                placeholders = ",".join("?" * len(failed_rows))
+                conn.execute(
+                    "UPDATE ingest_jobs SET status = ?, progress = 100, status_key = 'status_failed',"
+                    f" error_key = 'upload_error', error_kwargs = ?, updated_at = ? WHERE id IN ({placeholders})",
+                    [STATUS_FAILED, json.dumps({"error": "worker timeout"}), time.time(),
+                     *(row["id"] for row in failed_rows)],
+                )
+            requeued = conn.execute(
+                "UPDATE ingest_jobs SET status = ?, status_key = 'upload_waiting', updated_at = ?"
+                " WHERE status = ? AND updated_at < ?",
+                (STATUS_QUEUED, time.time(), STATUS_RUNNING, cutoff),
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for row in failed_rows:
+            try:
+                os.remove(row["spool_path"])
+            except OSError:
+                pass
+        failed = len(failed_rows)
+        if failed or requeued:
+            logger.warning(f"Stale ingest jobs: requeued={requeued}, failed={failed}")
+        return requeued
+
+    def get_jobs(self, job_ids: list[str]) -> list[IngestJob]:
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+        rows = self._conn().execute(
+            f"SELECT * FROM ingest_jobs WHERE id IN ({placeholders})", job_ids
+        ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+    def active_jobs(self, owner_id: str, collection_id: str) -> list[IngestJob]:
+        """컬렉션에서 아직 끝나지 않은 사용자의 작업 목록을 반환합니다."""
+        rows = self._conn().execute(
+            "SELECT * FROM ingest_jobs WHERE owner_id = ? AND collection_id = ? AND status IN (?, ?)"
+            " ORDER BY created_at",
+            (owner_id, collection_id, STATUS_QUEUED, STATUS_RUNNING),
+        ).fetchall()
+        return [self._to_job(row) for row in rows]
+
+
+job_store = JobStore(INGEST_JOBS_PATH)
@@ -0,0 +1,482 @@
+# AIAgentForge/utils/ingest_pipeline.py
+# 여러 파일을 동시에 처리하는 업로드 파이프라인입니다.
+# 파일마다 스토리지 업로드 → 추출/청크 분할 → 임베딩 → 섹션 저장 단계를 거치며,
+# 단계별 세마포어로 동시 실행 수를 따로 제한합니다. 상태(State)에 직접 접근하지 않고
+# 진행 이벤트를 콜백으로 전달하므로 Reflex 이벤트 핸들러가 이를 받아 UI에 반영합니다.
+import asyncio
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .embedder import iter_embedding_batches
+from .embedding_cache import content_hash
+from .ingest_pool import aiter_chunk_batches
+from .section_writer import SectionWriteError, write_sections
+from .text_extractor import UnsupportedFileTypeError, ensure_extractable
+from .upload_stream import SpooledUpload, spool_upload, upload_file_to_storage
+
+logger = logging.getLogger(__name__)
+
+BUCKET_NAME = "document-files"
+# 한 번에 임베딩하고 document_sections에 저장할 청크 수
+SECTION_BATCH_SIZE = int(os.getenv("SECTION_BATCH_SIZE", "500"))
+# 단계별 동시 실행 파일 수
+INGEST_STORAGE_CONCURRENCY = int(os.getenv("INGEST_STORAGE_CONCURRENCY", "4"))
+INGEST_EXTRACT_CONCURRENCY = int(os.getenv("INGEST_EXTRACT_CONCURRENCY", "2"))
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "2"))
+INGEST_WRITE_CONCURRENCY = int(os.getenv("INGEST_WRITE_CONCURRENCY", "2"))
+# 기존 섹션 조회/삭제 시 한 번에 처리할 행 수
+SECTION_PAGE_SIZE = 1000
+# document_sections.metadata에 저장할 청크 위치 정보 (SQL/alter_document_sections_metadata)
+# offset은 페이지가 아니라 문서 전체 텍스트 기준 문자 위치입니다.
+SECTION_METADATA_KEYS = ("page", "page_end", "offset", "heading")
+
+
+@dataclass
+class ProgressEvent:
+    """파일 하나의 진행 상황 변경. status_key/error_key는 LanguageState 번역 키입니다."""
+    filename: str
+    progress: int | None = None
+    status_key: str | None = None
+    error_key: str | None = None
+    error_kwargs: dict = field(default_factory=dict)
+    done: bool = False
+    succeeded: bool = False
+
+
+ProgressReporter = Callable[[ProgressEvent], None]
+
+
+@dataclass
+class StageLimits:
+    """파이프라인 단계별 동시 실행 제한입니다."""
+    storage: asyncio.Semaphore
+    extract: asyncio.Semaphore
+    embed: asyncio.Semaphore
+    write: asyncio.Semaphore
+
+    @classmethod
+    def from_env(cls) -> "StageLimits":
+        return cls(
+            storage=asyncio.Semaphore(INGEST_STORAGE_CONCURRENCY),
+            extract=asyncio.Semaphore(INGEST_EXTRACT_CONCURRENCY),
+            embed=asyncio.Semaphore(INGEST_EMBED_CONCURRENCY),
+            write=asyncio.Semaphore(INGEST_WRITE_CONCURRENCY),
+        )
+
+
+@dataclass
+class IngestContext:
+    """파이프라인이 사용할 클라이언트와 업로드 대상 정보입니다."""
+    supabase_client: object  # 스토리지 업로드, 섹션 저장용 (supabase Client)
+    db_client: object  # documents 테이블 조회/저장용 (인증된 Postgrest 클라이언트)
+    user_id: str
+    collection_id: str
+    # True이면 같은 이름의 문서가 있을 때 실패하는 대신 변경된 청크만 갱신합니다.
+    replace_existing: bool = False
+
+
+@dataclass
+class KnownDocuments:
+    """업로드 대상 컬렉션에서 이름 또는 내용 해시가 겹치는 기존 문서입니다."""
+    by_name: dict[str, dict] = field(default_factory=dict)
+    by_hash: dict[str, dict] = field(default_factory=dict)
+
+    @classmethod
+    def from_rows(cls, rows: list[dict]) -> "KnownDocuments":
+        known = cls()
+        for row in rows:
+            known.by_name[row["name"]] = row
+            if row.get("content_hash"):
+                known.by_hash.setdefault(row["content_hash"], row)
+        return known
+
+
+def _pg_in_list(values: list[str]) -> str:
+    """PostgREST in.() 필터 값 목록입니다. 쉼표나 괄호가 들어간 파일 이름도 안전하도록 큰따옴표로 감쌉니다."""
+    quoted = ['"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values]
+    return f"({','.join(quoted)})"
+
+
+def _find_existing_documents(ctx: IngestContext, uploads: list[SpooledUpload]) -> list[dict]:
+    """업로드할 파일들과 이름 또는 내용 해시가 같은 문서를 한 번의 쿼리로 조회합니다."""
+    filters = [f"name.in.{_pg_in_list(sorted({upload.name for upload in uploads}))}"]
+    hashes = sorted({upload.sha256 for upload in uploads if upload.sha256})
+    if hashes:
+        filters.append(f"content_hash.in.{_pg_in_list(hashes)}")
+    response = ctx.db_client.from_("documents") \
+        .select("id, name, storage_path, content_hash") \
+        .eq("collection_id", ctx.collection_id) \
+        .or_(",".join(filters)) \
+        .execute()
+    return response.data or []
+
+
+def _insert_document(ctx: IngestContext, filename: str, full_path: str) -> str:
+    # content_hash는 모든 섹션을 저장한 뒤 _finalize_document에서 채웁니다.
+    # 도중에 실패한 문서가 같은 내용의 재업로드를 막지 않도록 처음에는 비워 둡니다.
+    response = ctx.db_client.from_("documents").insert({
+        "name": filename,
+        "collection_id": ctx.collection_id,
+        "owner_id": ctx.user_id,
+        "storage_path": full_path,
+        "content_hash": None,
+    }).execute()
+    return response.data[0]['id']
+
+
+def _finalize_document(ctx: IngestContext, document_id: str, full_path: str, file_hash: str | None) -> None:
+    """모든 섹션을 저장한 뒤 문서 행의 저장 경로와 내용 해시를 한 번에 갱신합니다."""
+    ctx.db_client.from_("documents").update({"storage_path": full_path, "content_hash": file_hash}).eq("id", document_id).execute()
+
+
+def _delete_document(ctx: IngestContext, document_id: str) -> None:
+    # document_sections는 ON DELETE CASCADE로 함께 삭제됩니다.
+    ctx.db_client.from_("documents").delete().eq("id", document_id).execute()
+
+
+def _remove_from_storage(ctx: IngestContext, storage_path: str) -> None:
+    if storage_path.startswith(f"{BUCKET_NAME}/"):
+        storage_path = storage_path[len(f"{BUCKET_NAME}/"):]
+    ctx.supabase_client.storage.from_(BUCKET_NAME).remove([storage_path])
+
+
+def _load_section_hashes(ctx: IngestContext, document_id: str) -> dict[str, list[tuple[str, dict]]]:
+    """문서의 기존 섹션을 {content_hash: [(section id, metadata), ...]}로 반환합니다.
+
+    content_hash 컬럼이 비어 있는 예전 섹션은 content로 해시를 계산합니다.
+    """
+    known: dict[str, list[tuple[str, dict]]] = {}
+    offset = 0
+    while True:
+        rows = ctx.supabase_client.table("document_sections") \
+            .select("id, content_hash, content, metadata") \
+            .eq("document_id", document_id) \
+            .order("id") \
+            .range(offset, offset + SECTION_PAGE_SIZE - 1) \
+            .execute().data or []
+        for row in rows:
+            h = row.get("content_hash") or content_hash(row.get("content") or "")
+            known.setdefault(h, []).append((row["id"], row.get("metadata") or {}))
+        if len(rows) < SECTION_PAGE_SIZE:
+            return known
+        offset += SECTION_PAGE_SIZE
+
+
+def _section_metadata(chunk: dict) -> dict:
+    """청크의 페이지/위치/제목 정보 중 값이 있는 것만 반환합니다."""
+    return {key: chunk[key] for key in SECTION_METADATA_KEYS if chunk.get(key) is not None}
+
+
+def _update_section_metadata(ctx: IngestContext, updates: list[tuple[str, dict]]) -> None:
+    # 행마다 값이 다르므로 한 행씩 갱신합니다. (upsert는 NOT NULL 컬럼을 모두 보내야 합니다)
+    for section_id, metadata in updates:
+        ctx.supabase_client.table("document_sections").update({"metadata": metadata}).eq("id", section_id).execute()
+
+
+def _delete_sections(ctx: IngestContext, section_ids: list[str]) -> None:
+    for i in range(0, len(section_ids), SECTION_PAGE_SIZE):
+        ctx.supabase_client.table("document_sections").delete().in_("id", section_ids[i:i + SECTION_PAGE_SIZE]).execute()
+
+
+async def _discard_partial_ingest(
+    ctx: IngestContext,
+    filename: str,
+    created_document_id: str | None,
+    inserted_section_ids: list[str],
+    full_path: str | None,
+) -> None:
+    """실패한 수집이 남긴 새 문서 행 또는 새 섹션과 새로 올린 스토리지 파일을 지웁니다.
+
+    새 문서는 행을 지워 같은 이름/내용으로 다시 올릴 수 있게 하고(섹션은 CASCADE로 함께 삭제),
+    교체 모드에서는 이번에 저장한 섹션만 지워 문서가 이전 버전 그대로 남게 합니다.
+    """
+    try:
+        if created_document_id:
+            await asyncio.to_thread(_delete_document, ctx, created_document_id)
+        elif inserted_section_ids:
+            await asyncio.to_thread(_delete_sections, ctx, inserted_section_ids)
+        if full_path:
+            await asyncio.to_thread(_remove_from_storage, ctx, full_path)
+    except Exception as e:
+        logger.warning(f"Failed to clean up partial ingestion of {filename}: {e}")
+
+
+def _find_unfinished_documents(ctx: IngestContext, filename: str, created_after: str) -> list[dict]:
+    # content_hash가 NULL인 예전 문서도 있으므로 created_after 이후에 만든 행만 대상으로 합니다.
+    response = ctx.db_client.from_("documents") \
+        .select("id, storage_path") \
+        .eq("collection_id", ctx.collection_id) \
+        .eq("name", filename) \
+        .is_("content_hash", "null") \
+        .gte("created_at", created_after) \
+        .execute()
+    return response.data or []
+
+
+async def discard_unfinished_documents(ctx: IngestContext, filename: str, created_after: str) -> None:
+    """중단된 이전 시도가 남긴(내용 해시를 채우지 못한) 같은 이름의 문서 행과 스토리지 파일을 지웁니다.
+
+    작업을 재시도하기 전에 호출하여 남은 행 때문에 doc_exists_same_name으로 실패하지 않게 합니다.
+    """
+    for doc in await asyncio.to_thread(_find_unfinished_documents, ctx, filename, created_after):
+        logger.info(f"Discarding unfinished document {doc['id']} ({filename}) left by a previous attempt")
+        await _discard_partial_ingest(ctx, filename, doc['id'], [], doc.get('storage_path'))
+
+
+async def ingest_file(
+    ctx: IngestContext,
+    limits: StageLimits,
+    file,
+    report: ProgressReporter,
+    known: KnownDocuments | None = None,
+) -> bool:
+    """파일 하나를 업로드부터 섹션 저장까지 처리합니다. 성공하면 True를 반환합니다.
+
+    file은 rx.UploadFile 또는 SpooledUpload입니다. rx.UploadFile은 임시 파일로 스풀한 뒤
+    처리가 끝나면 삭제합니다. known을 넘기지 않으면 이 파일만으로 기존 문서를 조회합니다.
+    """
+    filename = file.name
+    upload: SpooledUpload | None = None
+    # 실패 시 정리할 새 문서 행, 이번에 저장한 섹션 id, 새로 올린 스토리지 파일
+    created_document_id: str | None = None
+    inserted_section_ids: list[str] = []
+    full_path: str | None = None
+    finalized = False
+    batches = None
+
+    def progress(value: int | None = None, status_key: str | None = None):
+        report(ProgressEvent(filename, progress=value, status_key=status_key))
+
+    try:
+        # 1. 중복 확인, 스토리지 업로드, 문서 행 생성
+        async with limits.storage:
+            # 파일 전체를 메모리로 읽지 않고 임시 파일에 스풀하면서 내용 해시를 계산합니다.
+            upload = await spool_upload(file)
+            if upload.sha256 is None:
+                await asyncio.to_thread(upload.compute_sha256)
+            if known is None:
+                known = KnownDocuments.from_rows(await asyncio.to_thread(_find_existing_documents, ctx, [upload]))
+
+            existing_doc = known.by_name.get(filename)
+            same_content_doc = known.by_hash.get(upload.sha256)
+            if same_content_doc and (not existing_doc or same_content_doc['id'] != existing_doc['id']):
+                # 이름이 달라도 내용이 같은 파일은 업로드/추출/임베딩을 모두 건너뜁니다.
+                logger.warning(f"File '{filename}' is identical to '{same_content_doc['name']}'. Skipping.")
+                report(ProgressEvent(filename, 100, "status_failed", error_key="doc_exists_same_content",
+                                     error_kwargs={"name": same_content_doc['name']}, done=True))
+                return False
+            if existing_doc and not ctx.replace_existing:
+                logger.warning(f"File '{filename}' already exists in this collection. Skipping.")
+                report(ProgressEvent(filename, 100, "status_failed", error_key="doc_exists_same_name", done=True))
+                return False
+            if existing_doc and existing_doc.get('content_hash') == upload.sha256:
+                logger.info(f"File '{filename}' is unchanged. Nothing to replace.")
+                report(ProgressEvent(filename, 100, "status_done", done=True, succeeded=True))
+                return True
+
+            content_type = upload.content_type
+            try:
+                await asyncio.to_thread(ensure_extractable, upload.path, content_type, filename)
+            except UnsupportedFileTypeError as e:
+                # 텍스트를 추출할 수 없는 파일은 스토리지에 올리거나 문서 행을 만들지 않습니다.
+                logger.warning(f"File '{filename}' is not supported: {e}")
+                report(ProgressEvent(filename, 100, "status_failed", error_key="upload_error", error_kwargs={"error": str(e)}, done=True))
+                return False
+
+            progress(10, "upload_storage_uploading")
+
+            file_extension = os.path.splitext(filename)[1]
+            storage_path = f"{ctx.user_id}/{ctx.collection_id}/{uuid.uuid4()}{file_extension}"
+            logger.info(f"Attempting to upload to storage path: {storage_path} ({upload.size} bytes)")
+
+            full_path = await asyncio.to_thread(
+                upload_file_to_storage, ctx.supabase_client, BUCKET_NAME, storage_path, upload
+            )
+
+            if existing_doc:
+                # 새 버전으로 교체: 문서 행은 유지하고, 새 섹션 저장과 오래된 섹션 삭제가 끝난 뒤에
+                # 저장 경로와 해시를 바꿉니다. 그 전에 실패하면 문서는 이전 파일을 그대로 가리킵니다.
+                document_id = existing_doc['id']
+                logger.info(f"Replacing document {document_id} with new version of {filename}")
+            else:
+                document_id = await asyncio.to_thread(_insert_document, ctx, filename, full_path)
+                created_document_id = document_id
+                logger.info(f"Created document {document_id} for {filename}")
+
+        progress(30, "upload_text_extracting")
+
+        # 교체 모드에서는 기존 섹션의 해시를 불러와, 새 버전에 그대로 남은 청크는 다시 임베딩하지 않습니다.
+        known_sections = await asyncio.to_thread(_load_section_hashes, ctx, document_id) if existing_doc else {}
+        reused_sections = 0
+        # 재사용한 섹션 중 새 버전에서 위치/제목이 바뀐 것의 (section id, 새 metadata)
+        metadata_updates: list[tuple[str, dict]] = []
+
+        # 2~4. 청크 배치마다 추출 → 임베딩 → 저장 단계를 거칩니다.
+        # 단계마다 세마포어를 따로 잡으므로, 한 파일이 저장하는 동안 다른 파일은 임베딩할 수 있습니다.
+        current = 30
+        total_sections = 0
+        pending_sections: list[dict] = []
+        # 추출기에는 스풀 파일 경로를 넘겨 메모리 맵으로 읽게 합니다.
+        batches = aiter_chunk_batches(upload.path, content_type, SECTION_BATCH_SIZE, filename)
+        while True:
+            async with limits.extract:
+                try:
+                    batch = await anext(batches)
+                except StopAsyncIteration:
+                    break
+
+            if known_sections:
+                new_chunks = []
+                for chunk in batch:
+                    sections = known_sections.get(content_hash(chunk['text']))
+                    if sections:
+                        section_id, old_metadata = sections.pop()
+                        metadata = _section_metadata(chunk)
+                        if metadata != old_metadata:
+                            metadata_updates.append((section_id, metadata))
+                        reused_sections += 1
+                    else:
+                        new_chunks.append(chunk)
+                batch = new_chunks
+                if not batch:
+                    current = min(90, max(current, 50) + 5)
+                    progress(current)
+                    continue
+
+            progress(max(current, 50), "upload_embedding")
+            async with limits.embed:
+                embeddings: list[list[float]] = [[] for _ in batch]
+                async for indices, batch_embeddings in iter_embedding_batches([chunk['text'] for chunk in batch]):
+                    for index, embedding in zip(indices, batch_embeddings):
+                        embeddings[index] = embedding
+                    current = min(85, max(current, 50) + 1)
+                    progress(current)
+
+            progress(None, "upload_db_updating")
+            records_to_insert = [
+                {
+                    # 실패 시 이번에 저장한 섹션만 지울 수 있도록 id를 미리 정합니다.
+                    "id": str(uuid.uuid4()),
+                    "owner_id": ctx.user_id,
+                    "document_id": document_id,
+                    "collection_id": ctx.collection_id,
+                    "content": chunk['text'],
+                    "content_hash": content_hash(chunk['text']),
+                    "metadata": _section_metadata(chunk),
+                    "embedding": embedding,
+                }
+                for chunk, embedding in zip(batch, embeddings)
+            ]
+            inserted_section_ids.extend(record["id"] for record in records_to_insert)
+            async with limits.write:
+                try:
+                    total_sections += await write_sections(ctx.supabase_client, records_to_insert)
+                except SectionWriteError as e:
+                    # 실패한 배치만 모아 두었다가 마지막에 한 번 더 저장을 시도합니다.
+                    logger.warning(f"Section write partially failed for {filename}: {e}")
+                    total_sections += e.inserted
+                    pending_sections.extend(e.failed_rows)
+
+            # 전체 청크 수를 미리 알 수 없으므로 배치마다 90%까지 점진적으로 증가시킵니다.
+            current = min(90, current + 5)
+            progress(current)
+
+        if pending_sections:
+            # 재전송해도 id가 같아 중복 저장되지 않습니다. 다시 실패하면 파일 오류로 처리됩니다.
+            async with limits.write:
+                total_sections += await write_sections(ctx.supabase_client, pending_sections)
+
+        stale_ids: list[str] = []
+        if existing_doc:
+            # 새 버전에 없는 청크의 섹션을 삭제합니다.
+            stale_ids = [section_id for sections in known_sections.values() for section_id, _ in sections]
+            if stale_ids:
+                # 삭제를 시작하면 남은 섹션이 새 버전의 내용이므로, 이후 실패해도 새 섹션은 지우지 않습니다.
+                # (같은 파일로 다시 교체하면 남은 섹션을 재사용하여 복구됩니다.)
+                inserted_section_ids = []
+                async with limits.write:
+                    await asyncio.to_thread(_delete_sections, ctx, stale_ids)
+            if metadata_updates:
+                # 재사용한 섹션에 새 버전의 페이지/위치/제목을 기록합니다.
+                # 새 섹션을 모두 저장한 뒤에 반영하여, 그 전에 실패하면 이전 버전의 위치 정보가 그대로 남습니다.
+                async with limits.write:
+                    await asyncio.to_thread(_update_section_metadata, ctx, metadata_updates)
+
+        # 모든 섹션이 저장(교체 모드에서는 오래된 섹션까지 삭제)된 뒤에만 새 파일을 가리키고 내용 해시를 기록합니다.
+        await asyncio.to_thread(_finalize_document, ctx, document_id, full_path, upload.sha256)
+        finalized = True
+
+        if existing_doc:
+            # 더 이상 참조하지 않는 이전 버전 파일을 스토리지에서 지웁니다.
+            if existing_doc.get('storage_path'):
+                try:
+                    await asyncio.to_thread(_remove_from_storage, ctx, existing_doc['storage_path'])
+                except Exception as e:
+                    logger.warning(f"Failed to remove previous version of {filename} from storage: {e}")
+            logger.info(f"Updated {filename}: reused={reused_sections}, inserted={total_sections}, deleted={len(stale_ids)}")
+
+        logger.info(f"Number of sections inserted for {filename}: {total_sections}")
+        report(ProgressEvent(filename, 100, "status_done", done=True, succeeded=True))
+        return True
+
+    except Exception as e:
+        logger.exception(f"Ingestion failed for {filename}")
+        if not finalized:
+            await _discard_partial_ingest(ctx, filename, created_document_id, inserted_section_ids, full_path)
+        report(ProgressEvent(filename, 100, "status_failed", error_key="upload_error", error_kwargs={"error": str(e)}, done=True))
+        return False
+    finally:
+        if batches is not None:
+            # 중간에 실패해도 추출 워커가 바로 정리되도록 청크 배치 제너레이터를 닫습니다.
+            await batches.aclose()
+        # 직접 스풀한 임시 파일만 삭제합니다. 작업 대기열의 스풀 파일은 워커가 정리합니다.
+        if upload is not None and upload is not file:
+            upload.remove()
+
+
+async def run_ingest_pipeline(ctx: IngestContext, files: list, report: ProgressReporter) -> int:
+    """모든 파일을 동시에 파이프라인에 넣고, 성공한 파일 수를 반환합니다.
+
+    먼저 모든 파일을 스풀하면서 내용 해시를 계산하고, 기존 문서와의 이름/해시 중복은
+    파일마다 조회하지 않고 한 번의 쿼리로 확인합니다.
+    """
+    limits = StageLimits.from_env()
+    spooled = await asyncio.gather(*(spool_upload(file) for file in files), return_exceptions=True)
+    try:
+        uploads: list[SpooledUpload] = []
+        for file, result in zip(files, spooled):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to receive {file.name}: {result}")
+                report(ProgressEvent(file.name, 100, "status_failed", error_key="upload_error", error_kwargs={"error": str(result)}, done=True))
+            else:
+                uploads.append(result)
+        if not uploads:
+            return 0
+
+        try:
+            known = KnownDocuments.from_rows(await asyncio.to_thread(_find_existing_documents, ctx, uploads))
+        except Exception as e:
+            logger.exception("Duplicate check failed")
+            for upload in uploads:
+                report(ProgressEvent(upload.name, 100, "status_failed", error_key="upload_error", error_kwargs={"error": str(e)}, done=True))
+            return 0
+
+        # 같은 업로드 안에서 내용이 같은 파일은 처음 파일만 처리합니다.
+        first_by_hash: dict[str, SpooledUpload] = {}
+        tasks = []
+        for upload in uploads:
+            first = first_by_hash.setdefault(upload.sha256, upload)
+            if first is not upload:
+                report(ProgressEvent(upload.name, 100, "status_failed", error_key="doc_exists_same_content",
+                                     error_kwargs={"name": first.name}, done=True))
+                continue
+            tasks.append(ingest_file(ctx, limits, upload, report, known))
+        results = await asyncio.gather(*tasks)
+        return sum(1 for ok in results if ok)
+    finally:
+        for result in spooled:
+            if isinstance(result, SpooledUpload):
+                result.remove()
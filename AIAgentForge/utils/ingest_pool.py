@@ -0,0 +1,229 @@
+# AIAgentForge/utils/ingest_pool.py
+# 업로드 시 CPU를 많이 쓰는 텍스트 추출 → 청크 분할 단계를 이벤트 루프 밖에서 실행합니다.
+# process 모드는 파일마다 워커 프로세스를 하나 띄워 청크 배치를 제한된 크기의 큐로 하나씩 돌려받으므로,
+# 문서 전체의 청크를 메모리에 모으지 않습니다. 시간 제한을 넘긴 워커는 종료시킵니다.
+# 워커 프로세스(forkserver/spawn)가 이 모듈을 import하므로 reflex/state 모듈을 import하지 않아야 합니다.
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator
+
+from .chunker import batch_chunks, chunk_records
+from .text_extractor import FileSource, iter_text_from_file
+
+logger = logging.getLogger(__name__)
+
+# 실행 모드: "process"(기본, 파일별 워커 프로세스), "thread"(스레드 풀), "inline"(이벤트 루프에서 직접 실행)
+INGEST_EXECUTION_MODE = os.getenv("INGEST_EXECUTION_MODE", "process").lower()
+# 동시에 실행할 워커 프로세스(스레드) 수. 초과한 요청은 슬롯이 빌 때까지 await합니다.
+INGEST_POOL_WORKERS = int(os.getenv("INGEST_POOL_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) - 1)))))
+# 워커가 미리 만들어 둘 수 있는 청크 배치 수. 호출 측이 배치를 처리하는 동안 워커는 이 수만큼만 앞서 갑니다.
+INGEST_POOL_PREFETCH_BATCHES = int(os.getenv("INGEST_POOL_PREFETCH_BATCHES", "2"))
+# 워커 프로세스당 메모리 상한(MB). 0이면 제한하지 않습니다. (리눅스 전용)
+INGEST_POOL_MAX_MEMORY_MB = int(os.getenv("INGEST_POOL_MAX_MEMORY_MB", "0"))
+# 다음 청크 배치를 기다리는 최대 시간(초). 넘기면 워커를 종료합니다. 0이면 제한하지 않습니다.
+INGEST_POOL_TIMEOUT = float(os.getenv("INGEST_POOL_TIMEOUT", "600"))
+# 워커가 살아 있는지 확인하는 간격(초)
+_POLL_INTERVAL = 1.0
+
+_thread_executor: ThreadPoolExecutor | None = None
+_worker_slots: asyncio.Semaphore | None = None
+_mp_context = None
+# 실행 중인 워커 프로세스 (종료 시 정리)
+_processes: set = set()
+
+
+def _init_worker(max_memory_mb: int) -> None:
+    """워커 프로세스 시작 시 주소 공간 상한을 설정합니다."""
+    if max_memory_mb <= 0:
+        return
+    try:
+        import resource
+    except ImportError:
+        # Windows에는 resource 모듈이 없으므로 제한 없이 실행합니다.
+        return
+    limit = max_memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _chunk_worker(
+    out: "multiprocessing.Queue",
+    file_content: FileSource,
+    mime_type: str,
+    batch_size: int,
+    filename: str | None,
+    max_memory_mb: int,
+) -> None:
+    """워커 프로세스에서 추출/청크 분할을 실행하고 배치를 하나씩 큐로 보냅니다.
+
+    큐가 가득 차면 put()에서 기다리므로 호출 측보다 INGEST_POOL_PREFETCH_BATCHES개 이상 앞서지 않습니다.
+    메시지: ("batch", 청크 리스트), ("error", 예외), ("done", None)
+    """
+    _init_worker(max_memory_mb)
+    try:
+        for batch in batch_chunks(chunk_records(iter_text_from_file(file_content, mime_type, filename)), batch_size):
+            out.put(("batch", batch))
+    except BaseException as e:
+        # 큐는 별도 스레드에서 직렬화하므로, 직렬화할 수 없는 예외는 여기서 바꿔 보냅니다.
+        try:
+            pickle.dumps(e)
+            error = e
+        except Exception:
+            error = RuntimeError(f"{type(e).__name__}: {e}")
+        out.put(("error", error))
+        return
+    out.put(("done", None))
+
+
+def _get_mp_context():
+    """워커 프로세스 컨텍스트. forkserver가 있으면 이 모듈을 미리 import해 두어 프로세스 시작 비용을 줄입니다."""
+    global _mp_context
+    if _mp_context is None:
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            _mp_context = multiprocessing.get_context("forkserver")
+            _mp_context.set_forkserver_preload([__name__])
+        else:
+            _mp_context = multiprocessing.get_context("spawn")
+    return _mp_context
+
+
+def _get_thread_executor() -> ThreadPoolExecutor:
+    global _thread_executor
+    if _thread_executor is None:
+        _thread_executor = ThreadPoolExecutor(max_workers=INGEST_POOL_WORKERS, thread_name_prefix="ingest")
+        logger.info(f"Ingest thread pool started: workers={INGEST_POOL_WORKERS}")
+    return _thread_executor
+
+
+def _get_worker_slots() -> asyncio.Semaphore:
+    global _worker_slots
+    if _worker_slots is None:
+        _worker_slots = asyncio.Semaphore(INGEST_POOL_WORKERS)
+    return _worker_slots
+
+
+async def run_in_ingest_pool(func, *args):
+    """스레드 풀에서 func(*args)를 실행하고 결과를 반환합니다.
+
+    시간 제한을 넘겨도 스레드는 중단할 수 없으므로, 슬롯은 실제로 실행이 끝났을 때 반환하여
+    동시 실행 수 상한이 지켜지도록 합니다.
+    """
+    loop = asyncio.get_running_loop()
+    slots = _get_worker_slots()
+    await slots.acquire()
+    future = loop.run_in_executor(_get_thread_executor(), func, *args)
+    future.add_done_callback(lambda _: slots.release())
+    return await asyncio.wait_for(asyncio.shield(future), timeout=INGEST_POOL_TIMEOUT or None)
+
+
+def _stop_process(process) -> None:
+    """워커 프로세스를 종료하고 기다립니다. (블로킹)"""
+    if process.is_alive():
+        process.terminate()
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+    process.join()
+    _processes.discard(process)
+
+
+def _next_message(out, process, timeout: float | None):
+    """워커가 보낸 다음 메시지를 기다립니다. (블로킹) 워커가 응답 없이 죽으면 RuntimeError를 발생시킵니다."""
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        wait = _POLL_INTERVAL if deadline is None else min(_POLL_INTERVAL, deadline - time.monotonic())
+        if wait <= 0:
+            raise TimeoutError(f"No chunk batch within {timeout}s")
+        try:
+            return out.get(timeout=wait)
+        except queue.Empty:
+            if not process.is_alive():
+                # 종료 직전에 보낸 메시지가 남아 있을 수 있습니다.
+                try:
+                    return out.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    raise RuntimeError(f"Ingest worker exited unexpectedly (exit code {process.exitcode})")
+
+
+async def _aiter_process_batches(
+    file_content: FileSource,
+    mime_type: str,
+    batch_size: int,
+    filename: str | None,
+) -> AsyncIterator[list[dict]]:
+    """파일 하나를 워커 프로세스에서 처리하며 청크 배치를 생성되는 대로 돌려받습니다."""
+    async with _get_worker_slots():
+        context = _get_mp_context()
+        out = context.Queue(maxsize=max(INGEST_POOL_PREFETCH_BATCHES, 1))
+        process = context.Process(
+            target=_chunk_worker,
+            args=(out, file_content, mime_type, batch_size, filename, INGEST_POOL_MAX_MEMORY_MB),
+            daemon=True,
+        )
+        await asyncio.to_thread(process.start)
+        _processes.add(process)
+        try:
+            while True:
+                try:
+                    kind, payload = await asyncio.to_thread(_next_message, out, process, INGEST_POOL_TIMEOUT or None)
+                except TimeoutError:
+                    logger.error(f"Ingest worker for {filename} timed out after {INGEST_POOL_TIMEOUT}s. Terminating.")
+                    raise
+                if kind == "batch":
+                    yield payload
+                elif kind == "error":
+                    raise payload
+                else:
+                    return
+        finally:
+            # 정상 종료, 오류, 시간 초과, 호출 측의 중단(aclose) 모두 워커를 정리한 뒤 슬롯을 반환합니다.
+            await asyncio.to_thread(_stop_process, process)
+            out.close()
+
+
+async def aiter_chunk_batches(
+    file_content: FileSource,
+    mime_type: str,
+    batch_size: int,
+    filename: str | None = None,
+) -> AsyncIterator[list[dict]]:
+    """설정된 실행 모드로 추출/청크 분할을 수행하고 batch_size 단위의 청크 리스트를 생성합니다.
+
+    - inline: 기존처럼 이벤트 루프에서 스트리밍 처리합니다.
+    - thread: 스트리밍 제너레이터의 각 배치를 스레드 풀에서 꺼내므로 메모리가 창 크기로 제한됩니다.
+    - process: 파일 하나를 워커 프로세스에서 처리하고 배치를 큐로 하나씩 돌려받습니다.
+    호출 측이 중간에 멈추면 aclose()로 워커를 정리하세요.
+    """
+    if INGEST_EXECUTION_MODE == "inline":
+        for batch in batch_chunks(chunk_records(iter_text_from_file(file_content, mime_type, filename)), batch_size):
+            yield batch
+        return
+
+    if INGEST_EXECUTION_MODE == "thread":
+        batches = batch_chunks(chunk_records(iter_text_from_file(file_content, mime_type, filename)), batch_size)
+        while True:
+            batch = await run_in_ingest_pool(next, batches, None)
+            if batch is None:
+                return
+            yield batch
+
+    # 이 제너레이터가 중간에 닫혀도 워커가 바로 정리되도록 안쪽 제너레이터를 명시적으로 닫습니다.
+    async with contextlib.aclosing(_aiter_process_batches(file_content, mime_type, batch_size, filename)) as batches:
+        async for batch in batches:
+            yield batch
+
+
+def shutdown_ingest_pool() -> None:
+    """스레드 풀을 닫고 실행 중인 워커 프로세스를 종료합니다. 서버 종료 시 호출합니다."""
+    global _thread_executor
+    if _thread_executor is not None:
+        _thread_executor.shutdown(wait=False, cancel_futures=True)
+        _thread_executor = None
+    for process in list(_processes):
+        _stop_process(process)
@@ -0,0 +1,186 @@
+# AIAgentForge/utils/ingest_worker.py
+# 업로드 수집 작업을 처리하는 워커입니다. 웹 서버와 별도 프로세스로 실행합니다.
+#
+#   python -m AIAgentForge.utils.ingest_worker --workers 2
+#
+# 워커 수를 늘리면 수집 처리량이 늘어납니다. 모든 워커는 같은 INGEST_JOBS_PATH를 공유해야 합니다.
+# 사용자 세션 없이 처리하므로 SUPABASE_SERVICE_KEY가 필요합니다.
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+
+# 임베더 등 하위 모듈이 import 시점에 환경 변수를 읽으므로 먼저 .env를 로드합니다.
+load_dotenv()
+
+from supabase import Client, create_client
+
+from .ingest_jobs import (
+    STATUS_DONE,
+    STATUS_FAILED,
+    IngestJob,
+    job_store,
+)
+from .ingest_pipeline import IngestContext, ProgressEvent, StageLimits, discard_unfinished_documents, ingest_file
+from .ingest_pool import shutdown_ingest_pool
+from .upload_stream import SpooledUpload
+
+logger = logging.getLogger(__name__)
+
+# 워커 프로세스 하나가 동시에 처리할 작업 수
+INGEST_WORKER_JOBS = int(os.getenv("INGEST_WORKER_JOBS", "4"))
+INGEST_WORKER_POLL_INTERVAL = float(os.getenv("INGEST_WORKER_POLL_INTERVAL", "1.0"))
+INGEST_WORKER_HEARTBEAT_INTERVAL = float(os.getenv("INGEST_WORKER_HEARTBEAT_INTERVAL", "30"))
+
+
+def _make_client() -> Client:
+    """서비스 키로 작업용 Supabase 클라이언트를 만듭니다. (RLS 우회)"""
+    service_key = os.getenv("SUPABASE_SERVICE_KEY")
+    if not service_key:
+        raise RuntimeError("Missing SUPABASE_SERVICE_KEY")
+    return create_client(os.getenv("SUPABASE_URL"), service_key)
+
+
+def _owns_collection(client: Client, owner_id: str, collection_id: str) -> bool:
+    """서비스 키는 RLS를 우회하므로 작업의 사용자가 컬렉션 소유자인지 직접 확인합니다."""
+    response = client.table("collections").select("id").eq("id", collection_id).eq("owner_id", owner_id).execute()
+    return bool(response.data)
+
+
+class JobProgressWriter:
+    """진행 이벤트를 모아 스레드에서 작업 행에 기록합니다.
+
+    SQLite 쓰기가 워커의 이벤트 루프를 막지 않도록 하고, 쓰기가 끝나기 전에 들어온 이벤트는
+    하나로 합쳐 다음 쓰기에 반영합니다. 쓰기는 하나씩 순서대로 실행되므로 최종 상태가 덮어써지지 않습니다.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._pending: dict = {}
+        self._wake = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.create_task(self._run())
+
+    def report(self, event: ProgressEvent) -> None:
+        fields = {
+            "progress": event.progress,
+            "status_key": event.status_key,
+            "error_key": event.error_key,
+            "error_kwargs": event.error_kwargs if event.error_key else None,
+            "status": (STATUS_DONE if event.succeeded else STATUS_FAILED) if event.done else None,
+        }
+        # job_store.update는 None인 필드를 바꾸지 않으므로, 값이 있는 필드만 덮어쓰면 순서대로 기록한 것과 같습니다.
+        self._pending.update({key: value for key, value in fields.items() if value is not None})
+        self._wake.set()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if self._pending:
+                fields, self._pending = self._pending, {}
+                try:
+                    await asyncio.to_thread(job_store.update, self.job_id, **fields)
+                except Exception as e:
+                    logger.warning(f"Failed to record progress of ingest job {self.job_id}: {e}")
+            if self._closed and not self._pending:
+                return
+
+    async def close(self) -> None:
+        """남은 이벤트를 기록하고 종료합니다."""
+        self._closed = True
+        self._wake.set()
+        await self._task
+
+
+async def process_job(job: IngestJob, limits: StageLimits) -> None:
+    """작업 하나를 업로드 파이프라인으로 처리하고 결과를 작업 행에 기록합니다."""
+    logger.info(f"Processing ingest job {job.id} ({job.filename})")
+    writer = JobProgressWriter(job.id)
+
+    try:
+        client = _make_client()
+        if not await asyncio.to_thread(_owns_collection, client, job.owner_id, job.collection_id):
+            raise PermissionError(f"User {job.owner_id} does not own collection {job.collection_id}")
+        ctx = IngestContext(
+            supabase_client=client,
+            db_client=client,
+            user_id=job.owner_id,
+            collection_id=job.collection_id,
+            replace_existing=job.replace_existing,
+        )
+        if job.attempts > 1:
+            # 이전 시도가 문서 행을 만든 뒤 중단되었으면 그 행을 지우고 처음부터 다시 처리합니다.
+            created_after = datetime.fromtimestamp(job.created_at, timezone.utc).isoformat()
+            await discard_unfinished_documents(ctx, job.filename, created_after)
+        upload = SpooledUpload(job.filename, job.content_type, job.spool_path)
+        await ingest_file(ctx, limits, upload, writer.report)
+    except Exception as e:
+        logger.exception(f"Ingest job {job.id} failed")
+        writer.report(ProgressEvent(job.filename, 100, "status_failed", error_key="upload_error",
+                                    error_kwargs={"error": str(e)}, done=True))
+    finally:
+        await writer.close()
+        try:
+            os.remove(job.spool_path)
+        except OSError:
+            pass
+
+
+async def run_worker(max_jobs: int = INGEST_WORKER_JOBS) -> None:
+    """대기열을 폴링하며 최대 max_jobs개의 작업을 동시에 처리합니다."""
+    limits = StageLimits.from_env()
+    running: dict[str, asyncio.Task] = {}
+
+    async def heartbeat() -> None:
+        while True:
+            await asyncio.sleep(INGEST_WORKER_HEARTBEAT_INTERVAL)
+            await asyncio.to_thread(job_store.heartbeat, list(running))
+            await asyncio.to_thread(job_store.requeue_stale)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    logger.info(f"Ingest worker started (pid={os.getpid()}, max_jobs={max_jobs})")
+    try:
+        while True:
+            job = await asyncio.to_thread(job_store.claim) if len(running) < max_jobs else None
+            if job is None:
+                await asyncio.sleep(INGEST_WORKER_POLL_INTERVAL)
+                continue
+            task = asyncio.create_task(process_job(job, limits))
+            running[job.id] = task
+            task.add_done_callback(lambda _t, job_id=job.id: running.pop(job_id, None))
+    finally:
+        heartbeat_task.cancel()
+        shutdown_ingest_pool()
+
+
+def _worker_main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AIAgentForge ingestion worker")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("INGEST_WORKERS", "1")),
+                        help="실행할 워커 프로세스 수")
+    args = parser.parse_args()
+    if not os.getenv("SUPABASE_SERVICE_KEY"):
+        parser.error("SUPABASE_SERVICE_KEY is required to run the ingestion worker")
+
+    if args.workers <= 1:
+        _worker_main()
+        return
+
+    processes = [multiprocessing.Process(target=_worker_main, name=f"ingest-worker-{i}") for i in range(args.workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
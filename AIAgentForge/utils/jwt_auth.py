@@ -0,0 +1,122 @@
+# AIAgentForge/utils/jwt_auth.py
+# Supabase 액세스 토큰(JWT)을 원격 호출 없이 로컬에서 검증합니다.
+# - HS256 토큰(레거시 JWT 시크릿): SUPABASE_JWT_SECRET으로 서명을 검증합니다.
+# - 비대칭 서명 토큰(ES256/RS256): 프로젝트 JWKS(/auth/v1/.well-known/jwks.json)의 공개 키로 검증합니다.
+#   비대칭 알고리즘은 cryptography 패키지가 필요하며, 없으면 로컬 검증을 건너뜁니다.
+# 로컬 검증은 서명, 만료, audience만 확인합니다. 로그아웃 등으로 폐기된 세션은 revoke_token()으로 등록하여
+# 해당 세션의 토큰이 원격 확인(auth.get_user)을 거치도록 합니다.
+import hashlib
+import logging
+import os
+
+import jwt
+from cachetools import TTLCache
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+# Supabase 대시보드의 JWT Secret (HS256). 비어 있으면 HS256 토큰은 원격으로 확인합니다.
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET", "")
+AUTH_JWKS_URL = os.getenv("AUTH_JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json" if SUPABASE_URL else "")
+AUTH_JWT_AUDIENCE = os.getenv("AUTH_JWT_AUDIENCE", "authenticated")
+# 서버 간 시계 오차 허용(초)
+AUTH_JWT_LEEWAY = int(os.getenv("AUTH_JWT_LEEWAY", "10"))
+# JWKS 캐시 유지 시간(초). 모르는 kid가 오면 PyJWKClient가 다시 가져옵니다.
+AUTH_JWKS_LIFESPAN = int(os.getenv("AUTH_JWKS_LIFESPAN", "3600"))
+AUTH_JWKS_TIMEOUT = int(os.getenv("AUTH_JWKS_TIMEOUT", "5"))
+# 폐기된 세션 목록을 유지하는 시간(초). Supabase 액세스 토큰 기본 수명(1시간) 이상이어야 합니다.
+AUTH_REVOKED_TTL = float(os.getenv("AUTH_REVOKED_TTL", "3600"))
+
+ASYMMETRIC_ALGORITHMS = ("ES256", "RS256", "EdDSA")
+
+_jwks_client: jwt.PyJWKClient | None = None
+_revoked_sessions: TTLCache = TTLCache(maxsize=10000, ttl=AUTH_REVOKED_TTL)
+
+
+class InvalidTokenError(Exception):
+    """로컬 검증에서 서명, 만료 또는 audience가 올바르지 않은 것으로 확인된 토큰입니다."""
+
+
+def token_key(token: str) -> str:
+    """캐시 키로 사용할 토큰 해시입니다. 토큰 원문을 캐시 키로 보관하지 않습니다."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _get_jwks_client() -> jwt.PyJWKClient | None:
+    global _jwks_client
+    if _jwks_client is None and AUTH_JWKS_URL:
+        _jwks_client = jwt.PyJWKClient(
+            AUTH_JWKS_URL, cache_jwk_set=True, lifespan=AUTH_JWKS_LIFESPAN, timeout=AUTH_JWKS_TIMEOUT
+        )
+    return _jwks_client
+
+
+def load_signing_keys() -> None:
+    """JWKS를 미리 읽어 둡니다. (앱 시작 시, 블로킹) 실패해도 첫 검증 때 다시 시도합니다."""
+    client = _get_jwks_client()
+    if client is None:
+        return
+    try:
+        client.get_signing_keys()
+    except Exception as e:
+        logger.warning(f"Failed to load JWKS from {AUTH_JWKS_URL}: {e}")
+
+
+def unverified_claims(token: str) -> dict:
+    """서명을 확인하지 않고 클레임을 읽습니다. 만료 시각 확인 등 참고용으로만 사용하세요."""
+    try:
+        return jwt.decode(token, options={"verify_signature": False})
+    except jwt.PyJWTError:
+        return {}
+
+
+def verify_token(token: str) -> dict | None:
+    """토큰을 로컬에서 검증하고 클레임을 반환합니다. (JWKS를 처음 읽을 때는 블로킹)
+
+    서명/만료/audience가 틀리면 InvalidTokenError를 발생시킵니다.
+    로컬에서 판단할 수 없으면(키 없음, 지원하지 않는 알고리즘, JWKS 조회 실패, 폐기된 세션) None을 반환하므로
+    호출 측은 원격 확인을 사용해야 합니다.
+    """
+    try:
+        algorithm = jwt.get_unverified_header(token).get("alg")
+    except jwt.PyJWTError as e:
+        raise InvalidTokenError(str(e)) from e
+
+    if algorithm == "HS256" and SUPABASE_JWT_SECRET:
+        key = SUPABASE_JWT_SECRET
+    elif algorithm in ASYMMETRIC_ALGORITHMS and _get_jwks_client() is not None:
+        try:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+        except jwt.PyJWTError as e:
+            # JWKS 조회 실패 또는 cryptography 미설치
+            logger.debug(f"Local JWT verification unavailable: {e}")
+            return None
+    else:
+        return None
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=AUTH_JWT_AUDIENCE,
+            leeway=AUTH_JWT_LEEWAY,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.PyJWTError as e:
+        raise InvalidTokenError(str(e)) from e
+
+    if is_revoked(claims.get("session_id")):
+        return None
+    return claims
+
+
+def is_revoked(session_id: str | None) -> bool:
+    return bool(session_id) and session_id in _revoked_sessions
+
+
+def revoke_token(token: str) -> None:
+    """토큰의 세션을 폐기 목록에 올립니다. 이후 이 세션의 토큰은 로컬 검증을 통과하지 않고 원격 확인을 거칩니다."""
+    session_id = unverified_claims(token).get("session_id")
+    if session_id:
+        _revoked_sessions[session_id] = True
@@ -0,0 +1,111 @@
+# AIAgentForge/utils/reranker.py
+# 하이브리드 검색 후보(top-N)를 CPU에서 다시 정렬하여 LLM 프롬프트에 넣을 상위 K개를 고릅니다.
+# 후보 집합 안에서 BM25 방식의 어휘 일치 점수를 NumPy로 한 번에 계산하고, 검색 점수(rrf_score)와 가중 결합합니다.
+# 쿼리/청크 쌍의 단어 빈도는 (정규화된 쿼리, 청크 id) 키로 캐시하므로 반복 질문은 토큰화를 건너뜁니다.
+import logging
+import os
+import re
+import time
+from collections import Counter
+
+import numpy as np
+from cachetools import TTLCache
+
+from .embedder import normalize_query
+
+logger = logging.getLogger(__name__)
+
+# 재정렬 사용 여부 (기본 끔). test/eval_hybrid_search.py로 효과를 확인한 뒤 켜세요.
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() in ("1", "true", "yes")
+# 검색에서 가져올 후보 수(N)와 재정렬 후 남길 수(K)
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_TOP_K = int(os.getenv("RERANK_TOP_K", "5"))
+# 재정렬 시간 예산(밀리초). 넘으면 재정렬을 포기하고 검색 순서대로 상위 K개를 반환합니다.
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "50"))
+# 최종 점수에서 어휘 일치 점수의 비중(0~1). 나머지는 검색 점수입니다.
+RERANK_LEXICAL_WEIGHT = float(os.getenv("RERANK_LEXICAL_WEIGHT", "0.5"))
+# (쿼리, 청크 id)별 단어 빈도 캐시 (크기, TTL 초)
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "10000"))
+RERANK_CACHE_TTL = float(os.getenv("RERANK_CACHE_TTL", "3600"))
+
+# BM25 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+_tf_cache: TTLCache = TTLCache(maxsize=RERANK_CACHE_SIZE, ttl=RERANK_CACHE_TTL)
+
+
+def tokenize(text: str) -> list[str]:
+    """단어 단위로 자르고, ASCII가 아닌 단어(한글/한자 등)는 문자 바이그램도 추가합니다.
+
+    한국어는 조사가 붙어 단어가 그대로 일치하지 않는 경우가 많아 바이그램으로 부분 일치를 잡습니다.
+    """
+    terms = []
+    for word in _TOKEN_RE.findall(text.casefold()):
+        terms.append(word)
+        if not word.isascii() and len(word) > 2:
+            terms.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return terms
+
+
+def _term_frequencies(query_key: str, query_terms: list[str], candidate: dict) -> tuple[np.ndarray, int]:
+    """후보 하나에서 쿼리 단어별 등장 횟수와 문서 길이를 반환합니다. (캐시 사용)"""
+    key = (query_key, candidate["id"])
+    cached = _tf_cache.get(key)
+    if cached is not None:
+        return cached
+    terms = tokenize(candidate.get("content") or "")
+    counts = Counter(terms)
+    result = (np.array([counts[term] for term in query_terms], dtype=np.float32), len(terms))
+    _tf_cache[key] = result
+    return result
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    spread = values.max() - values.min()
+    if spread <= 0:
+        return np.ones_like(values)
+    return (values - values.min()) / spread
+
+
+def lexical_scores(tf: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """후보 집합 안에서 IDF를 계산한 BM25 점수를 반환합니다. tf: (후보 수, 쿼리 단어 수)"""
+    n = tf.shape[0]
+    df = (tf > 0).sum(axis=0)
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    avg_length = max(float(lengths.mean()), 1.0)
+    norm = BM25_K1 * (1.0 - BM25_B + BM25_B * lengths / avg_length)
+    return (idf * tf * (BM25_K1 + 1.0) / (tf + norm[:, None])).sum(axis=1)
+
+
+def rerank(query: str, candidates: list[dict], top_k: int | None = None, budget_ms: float | None = None) -> list[dict]:
+    """검색 후보를 어휘 일치 점수와 검색 점수로 다시 정렬하여 상위 top_k개를 반환합니다.
+
+    반환하는 행에는 rerank_score가 추가됩니다. 시간 예산을 넘기면 검색 순서대로 상위 top_k개를 반환합니다.
+    """
+    top_k = top_k or RERANK_TOP_K
+    budget = (budget_ms if budget_ms is not None else RERANK_BUDGET_MS) / 1000
+    if len(candidates) <= 1:
+        return candidates[:top_k]
+
+    start = time.perf_counter()
+    query_key = normalize_query(query)
+    query_terms = list(dict.fromkeys(tokenize(query_key)))
+    if not query_terms:
+        return candidates[:top_k]
+
+    tf = np.empty((len(candidates), len(query_terms)), dtype=np.float32)
+    lengths = np.empty(len(candidates), dtype=np.float32)
+    for i, candidate in enumerate(candidates):
+        if time.perf_counter() - start > budget:
+            logger.warning(f"Rerank budget exceeded after {i}/{len(candidates)} candidates; keeping retrieval order.")
+            return candidates[:top_k]
+        tf[i], lengths[i] = _term_frequencies(query_key, query_terms, candidate)
+
+    lexical = _normalize(lexical_scores(tf, lengths))
+    retrieval = _normalize(np.array([float(c.get("rrf_score") or 0.0) for c in candidates], dtype=np.float32))
+    scores = RERANK_LEXICAL_WEIGHT * lexical + (1.0 - RERANK_LEXICAL_WEIGHT) * retrieval
+    # 점수가 같으면 검색 순서를 유지합니다.
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [{**candidates[i], "rerank_score": float(scores[i])} for i in order]
@@ -0,0 +1,133 @@
+# AIAgentForge/utils/section_writer.py
+# document_sections 대량 저장기.
+# 한 번의 insert로 수천 개의 청크(+1536차원 임베딩)를 보내면 요청 본문이 수십~수백 MB가 되어
+# 시간 초과나 거부가 발생하므로, 바이트 크기 기준으로 나눈 배치를 제한된 병렬도로 전송합니다.
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Iterator
+
+from postgrest.types import ReturnMethod
+
+logger = logging.getLogger(__name__)
+
+SECTION_TABLE = "document_sections"
+# 배치 하나의 최대 JSON 본문 크기(바이트)와 최대 행 수
+SECTION_INSERT_MAX_BYTES = int(os.getenv("SECTION_INSERT_MAX_BYTES", str(2 * 1024 * 1024)))
+SECTION_INSERT_MAX_ROWS = int(os.getenv("SECTION_INSERT_MAX_ROWS", "500"))
+# 동시에 전송할 배치 수
+SECTION_INSERT_CONCURRENCY = int(os.getenv("SECTION_INSERT_CONCURRENCY", "4"))
+# 배치별 재시도 횟수
+SECTION_INSERT_MAX_RETRIES = int(os.getenv("SECTION_INSERT_MAX_RETRIES", "3"))
+# 임베딩 직렬화 시 유효숫자 자릿수. pgvector는 float32로 저장하므로 6~7자리면 충분합니다.
+EMBEDDING_WIRE_PRECISION = int(os.getenv("EMBEDDING_WIRE_PRECISION", "6"))
+
+
+class SectionWriteError(Exception):
+    """일부 배치가 재시도 후에도 저장되지 않았을 때 발생합니다.
+
+    failed_rows를 write_sections에 다시 넘기면 실패한 부분만 이어서 저장할 수 있습니다.
+    """
+
+    def __init__(self, message: str, inserted: int, failed_rows: list[dict]):
+        super().__init__(message)
+        self.inserted = inserted
+        self.failed_rows = failed_rows
+
+
+def serialize_embedding(embedding: list[float], precision: int = EMBEDDING_WIRE_PRECISION) -> str:
+    """임베딩을 pgvector 텍스트 형식('[0.1,0.2,...]')으로 고정 유효숫자만큼 직렬화합니다.
+
+    기본 JSON float 표현(약 20자)보다 본문 크기가 절반 이하로 줄어듭니다.
+    """
+    fmt = f".{precision}g"
+    return "[" + ",".join(format(value, fmt) for value in embedding) + "]"
+
+
+def prepare_section_rows(rows: list[dict]) -> list[dict]:
+    """행마다 클라이언트 측 id를 부여하고 임베딩을 압축 직렬화합니다.
+
+    id를 미리 정해 두면 응답을 받지 못한 배치를 다시 보내도 중복 저장되지 않습니다.
+    """
+    prepared = []
+    for row in rows:
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        embedding = row.get("embedding")
+        if isinstance(embedding, (list, tuple)):
+            row["embedding"] = serialize_embedding(embedding)
+        prepared.append(row)
+    return prepared
+
+
+def batch_rows_by_size(
+    rows: list[dict],
+    max_bytes: int = SECTION_INSERT_MAX_BYTES,
+    max_rows: int = SECTION_INSERT_MAX_ROWS,
+) -> Iterator[list[dict]]:
+    """JSON 직렬화 크기 기준으로 max_bytes를 넘지 않도록 행을 배치로 묶습니다."""
+    batch: list[dict] = []
+    batch_bytes = 2  # '[' 와 ']'
+    for row in rows:
+        row_bytes = len(json.dumps(row, ensure_ascii=False).encode("utf-8")) + 1
+        if batch and (batch_bytes + row_bytes > max_bytes or len(batch) >= max_rows):
+            yield batch
+            batch, batch_bytes = [], 2
+        batch.append(row)
+        batch_bytes += row_bytes
+    if batch:
+        yield batch
+
+
+def _insert_batch(client, table: str, batch: list[dict]) -> None:
+    """배치 하나를 저장합니다. 이미 저장된 id는 무시하므로 재전송해도 안전합니다."""
+    client.table(table).upsert(
+        batch,
+        on_conflict="id",
+        ignore_duplicates=True,
+        returning=ReturnMethod.minimal,
+    ).execute()
+
+
+async def write_sections(client, rows: list[dict], table: str = SECTION_TABLE) -> int:
+    """행을 바이트 크기 기준 배치로 나누어 제한된 병렬도로 저장하고, 저장된 행 수를 반환합니다.
+
+    모든 배치를 시도한 뒤 실패한 배치가 있으면 SectionWriteError를 발생시킵니다.
+    성공한 배치는 그대로 남으므로 문서 전체를 잃지 않습니다.
+    """
+    if not rows:
+        return 0
+
+    semaphore = asyncio.Semaphore(SECTION_INSERT_CONCURRENCY)
+    batches = list(batch_rows_by_size(prepare_section_rows(rows)))
+
+    async def send(batch: list[dict]) -> tuple[list[dict], Exception | None]:
+        async with semaphore:
+            last_error: Exception | None = None
+            for attempt in range(SECTION_INSERT_MAX_RETRIES + 1):
+                try:
+                    # 동기 PostgREST 호출이 이벤트 루프를 막지 않도록 스레드에서 실행합니다.
+                    await asyncio.to_thread(_insert_batch, client, table, batch)
+                    return batch, None
+                except Exception as e:
+                    last_error = e
+                    logger.warning(f"Section insert failed ({len(batch)} rows, attempt {attempt + 1}): {e}")
+                    if attempt < SECTION_INSERT_MAX_RETRIES:
+                        await asyncio.sleep(min(2 ** attempt, 10))
+            return batch, last_error
+
+    results = await asyncio.gather(*(send(batch) for batch in batches))
+
+    inserted = sum(len(batch) for batch, error in results if error is None)
+    failed = [(batch, error) for batch, error in results if error is not None]
+    if failed:
+        failed_rows = [row for batch, _ in failed for row in batch]
+        raise SectionWriteError(
+            f"{len(failed)}/{len(batches)}개 배치 저장 실패 ({len(failed_rows)}개 섹션): {failed[0][1]}",
+            inserted=inserted,
+            failed_rows=failed_rows,
+        )
+    logger.info(f"Inserted {inserted} rows into {table} in {len(batches)} batches")
+    return inserted
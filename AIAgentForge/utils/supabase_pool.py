@@ -0,0 +1,140 @@
+# AIAgentForge/utils/supabase_pool.py
+# 프로세스 전체가 공유하는 비동기 PostgREST 데이터 접근 계층입니다.
+# 이벤트마다 SyncPostgrestClient/create_client를 새로 만들면 매번 새 커넥션 풀과 TLS 핸드셰이크가 생기고,
+# 동기 execute()가 이벤트 루프를 막습니다. 여기서는 HTTP/2 커넥션 풀(httpx.AsyncClient) 하나를 공유하고,
+# 요청마다 사용자 토큰 헤더만 다른 가벼운 AsyncPostgrestClient를 만들어 await로 실행합니다.
+#
+#   db = user_db(access_token)
+#   response = await db.from_("documents").select("*").eq("collection_id", cid).execute()
+import asyncio
+import os
+
+import httpx
+from dotenv import load_dotenv
+from postgrest import AsyncPostgrestClient
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_ANON_KEY")
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY", "")
+
+# 공유 커넥션 풀 설정
+DB_HTTP2 = os.getenv("DB_HTTP2", "true").lower() in ("1", "true", "yes")
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "100"))
+DB_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("DB_MAX_KEEPALIVE_CONNECTIONS", "20"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "30"))
+
+_http_client: httpx.AsyncClient | None = None
+_http_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _discard_client(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop | None) -> None:
+    """다른 이벤트 루프에서 만든 클라이언트를 그 루프에서 닫습니다. 루프가 이미 닫혔으면 커넥션도 함께 사라졌습니다."""
+    if client.is_closed or loop is None or loop.is_closed():
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    except RuntimeError:
+        # 루프가 종료 중이면 예약할 수 없습니다.
+        pass
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """PostgREST 요청에 사용할 공유 AsyncClient를 반환합니다. 이벤트 루프마다 하나를 만듭니다."""
+    global _http_client, _http_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client.is_closed or _http_loop is not loop:
+        if _http_client is not None and _http_loop is not loop:
+            _discard_client(_http_client, _http_loop)
+        _http_client = httpx.AsyncClient(
+            base_url=f"{SUPABASE_URL}/rest/v1",
+            http2=DB_HTTP2,
+            timeout=DB_TIMEOUT,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=DB_MAX_CONNECTIONS,
+                max_keepalive_connections=DB_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+        _http_loop = loop
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """공유 커넥션 풀을 닫습니다. (앱 종료 시 lifespan에서 호출)"""
+    global _http_client, _http_loop
+    client, loop = _http_client, _http_loop
+    _http_client, _http_loop = None, None
+    if client is None:
+        return
+    if loop is asyncio.get_running_loop():
+        await client.aclose()
+    else:
+        _discard_client(client, loop)
+
+
+class _ScopedSession:
+    """공유 AsyncClient로 요청을 보내되, 이 컨텍스트의 헤더(apikey, Authorization 등)를 요청마다 덧붙입니다.
+
+    공유 클라이언트의 헤더는 건드리지 않으므로 사용자 간에 토큰이 섞이지 않습니다.
+    """
+
+    def __init__(self, http: httpx.AsyncClient, headers: dict[str, str]):
+        self._http = http
+        self.headers = httpx.Headers(headers)
+
+    async def request(self, method: str, url: str, *, headers=None, **kwargs) -> httpx.Response:
+        merged = self.headers.copy()
+        if headers:
+            merged.update(headers)
+        return await self._http.request(method, url, headers=merged, **kwargs)
+
+    async def aclose(self) -> None:
+        # 공유 커넥션 풀은 닫지 않습니다.
+        pass
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """공유 커넥션 풀을 사용하는 AsyncPostgrestClient입니다. 만드는 비용이 거의 없으므로 요청마다 만들어도 됩니다."""
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None):
+        return _ScopedSession(get_http_client(), headers)
+
+    def schema(self, schema: str) -> "PooledPostgrestClient":
+        # 프로필 헤더는 생성자가 새 schema로 다시 넣으므로 제외합니다. (httpx.Headers의 키는 소문자)
+        headers = {
+            key: value
+            for key, value in self.session.headers.items()
+            if key.lower() not in ("accept-profile", "content-profile")
+        }
+        return PooledPostgrestClient(self.base_url, schema=schema, headers=headers)
+
+
+def _make_client(api_key: str, bearer: str) -> PooledPostgrestClient:
+    return PooledPostgrestClient(
+        f"{SUPABASE_URL}/rest/v1",
+        headers={
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "apikey": api_key,
+            "Authorization": f"Bearer {bearer}",
+        },
+    )
+
+
+def user_db(access_token: str) -> PooledPostgrestClient:
+    """사용자 토큰으로 요청하는 클라이언트를 반환합니다. (RLS 적용)"""
+    return _make_client(SUPABASE_KEY, access_token)
+
+
+def anon_db() -> PooledPostgrestClient:
+    """익명 키로 요청하는 클라이언트를 반환합니다."""
+    return _make_client(SUPABASE_KEY, SUPABASE_KEY)
+
+
+def service_db() -> PooledPostgrestClient:
+    """서비스 롤 키로 요청하는 클라이언트를 반환합니다. (RLS 우회, 서버 전용)"""
+    if not SUPABASE_SERVICE_KEY:
+        raise RuntimeError("Missing SUPABASE_SERVICE_KEY")
+    return _make_client(SUPABASE_SERVICE_KEY, SUPABASE_SERVICE_KEY)
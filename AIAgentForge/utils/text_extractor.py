@@ -1,36 +1,513 @@
 # langconnect_fullstack/utils/text_extractor.py
+import codecs
+import csv
 import io
+import logging
+import mmap
+import os
+import signal
+import threading
+import unicodedata
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, TextIO
+from charset_normalizer import from_bytes
 from docx import Document
+from lxml import etree
+from openpyxl import load_workbook
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
 from PyPDF2 import PdfReader
 
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    # pypdfium2가 없으면 PyPDF2 백엔드만 사용합니다.
+    pdfium = None
+
+logger = logging.getLogger(__name__)
+
+# PDF 추출 백엔드: 기본은 빠른 pdfium, 품질이 낮은 페이지만 느린 폴백 백엔드로 다시 추출합니다.
+PDF_EXTRACTOR_BACKEND = os.getenv("PDF_EXTRACTOR_BACKEND", "pdfium" if pdfium else "pypdf2")
+PDF_FALLBACK_BACKEND = os.getenv("PDF_FALLBACK_BACKEND", "pypdf2")
+# 페이지 하나의 최대 추출 시간(초). 0이면 제한하지 않습니다.
+PDF_PAGE_TIMEOUT = float(os.getenv("PDF_PAGE_TIMEOUT", "20"))
+# 이 점수(0~1)보다 품질이 낮은 페이지는 폴백 백엔드로 다시 추출합니다.
+PDF_MIN_QUALITY = float(os.getenv("PDF_MIN_QUALITY", "0.6"))
+# 텍스트 인코딩 판별에 사용할 앞부분 크기(바이트)
+TEXT_SNIFF_BYTES = 64 * 1024
+# 텍스트/HTML 레코드 하나의 대략적인 크기(문자 수). 줄 또는 문단 경계에서 나눕니다.
+TEXT_RECORD_CHARS = 64 * 1024
+# CSV/XLSX 레코드 하나에 담을 행 수
+TABLE_ROWS_PER_RECORD = 100
+
+class UnsupportedFileTypeError(ValueError):
+    """지원하지 않는 형식이거나 텍스트로 읽을 수 없는 파일입니다."""
+
+# 추출기는 bytes, 읽기 가능한 바이너리 스트림, 또는 디스크에 저장된 파일 경로를 입력으로 받습니다.
+# 경로를 넘기면 파일 전체를 메모리로 읽지 않고 메모리 맵으로 열어 처리합니다.
+FileSource = bytes | BinaryIO | str | os.PathLike
+
+def _as_stream(source: FileSource) -> BinaryIO:
+    """bytes이면 BytesIO로 감싸고, 스트림이면 처음 위치로 되돌려 그대로 반환합니다."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    source.seek(0)
+    return source
+
+class _MappedFile(io.RawIOBase):
+    """메모리 맵을 seekable 바이너리 스트림으로 감쌉니다. (zipfile 등 파일 인터페이스가 필요한 라이브러리용)"""
+
+    def __init__(self, view: mmap.mmap):
+        self._view = view
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._view.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def read(self, size: int = -1) -> bytes:
+        return self._view.read(None if size is None or size < 0 else size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        self._view.seek(offset, whence)
+        return self._view.tell()
+
+    def tell(self) -> int:
+        return self._view.tell()
+
+@contextmanager
+def open_source(source: FileSource) -> Iterator[BinaryIO]:
+    """FileSource를 읽기 가능한 스트림으로 엽니다. 경로는 읽기 전용 메모리 맵으로 엽니다."""
+    if not isinstance(source, (str, os.PathLike)):
+        yield _as_stream(source)
+        return
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # 빈 파일은 메모리 맵으로 열 수 없습니다.
+            yield io.BytesIO(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            yield _MappedFile(view)
+
+class PageTimeout(Exception):
+    """페이지 추출이 PDF_PAGE_TIMEOUT을 넘었을 때 발생합니다."""
+
+class PyPDF2Document:
+    """PyPDF2 백엔드. 순수 파이썬이라 느리지만 pdfium이 깨뜨리는 일부 문서를 더 잘 읽습니다."""
+
+    def __init__(self, stream: BinaryIO):
+        self._reader = PdfReader(stream)
+
+    def __len__(self) -> int:
+        return len(self._reader.pages)
+
+    def page_text(self, index: int) -> str:
+        return self._reader.pages[index].extract_text() or ""
+
+    def close(self) -> None:
+        pass
+
+class PdfiumDocument:
+    """pypdfium2(PDFium) 백엔드. C++ 구현이라 PyPDF2보다 수십 배 빠릅니다."""
+
+    def __init__(self, stream: BinaryIO):
+        self._pdf = pdfium.PdfDocument(stream)
+
+    def __len__(self) -> int:
+        return len(self._pdf)
+
+    def page_text(self, index: int) -> str:
+        page = self._pdf[index]
+        try:
+            textpage = page.get_textpage()
+            try:
+                return textpage.get_text_range().replace("\r\n", "\n")
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+
+    def close(self) -> None:
+        self._pdf.close()
+
+# 백엔드 이름 → 문서 생성자. 생성자는 스트림을 받아 __len__, page_text(index), close()를 제공하는 객체를 반환합니다.
+PDF_BACKENDS: dict[str, Callable[[BinaryIO], object]] = {"pypdf2": PyPDF2Document}
+if pdfium is not None:
+    PDF_BACKENDS["pdfium"] = PdfiumDocument
+
+def register_pdf_backend(name: str, factory: Callable[[BinaryIO], object]) -> None:
+    """PDF 추출 백엔드를 등록합니다. PDF_EXTRACTOR_BACKEND/PDF_FALLBACK_BACKEND에 이름으로 지정할 수 있습니다."""
+    PDF_BACKENDS[name] = factory
+
+def text_quality(text: str) -> float:
+    """추출 텍스트의 품질 점수(0~1)를 계산합니다.
+
+    깨진 글자(U+FFFD, 제어 문자, 사용자 정의 영역 문자)의 비율과, 다단 레이아웃이 잘못 읽혔을 때
+    나타나는 한두 글자짜리 줄의 비율이 높을수록 점수가 낮아집니다. 빈 페이지는 1.0입니다.
+    """
+    chars = [ch for ch in text if not ch.isspace()]
+    if not chars:
+        return 1.0
+    bad = sum(1 for ch in chars if ch == "\ufffd" or unicodedata.category(ch) in ("Cc", "Co", "Cs"))
+    lines = [line for line in text.splitlines() if line.strip()]
+    short = sum(1 for line in lines if len(line.strip()) <= 2)
+    short_ratio = short / len(lines) if lines else 0.0
+    # 짧은 줄은 목록 번호 등에서도 나오므로 30%까지는 감점하지 않습니다.
+    return max(0.0, (1 - bad / len(chars)) * (1 - max(0.0, short_ratio - 0.3)))
+
+@contextmanager
+def _page_deadline(seconds: float):
+    """seconds가 지나면 PageTimeout을 발생시킵니다.
+
+    SIGALRM을 사용하므로 메인 스레드(프로세스 풀 워커 포함)에서만 동작하고, 그 외에는 제한 없이 실행합니다.
+    C 확장 내부 호출은 반환된 뒤에 중단됩니다.
+    """
+    if seconds <= 0 or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_timeout(signum, frame):
+        raise PageTimeout(f"page extraction exceeded {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, on_timeout)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def _extract_page(document, index: int) -> str | None:
+    """페이지 하나를 시간 제한 안에서 추출합니다. 실패하거나 시간을 넘기면 None을 반환합니다."""
+    try:
+        with _page_deadline(PDF_PAGE_TIMEOUT):
+            return document.page_text(index)
+    except Exception as e:
+        logger.warning(f"PDF page {index + 1} extraction failed ({type(document).__name__}): {e}")
+        return None
+
+def iter_pdf_pages(
+    file_content: FileSource,
+    backend: str | None = None,
+    fallback: str | None = None,
+) -> Iterator[dict]:
+    """PDF를 한 페이지씩 읽어 {"page", "text"} 레코드를 생성합니다.
+
+    전체 텍스트를 하나의 문자열로 합치지 않으므로, 메모리는 현재 페이지 크기로 제한됩니다.
+    기본 백엔드의 결과가 PDF_MIN_QUALITY보다 낮거나 실패한 페이지만 폴백 백엔드로 다시 추출하고,
+    두 결과 중 품질이 높은 쪽을 사용합니다. fallback에 빈 문자열을 넘기면 폴백하지 않습니다.
+    """
+    backend = backend or PDF_EXTRACTOR_BACKEND
+    if backend not in PDF_BACKENDS:
+        logger.warning(f"Unknown PDF backend '{backend}', using pypdf2")
+        backend = "pypdf2"
+    fallback = PDF_FALLBACK_BACKEND if fallback is None else fallback
+    if fallback == backend or fallback not in PDF_BACKENDS:
+        fallback = ""
+
+    with open_source(file_content) as stream:
+        document = PDF_BACKENDS[backend](stream)
+        fallback_document = None
+        try:
+            for index in range(len(document)):
+                text = _extract_page(document, index)
+                if fallback and (text is None or text_quality(text) < PDF_MIN_QUALITY):
+                    if fallback_document is None:
+                        # 폴백 문서는 처음 필요할 때만 엽니다.
+                        fallback_document = PDF_BACKENDS[fallback](stream)
+                    retry = _extract_page(fallback_document, index)
+                    if retry is not None and (text is None or text_quality(retry) > text_quality(text)):
+                        text = retry
+                yield {"page": index + 1, "text": text or ""}
+        finally:
+            document.close()
+            if fallback_document is not None:
+                fallback_document.close()
+
+def iter_docx_paragraphs(file_content: FileSource) -> Iterator[dict]:
+    """DOCX를 문단 단위로 읽어 {"page", "paragraph", "text"} 레코드를 생성합니다.
+
+    DOCX에는 페이지 정보가 없으므로 page는 None입니다.
+    """
+    with open_source(file_content) as stream:
+        doc = Document(stream)
+    for paragraph_number, para in enumerate(doc.paragraphs, start=1):
+        yield {"page": None, "paragraph": paragraph_number, "text": para.text + "\n"}
+
+def detect_encoding(sample: bytes) -> str | None:
+    """바이트 샘플의 텍스트 인코딩을 판별합니다. 바이너리로 보이면 None을 반환합니다.
+
+    BOM → UTF-8 → charset-normalizer 순서로 확인하므로 CP949/EUC-KR, Shift_JIS 파일도 읽을 수 있습니다.
+    """
+    for bom, encoding in (
+        (codecs.BOM_UTF32_LE, "utf-32"),
+        (codecs.BOM_UTF32_BE, "utf-32"),
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF16_BE, "utf-16"),
+    ):
+        if sample.startswith(bom):
+            return encoding
+    if not sample:
+        return "utf-8"
+    if b"\x00" in sample:
+        return None
+    try:
+        sample.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # 샘플 끝에서 멀티바이트 문자가 잘린 경우는 UTF-8로 봅니다.
+        if e.reason == "unexpected end of data" and e.start >= len(sample) - 3:
+            return "utf-8"
+    best = from_bytes(sample).best()
+    return best.encoding if best else None
+
+@contextmanager
+def open_text(source: FileSource) -> Iterator[TextIO]:
+    """FileSource를 인코딩을 판별한 텍스트 스트림으로 엽니다. 바이너리 파일이면 UnsupportedFileTypeError."""
+    with open_source(source) as stream:
+        sample = stream.read(TEXT_SNIFF_BYTES)
+        encoding = detect_encoding(bytes(sample))
+        if encoding is None:
+            raise UnsupportedFileTypeError("텍스트 인코딩을 판별할 수 없는 바이너리 파일입니다.")
+        stream.seek(0)
+        buffered = io.BufferedReader(stream) if isinstance(stream, _MappedFile) else stream
+        reader = io.TextIOWrapper(buffered, encoding=encoding, errors="replace")
+        try:
+            yield reader
+        finally:
+            # 호출자가 넘긴 스트림이 닫히지 않도록 분리합니다.
+            reader.detach()
+
+def iter_plain_text(file_content: FileSource) -> Iterator[dict]:
+    """텍스트/마크다운 파일을 줄 경계에서 TEXT_RECORD_CHARS 크기 레코드로 나누어 생성합니다."""
+    with open_text(file_content) as reader:
+        lines: list[str] = []
+        size = 0
+        for line in reader:
+            lines.append(line)
+            size += len(line)
+            if size >= TEXT_RECORD_CHARS:
+                yield {"page": None, "text": "".join(lines)}
+                lines, size = [], 0
+        if lines:
+            yield {"page": None, "text": "".join(lines)}
+
+# HTML에서 내용을 버리는 요소와, 끝날 때 문단을 나누는 블록 요소
+_HTML_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+_HTML_BLOCK_TAGS = {
+    "title", "p", "div", "section", "article", "aside", "header", "footer", "main", "nav",
+    "li", "dt", "dd", "tr", "th", "td", "pre", "blockquote", "caption", "figcaption",
+    "h1", "h2", "h3", "h4", "h5", "h6",
+}
+
+def iter_html_text(file_content: FileSource) -> Iterator[dict]:
+    """HTML을 iterparse로 스트리밍 파싱하여 블록 요소 단위 문단을 생성합니다.
+
+    script/style은 버리고, h1~h6은 마크다운 제목(#)으로 바꿔 청크 분할기가 제목 경계를 알 수 있게 합니다.
+    처리한 요소는 바로 비워 메모리를 문서 크기와 무관하게 유지합니다.
+    """
+    with open_source(file_content) as stream:
+        encoding = detect_encoding(bytes(stream.read(TEXT_SNIFF_BYTES))) or "utf-8"
+        stream.seek(0)
+        paragraphs: list[str] = []
+        size = 0
+        # 열린 요소마다 자식 요소의 인라인 텍스트를 순서대로 모읍니다.
+        stack: list[list[str]] = []
+        for event, element in etree.iterparse(stream, events=("start", "end"), html=True, encoding=encoding):
+            if event == "start":
+                stack.append([])
+                continue
+            child_texts = iter(stack.pop())
+            tag = element.tag.lower() if isinstance(element.tag, str) else ""
+            if tag in _HTML_SKIP_TAGS:
+                inline = ""
+            else:
+                parts = [element.text or ""]
+                for child in element:
+                    if isinstance(child.tag, str):
+                        parts.append(next(child_texts, ""))
+                    parts.append(child.tail or "")
+                inline = "\n" if tag == "br" else "".join(parts)
+                if tag in _HTML_BLOCK_TAGS:
+                    text = inline.strip("\n") if tag == "pre" else " ".join(inline.split())
+                    if text:
+                        if len(tag) == 2 and tag[0] == "h" and tag[1].isdigit():
+                            text = "#" * int(tag[1]) + " " + text
+                        paragraphs.append(text)
+                        size += len(text)
+                    inline = " "
+            element.clear(keep_tail=True)
+            if stack:
+                stack[-1].append(inline)
+            else:
+                text = " ".join(inline.split())
+                if text:
+                    paragraphs.append(text)
+            if size >= TEXT_RECORD_CHARS:
+                yield {"page": None, "text": "\n\n".join(paragraphs) + "\n\n"}
+                paragraphs, size = [], 0
+        if paragraphs:
+            yield {"page": None, "text": "\n\n".join(paragraphs) + "\n\n"}
+
+def _format_row(header: list[str] | None, values: list) -> str:
+    """표의 한 행을 "열: 값; 열: 값" 형태로 만듭니다. 빈 값은 생략합니다."""
+    cells = ["" if value is None else str(value).strip() for value in values]
+    if header:
+        return "; ".join(f"{name}: {cell}" if name else cell for name, cell in zip(header, cells) if cell)
+    return " | ".join(cell for cell in cells if cell)
+
+def _iter_table_records(rows: Iterator[list], title: str | None = None, **extra) -> Iterator[dict]:
+    """첫 행을 머리글로 보고, 나머지 행을 TABLE_ROWS_PER_RECORD개씩 레코드로 묶습니다."""
+    header = None
+    lines: list[str] = [f"## {title}"] if title else []
+    row_number = 0
+    for values in rows:
+        row_number += 1
+        if header is None:
+            header = ["" if value is None else str(value).strip() for value in values]
+            if not any(header):
+                header = None
+                row_number -= 1
+            continue
+        line = _format_row(header, list(values))
+        if line:
+            lines.append(line)
+        if len(lines) >= TABLE_ROWS_PER_RECORD:
+            yield {"page": None, **extra, "text": "\n".join(lines) + "\n"}
+            lines = []
+    if lines:
+        yield {"page": None, **extra, "text": "\n".join(lines) + "\n"}
+
+def iter_csv_rows(file_content: FileSource) -> Iterator[dict]:
+    """CSV를 인코딩과 구분자를 판별하여 행 단위로 읽고, 머리글과 함께 레코드로 생성합니다."""
+    with open_text(file_content) as reader:
+        sample = reader.read(TEXT_SNIFF_BYTES)
+        reader.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        yield from _iter_table_records(csv.reader(reader, dialect))
+
+def iter_xlsx_rows(file_content: FileSource) -> Iterator[dict]:
+    """XLSX를 읽기 전용 모드로 열어 시트별 행을 스트리밍하고, 시트 이름을 제목으로 레코드를 생성합니다."""
+    with open_source(file_content) as stream:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                yield from _iter_table_records(sheet.iter_rows(values_only=True), title=sheet.title, sheet=sheet.title)
+        finally:
+            workbook.close()
+
+def _iter_shape_lines(shape) -> Iterator[str]:
+    if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+        for child in shape.shapes:
+            yield from _iter_shape_lines(child)
+        return
+    if shape.has_text_frame:
+        for paragraph in shape.text_frame.paragraphs:
+            if paragraph.text.strip():
+                yield paragraph.text
+    if getattr(shape, "has_table", False):
+        for row in shape.table.rows:
+            line = " | ".join(cell.text.strip() for cell in row.cells if cell.text.strip())
+            if line:
+                yield line
+
+def iter_pptx_slides(file_content: FileSource) -> Iterator[dict]:
+    """PPTX를 슬라이드 단위로 읽어 {"page": 슬라이드 번호, "text"} 레코드를 생성합니다.
+
+    슬라이드 제목은 마크다운 제목(#)으로, 발표자 노트는 본문 뒤에 붙입니다.
+    """
+    with open_source(file_content) as stream:
+        presentation = Presentation(stream)
+    for slide_number, slide in enumerate(presentation.slides, start=1):
+        title_shape = slide.shapes.title
+        lines: list[str] = []
+        if title_shape is not None and title_shape.text.strip():
+            lines.append("# " + " ".join(title_shape.text.split()))
+        for shape in slide.shapes:
+            if title_shape is not None and shape.shape_id == title_shape.shape_id:
+                continue
+            lines.extend(_iter_shape_lines(shape))
+        if slide.has_notes_slide:
+            notes = slide.notes_slide.notes_text_frame.text.strip() if slide.notes_slide.notes_text_frame else ""
+            if notes:
+                lines.append(notes)
+        if lines:
+            yield {"page": slide_number, "text": "\n".join(lines) + "\n"}
+
+# 확장자/MIME 타입 → 추출기. 확장자를 먼저 확인하고(브라우저가 보내는 MIME은 부정확한 경우가 많습니다), 없으면 MIME을 확인합니다.
+EXTENSION_HANDLERS: dict[str, Callable[[FileSource], Iterator[dict]]] = {
+    ".pdf": iter_pdf_pages,
+    ".docx": iter_docx_paragraphs,
+    ".pptx": iter_pptx_slides,
+    ".xlsx": iter_xlsx_rows,
+    ".csv": iter_csv_rows,
+    ".tsv": iter_csv_rows,
+    ".html": iter_html_text,
+    ".htm": iter_html_text,
+    ".txt": iter_plain_text,
+    ".md": iter_plain_text,
+    ".markdown": iter_plain_text,
+}
+MIME_HANDLERS: dict[str, Callable[[FileSource], Iterator[dict]]] = {
+    "application/pdf": iter_pdf_pages,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": iter_docx_paragraphs,
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": iter_pptx_slides,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": iter_xlsx_rows,
+    "text/csv": iter_csv_rows,
+    "text/tab-separated-values": iter_csv_rows,
+    "text/html": iter_html_text,
+    "application/xhtml+xml": iter_html_text,
+    "text/plain": iter_plain_text,
+    "text/markdown": iter_plain_text,
+    "text/x-markdown": iter_plain_text,
+}
+
+def resolve_handler(mime_type: str | None, filename: str | None = None) -> Callable[[FileSource], Iterator[dict]]:
+    """파일 이름의 확장자와 MIME 타입으로 추출기를 고릅니다.
+
+    어느 쪽에도 없으면 인코딩 판별 후 일반 텍스트로 읽어 보며, 바이너리 파일은 iter_plain_text가
+    UnsupportedFileTypeError를 발생시킵니다.
+    """
+    if filename:
+        handler = EXTENSION_HANDLERS.get(os.path.splitext(filename)[1].lower())
+        if handler is not None:
+            return handler
+    mime = (mime_type or "").split(";")[0].strip().lower()
+    return MIME_HANDLERS.get(mime, iter_plain_text)
+
+def ensure_extractable(file_content: FileSource, mime_type: str | None, filename: str | None = None) -> None:
+    """텍스트 기반 추출기로 처리될 파일이 실제로 텍스트인지 앞부분만 읽어 확인합니다.
+
+    바이너리 파일이면 UnsupportedFileTypeError를 발생시키므로, 스토리지 업로드 전에 걸러낼 수 있습니다.
+    """
+    if resolve_handler(mime_type, filename) not in (iter_plain_text, iter_csv_rows):
+        return
+    with open_source(file_content) as stream:
+        if detect_encoding(bytes(stream.read(TEXT_SNIFF_BYTES))) is None:
+            raise UnsupportedFileTypeError(f"지원하지 않는 파일 형식입니다: {filename or mime_type}")
+
+def iter_text_from_file(file_content: FileSource, mime_type: str, filename: str | None = None) -> Iterator[dict]:
+    """확장자/MIME 타입에 따라 페이지/문단 레코드를 순차적으로 생성하는 스트리밍 추출 API입니다."""
+    yield from resolve_handler(mime_type, filename)(file_content)
+
 def extract_text_from_pdf(file_content: bytes) -> str:
     """PDF 파일 내용(bytes)에서 텍스트를 추출합니다."""
-    text = ""
-    with io.BytesIO(file_content) as pdf_file:
-        reader = PdfReader(pdf_file)
-        for page in reader.pages:
-            text += page.extract_text() or ""
-    return text
+    return "".join(record["text"] for record in iter_pdf_pages(file_content))
 
 def extract_text_from_docx(file_content: bytes) -> str:
     """DOCX 파일 내용(bytes)에서 텍스트를 추출합니다."""
-    text = ""
-    with io.BytesIO(file_content) as docx_file:
-        doc = Document(docx_file)
-        for para in doc.paragraphs:
-            text += para.text + "\n"
-    return text
-
-def extract_text_from_file(file_content: bytes, mime_type: str) -> str:
-    """MIME 타입에 따라 적절한 텍스트 추출 함수를 호출합니다."""
-    if mime_type == "application/pdf":
-        return extract_text_from_pdf(file_content)
-    elif mime_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-        return extract_text_from_docx(file_content)
-    # TODO: 다른 파일 형식(예:.txt,.md)에 대한 처리 추가
-    else:
-        # 지원하지 않는 형식의 경우, 텍스트로 디코딩 시도
-        try:
-            return file_content.decode('utf-8')
-        except UnicodeDecodeError:
-            return "지원하지 않는 파일 형식이거나 텍스트를 추출할 수 없습니다."
+    return "".join(record["text"] for record in iter_docx_paragraphs(file_content))
+
+def extract_text_from_file(file_content: bytes, mime_type: str, filename: str | None = None) -> str:
+    """확장자/MIME 타입에 따라 적절한 텍스트 추출 함수를 호출합니다."""
+    return "".join(record["text"] for record in iter_text_from_file(file_content, mime_type, filename))
@@ -0,0 +1,161 @@
+# AIAgentForge/utils/upload_stream.py
+# 업로드 파일을 메모리에 통째로 올리지 않고 처리하기 위한 도구입니다.
+# 업로드는 고정 크기 조각으로 읽어 임시 파일에 스풀하고, 스토리지에는 파일 핸들(작은 파일) 또는
+# TUS 재개 가능 업로드(큰 파일)로 조각 단위 전송하며, 추출기에는 파일 경로를 넘겨 메모리 맵으로 읽게 합니다.
+# 따라서 업로드 하나의 최대 메모리 사용량은 파일 크기와 관계없이 조각 크기로 제한됩니다.
+import asyncio
+import base64
+import hashlib
+import logging
+import os
+import tempfile
+import time
+import uuid
+from urllib.parse import urljoin
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# 업로드 스트림에서 한 번에 읽을 크기(바이트)
+UPLOAD_READ_CHUNK_BYTES = int(os.getenv("UPLOAD_READ_CHUNK_BYTES", str(1024 * 1024)))
+# 스풀 파일을 저장할 디렉터리. 비어 있으면 시스템 임시 디렉터리를 사용합니다.
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", "")
+# 이 크기(바이트) 이상인 파일은 TUS 재개 가능 업로드로 전송합니다.
+STORAGE_RESUMABLE_THRESHOLD = int(os.getenv("STORAGE_RESUMABLE_THRESHOLD", str(20 * 1024 * 1024)))
+# TUS 조각 크기. Supabase Storage는 마지막 조각을 제외하고 6MB 조각을 요구합니다.
+STORAGE_RESUMABLE_CHUNK_BYTES = 6 * 1024 * 1024
+# 조각 전송 실패 시 재시도 횟수와 요청 시간 제한(초)
+STORAGE_UPLOAD_MAX_RETRIES = int(os.getenv("STORAGE_UPLOAD_MAX_RETRIES", "3"))
+STORAGE_UPLOAD_TIMEOUT = float(os.getenv("STORAGE_UPLOAD_TIMEOUT", "120"))
+
+TUS_VERSION = "1.0.0"
+
+
+class SpooledUpload:
+    """디스크에 스풀된 업로드 파일입니다. rx.UploadFile처럼 name, content_type, read()를 제공합니다."""
+
+    def __init__(self, name: str, content_type: str | None, path: str, size: int | None = None, sha256: str | None = None):
+        self.name = name
+        self.content_type = content_type
+        self.path = path
+        self.size = os.path.getsize(path) if size is None else size
+        # 파일 내용의 sha256(hex). 스풀하면서 계산하며, 없으면 compute_sha256()으로 계산합니다.
+        self.sha256 = sha256
+
+    def compute_sha256(self) -> str:
+        """스풀 파일을 조각 단위로 읽어 sha256을 계산합니다. (블로킹)"""
+        if self.sha256 is None:
+            digest = hashlib.sha256()
+            with open(self.path, "rb") as f:
+                for data in iter(lambda: f.read(UPLOAD_READ_CHUNK_BYTES), b""):
+                    digest.update(data)
+            self.sha256 = digest.hexdigest()
+        return self.sha256
+
+    async def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return await asyncio.to_thread(f.read)
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+async def spool_upload(file, directory: str | None = None) -> SpooledUpload:
+    """업로드 스트림을 UPLOAD_READ_CHUNK_BYTES 단위로 읽어 임시 파일에 저장하고, 동시에 sha256을 계산합니다."""
+    if isinstance(file, SpooledUpload):
+        return file
+    directory = directory or UPLOAD_SPOOL_DIR or tempfile.gettempdir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, uuid.uuid4().hex)
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        with open(path, "wb") as out:
+            while True:
+                data = await file.read(UPLOAD_READ_CHUNK_BYTES)
+                if not data:
+                    break
+                await asyncio.to_thread(out.write, data)
+                digest.update(data)
+                size += len(data)
+    except BaseException:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        raise
+    return SpooledUpload(file.name, file.content_type, path, size, digest.hexdigest())
+
+
+def _tus_metadata(values: dict[str, str]) -> str:
+    return ",".join(f"{key} {base64.b64encode(value.encode('utf-8')).decode('ascii')}" for key, value in values.items())
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        # 409는 서버가 받은 위치와 보낸 위치가 다를 때입니다. 위치를 다시 조회하고 이어서 보냅니다.
+        return error.response.status_code >= 500 or error.response.status_code in (409, 429)
+    return isinstance(error, httpx.TransportError)
+
+
+def _upload_resumable(client, bucket: str, storage_path: str, path: str, size: int, content_type: str) -> str:
+    """TUS 프로토콜로 파일을 6MB 조각 단위로 업로드합니다. 조각 전송이 실패하면 받은 위치부터 이어서 보냅니다."""
+    endpoint = f"{str(client.storage_url).rstrip('/')}/upload/resumable"
+    headers = {**dict(client.options.headers), "Tus-Resumable": TUS_VERSION}
+    with httpx.Client(timeout=STORAGE_UPLOAD_TIMEOUT) as http, open(path, "rb") as f:
+        response = http.post(endpoint, headers={
+            **headers,
+            "Upload-Length": str(size),
+            "Upload-Metadata": _tus_metadata({
+                "bucketName": bucket,
+                "objectName": storage_path,
+                "contentType": content_type,
+                "cacheControl": "3600",
+            }),
+        })
+        response.raise_for_status()
+        location = urljoin(endpoint, response.headers["Location"])
+
+        offset, failures = 0, 0
+        while offset < size:
+            f.seek(offset)
+            data = f.read(STORAGE_RESUMABLE_CHUNK_BYTES)
+            try:
+                response = http.patch(location, content=data, headers={
+                    **headers,
+                    "Upload-Offset": str(offset),
+                    "Content-Type": "application/offset+octet-stream",
+                })
+                response.raise_for_status()
+                offset = int(response.headers["Upload-Offset"])
+                failures = 0
+            except httpx.HTTPError as e:
+                failures += 1
+                if not _is_retryable(e) or failures > STORAGE_UPLOAD_MAX_RETRIES:
+                    raise
+                logger.warning(f"Resumable upload of {storage_path} failed at offset {offset} (attempt {failures}): {e}")
+                time.sleep(min(2 ** failures, 10))
+                head = http.head(location, headers=headers)
+                head.raise_for_status()
+                offset = int(head.headers["Upload-Offset"])
+    return f"{bucket}/{storage_path}"
+
+
+def upload_file_to_storage(client, bucket: str, storage_path: str, upload: SpooledUpload) -> str:
+    """스풀 파일을 스토리지에 업로드하고 전체 경로(bucket/path)를 반환합니다.
+
+    작은 파일은 파일 핸들을 넘겨 httpx가 조각 단위로 읽어 전송하게 하고,
+    STORAGE_RESUMABLE_THRESHOLD 이상인 파일은 TUS 재개 가능 업로드를 사용합니다.
+    """
+    content_type = upload.content_type or "application/octet-stream"
+    if upload.size >= STORAGE_RESUMABLE_THRESHOLD:
+        return _upload_resumable(client, bucket, storage_path, upload.path, upload.size, content_type)
+    with open(upload.path, "rb") as f:
+        response = client.storage.from_(bucket).upload(storage_path, f, {"content-type": content_type})
+    if not response.full_path:
+        raise Exception(f"Storage upload failed: {response}")
+    return response.full_path
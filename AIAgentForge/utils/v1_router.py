@@ -1,14 +1,22 @@
 # AIAgentForge/utils/v1_router.py
 
+import asyncio
 import json
+import os
+from typing import Literal
 from fastapi import APIRouter, Depends
 from sse_starlette.sse import EventSourceResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from gotrue.types import User
 
-from AIAgentForge.state.base import BaseState # Supabase 클라이언트 접근
-from AIAgentForge.utils.dependencies import get_current_user
-from AIAgentForge.utils.embedder import generate_embeddings
+from AIAgentForge.utils.dependencies import get_current_user, oauth2_scheme
+from AIAgentForge.utils.embedder import embed_queries, embed_query
+from AIAgentForge.utils.hybrid_search import SEARCH_RPC, build_search_params
+from AIAgentForge.utils.supabase_pool import user_db
+
+# 배치 검색 요청 하나에 담을 수 있는 최대 쿼리 수와 동시에 실행할 검색 RPC 수
+MCP_BATCH_MAX_QUERIES = int(os.getenv("MCP_BATCH_MAX_QUERIES", "32"))
+MCP_BATCH_CONCURRENCY = int(os.getenv("MCP_BATCH_CONCURRENCY", "8"))
 
 # API 버전 1을 위한 라우터를 생성합니다.
 api_v1_router = APIRouter(prefix="/api/v1")
@@ -18,15 +26,48 @@ async def health_check():
     """API 서버의 상태를 확인하는 간단한 엔드포인트입니다."""
     return {"status": "ok"}
 
-class McpRequest(BaseModel):
-    query: str
+class SearchOptions(BaseModel):
     collection_id: str
     match_count: int = 10
+    # HNSW 검색 후보 수. 지정하지 않으면 서버 기본값(SEARCH_EF_SEARCH)을 사용합니다.
+    ef_search: int | None = None
+    # 결합 설정. 지정하지 않은 값은 서버 기본값(SEARCH_* 환경 변수)을 사용합니다.
+    fusion: Literal["rrf", "score"] | None = None
+    rrf_k: int | None = None
+    semantic_weight: float | None = None
+    keyword_weight: float | None = None
+    # 결합 전에 의미/키워드 검색에서 각각 가져올 후보 수
+    semantic_count: int | None = None
+    keyword_count: int | None = None
+
+    def search_params(self, query: str, query_embedding: list[float], owner_id: str) -> dict:
+        return build_search_params(
+            query,
+            query_embedding,
+            owner_id,
+            self.collection_id,
+            self.match_count,
+            ef_search=self.ef_search,
+            rrf_k=self.rrf_k,
+            fusion=self.fusion,
+            semantic_weight=self.semantic_weight,
+            keyword_weight=self.keyword_weight,
+            semantic_count=self.semantic_count,
+            keyword_count=self.keyword_count,
+        )
+
+class McpRequest(SearchOptions):
+    query: str
+
+class McpBatchRequest(SearchOptions):
+    # 한 컬렉션에 대해 실행할 검색 쿼리 목록
+    queries: list[str] = Field(min_length=1, max_length=MCP_BATCH_MAX_QUERIES)
 
 @api_v1_router.post("/mcp/stream")
 async def mcp_stream_endpoint(
     request_data: McpRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme),
 ):
     """
     AI 어시스턴트를 위한 MCP 스트리밍 엔드포인트입니다.
@@ -41,26 +82,16 @@ async def mcp_stream_endpoint(
             }
 
             # 2. 쿼리 임베딩 생성
-            # generate_embeddings는 임베딩 목록을 반환하므로 첫 번째 항목을 가져옵니다.
-            embeddings_list = await generate_embeddings([request_data.query])
-            if not embeddings_list:
-                raise ValueError("임베딩 생성에 실패했습니다.")
-            query_embedding = embeddings_list[0]
+            # 같은 질문을 반복하는 에이전트를 위해 쿼리 임베딩 캐시를 사용합니다.
+            query_embedding = await embed_query(request_data.query)
             
             # 3. RPC 파라미터 준비
-            rpc_params = {
-                "query_text": request_data.query,
-                "query_embedding": query_embedding, # 수정: 1차원 배열로 전달
-                "p_collection_id": request_data.collection_id,
-                "match_count": request_data.match_count,
-                "p_owner_id": str(current_user.id)
-            }
+            rpc_params = request_data.search_params(request_data.query, query_embedding, str(current_user.id))
 
-            # 4. hybrid_search_multilingual RPC 실행
-            response =  BaseState.supabase_client.rpc(
-                "hybrid_search_multilingual",
-                params=rpc_params
-            ).execute()
+            # 4. 하이브리드 검색 RPC 실행
+            # 공유 커넥션 풀의 비동기 클라이언트로 호출하므로 DB 왕복 동안 이벤트 루프를 막지 않습니다.
+            # 요청자의 토큰으로 호출하여 RLS가 그대로 적용됩니다.
+            response = await user_db(token).rpc(SEARCH_RPC, rpc_params).execute()
 
             # 5. 검색 결과 스트리밍
             yield {
@@ -82,3 +113,70 @@ async def mcp_stream_endpoint(
             }
 
     return EventSourceResponse(event_stream_generator())
+
+
+@api_v1_router.post("/mcp/batch_stream")
+async def mcp_batch_stream_endpoint(
+    request_data: McpBatchRequest,
+    current_user: User = Depends(get_current_user),
+    token: str = Depends(oauth2_scheme),
+):
+    """
+    한 컬렉션에 대한 여러 검색 쿼리를 한 번에 처리하는 배치 엔드포인트입니다.
+    쿼리 임베딩은 embeddings.create 한 번으로 만들고, 하이브리드 검색은 동시에 실행하며,
+    각 쿼리의 결과는 준비되는 대로 별도의 SSE 이벤트(chunks_found, index 포함)로 스트리밍합니다.
+    """
+    async def event_stream_generator():
+        try:
+            queries = request_data.queries
+            yield {
+                "event": "search_started",
+                "data": json.dumps({"queries": queries})
+            }
+
+            embeddings = await embed_queries(queries)
+
+            db = user_db(token)
+            semaphore = asyncio.Semaphore(MCP_BATCH_CONCURRENCY)
+
+            async def run_search(index: int) -> tuple[int, list[dict] | None, str | None]:
+                params = request_data.search_params(queries[index], embeddings[index], str(current_user.id))
+                try:
+                    async with semaphore:
+                        response = await db.rpc(SEARCH_RPC, params).execute()
+                    return index, response.data, None
+                except Exception as e:
+                    return index, None, str(e)
+
+            tasks = [asyncio.create_task(run_search(index)) for index in range(len(queries))]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    index, chunks, error = await finished
+                    if error is None:
+                        yield {
+                            "event": "chunks_found",
+                            "data": json.dumps({"index": index, "query": queries[index], "chunks": chunks})
+                        }
+                    else:
+                        # 한 쿼리의 실패가 나머지 결과를 막지 않도록 쿼리별 오류 이벤트로 보냅니다.
+                        yield {
+                            "event": "error",
+                            "data": json.dumps({"index": index, "query": queries[index], "detail": error})
+                        }
+            finally:
+                # 클라이언트가 연결을 끊으면 남은 검색을 취소합니다.
+                for task in tasks:
+                    task.cancel()
+
+        except Exception as e:
+            yield {
+                "event": "error",
+                "data": json.dumps({"detail": str(e)})
+            }
+        finally:
+            yield {
+                "event": "stream_end",
+                "data": json.dumps({"message": "Stream completed."})
+            }
+
+    return EventSourceResponse(event_stream_generator())
@@ -0,0 +1,274 @@
+# AIAgentForge/utils/vector_index.py
+# 작은 컬렉션을 위한 프로세스 내 검색 인덱스입니다.
+# 처음 검색할 때 컬렉션의 섹션 id/임베딩을 연속된 float32 NumPy 행렬로 읽어 두고,
+# 이후 검색은 PostgREST 왕복 없이 행렬곱(배치 내적)으로 의미 검색을, 미리 계산한 단어 빈도로 키워드 검색을 수행한 뒤
+# hybrid_search_multilingual_v2와 같은 방식(가중 RRF 또는 정규화 점수 가중합)으로 결합합니다.
+# 섹션 수가 LOCAL_INDEX_MAX_SECTIONS를 넘는 컬렉션은 인덱스를 만들지 않고 None을 반환하므로 호출 측은 RPC를 사용합니다.
+# 업로드/삭제 시 DocumentState가 invalidate_collection()을 호출하며, 다른 프로세스(수집 워커)의 변경은 TTL로 반영됩니다.
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from .reranker import lexical_scores, tokenize
+
+logger = logging.getLogger(__name__)
+
+# 로컬 인덱스 사용 여부 (기본 끔). 키워드 검색은 PGroonga 대신 BM25 근사를 사용하므로 순위가 RPC와 조금 다를 수 있습니다.
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "false").lower() in ("1", "true", "yes")
+# 이 수보다 섹션이 많은 컬렉션은 RPC로 검색합니다.
+LOCAL_INDEX_MAX_SECTIONS = int(os.getenv("LOCAL_INDEX_MAX_SECTIONS", "5000"))
+# 메모리에 유지할 컬렉션 수(LRU). 1536차원 5,000섹션이면 컬렉션당 약 30MB입니다.
+LOCAL_INDEX_MAX_COLLECTIONS = int(os.getenv("LOCAL_INDEX_MAX_COLLECTIONS", "8"))
+# 인덱스 유효 시간(초). 다른 프로세스에서 변경된 섹션은 이 시간 뒤에 반영됩니다.
+LOCAL_INDEX_TTL = float(os.getenv("LOCAL_INDEX_TTL", "300"))
+# 섹션을 읽어 올 때 요청 하나의 행 수 (PostgREST 기본 최대 행 수 이하)
+LOCAL_INDEX_PAGE_SIZE = int(os.getenv("LOCAL_INDEX_PAGE_SIZE", "1000"))
+
+SECTION_TABLE = "document_sections"
+
+
+@dataclass
+class CollectionIndex:
+    """한 컬렉션의 섹션 임베딩 행렬과 키워드 검색용 단어 빈도입니다."""
+
+    owner_id: str
+    collection_id: str
+    ids: list[str]
+    contents: list[str]
+    document_ids: list[str]
+    document_names: list[str | None]
+    # (섹션 수, 차원) float32, 행마다 L2 정규화되어 있어 내적이 곧 코사인 유사도입니다.
+    matrix: np.ndarray
+    term_counts: list[Counter]
+    lengths: np.ndarray
+    loaded_at: float
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def vector_top_k(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """여러 쿼리 임베딩(q, 차원)의 상위 k개 섹션 위치와 코사인 유사도를 한 번의 행렬곱으로 구합니다."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ self.matrix.T
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+    def keyword_top_k(self, query_text: str, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """쿼리 단어가 하나 이상 등장하는 섹션을 BM25 점수로 정렬하여 상위 k개를 반환합니다."""
+        terms = list(dict.fromkeys(tokenize(query_text)))
+        if not terms or not self.ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        tf = np.array([[counts[term] for term in terms] for counts in self.term_counts], dtype=np.float32)
+        matched = np.flatnonzero(tf.any(axis=1))
+        if matched.size == 0:
+            return matched, np.empty(0, dtype=np.float32)
+        scores = lexical_scores(tf, self.lengths)[matched]
+        order = np.argsort(-scores, kind="stable")[:k]
+        return matched[order], scores[order]
+
+
+def _parse_embedding(value) -> list[float]:
+    # PostgREST는 vector 컬럼을 "[0.1,0.2,...]" 문자열로 반환합니다.
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def load_collection_index(client, owner_id: str, collection_id: str) -> CollectionIndex | None:
+    """컬렉션의 섹션을 페이지 단위로 읽어 인덱스를 만듭니다. 섹션이 너무 많으면 None을 반환합니다. (블로킹)"""
+    count = (
+        client.table(SECTION_TABLE)
+        .select("id", count="exact")
+        .eq("collection_id", collection_id)
+        .eq("owner_id", owner_id)
+        .limit(1)
+        .execute()
+        .count
+    ) or 0
+    if count > LOCAL_INDEX_MAX_SECTIONS:
+        return None
+
+    rows = []
+    for start in range(0, count, LOCAL_INDEX_PAGE_SIZE):
+        rows.extend(
+            client.table(SECTION_TABLE)
+            .select("id, content, document_id, embedding, documents(name)")
+            .eq("collection_id", collection_id)
+            .eq("owner_id", owner_id)
+            .order("id")
+            .range(start, start + LOCAL_INDEX_PAGE_SIZE - 1)
+            .execute()
+            .data
+            or []
+        )
+    rows = [row for row in rows if row.get("embedding") is not None]
+    # 읽는 사이 섹션이 추가되었을 수 있으므로 실제 행 수로 다시 확인합니다.
+    if len(rows) > LOCAL_INDEX_MAX_SECTIONS:
+        return None
+
+    if rows:
+        matrix = np.array([_parse_embedding(row["embedding"]) for row in rows], dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    else:
+        matrix = np.empty((0, 0), dtype=np.float32)
+    term_counts = [Counter(tokenize(row.get("content") or "")) for row in rows]
+    return CollectionIndex(
+        owner_id=owner_id,
+        collection_id=collection_id,
+        ids=[row["id"] for row in rows],
+        contents=[row.get("content") or "" for row in rows],
+        document_ids=[row["document_id"] for row in rows],
+        document_names=[(row.get("documents") or {}).get("name") for row in rows],
+        matrix=np.ascontiguousarray(matrix),
+        term_counts=term_counts,
+        lengths=np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32),
+        loaded_at=time.monotonic(),
+    )
+
+
+def _min_max(values: np.ndarray) -> np.ndarray:
+    spread = values.max() - values.min() if values.size else 0
+    if spread <= 0:
+        return np.ones_like(values, dtype=np.float32)
+    return (values - values.min()) / spread
+
+
+def search_index(index: CollectionIndex, params: dict) -> list[dict]:
+    """build_search_params()가 만든 파라미터로 하이브리드 검색을 수행합니다. 반환 형식은 v2 RPC와 같습니다."""
+    match_count = params["match_count"]
+    rrf_k = params["rrf_k"]
+    fusion = params.get("fusion", "rrf")
+    semantic_weight = params.get("semantic_weight", 1.0)
+    keyword_weight = params.get("keyword_weight", 1.0)
+    semantic_count = max(params.get("semantic_count") or match_count, 1)
+    keyword_count = max(params.get("keyword_count") or match_count, 1)
+
+    if not len(index):
+        return []
+    semantic_pos, similarity = index.vector_top_k(np.asarray(params["query_embedding"], dtype=np.float32), semantic_count)
+    semantic_pos, similarity = semantic_pos[0], similarity[0]
+    keyword_pos, keyword_score = index.keyword_top_k(params["query_text"], keyword_count)
+
+    # 각 검색의 순위(1부터)와 후보 안에서 정규화한 점수
+    semantic = {int(p): (rank, norm) for rank, (p, norm) in enumerate(zip(semantic_pos, _min_max(similarity)), start=1)}
+    keyword = {int(p): (rank, norm) for rank, (p, norm) in enumerate(zip(keyword_pos, _min_max(keyword_score)), start=1)}
+
+    scored = []
+    for pos in semantic.keys() | keyword.keys():
+        s_rank, s_norm = semantic.get(pos, (None, 0.0))
+        k_rank, k_norm = keyword.get(pos, (None, 0.0))
+        if fusion == "score":
+            score = semantic_weight * s_norm + keyword_weight * k_norm
+        else:
+            score = (semantic_weight / (rrf_k + s_rank) if s_rank else 0.0) + (
+                keyword_weight / (rrf_k + k_rank) if k_rank else 0.0
+            )
+        scored.append((float(score), pos, s_rank, k_rank))
+    scored.sort(key=lambda item: -item[0])
+
+    return [
+        {
+            "id": index.ids[pos],
+            "content": index.contents[pos],
+            "document_id": index.document_ids[pos],
+            "document_name": index.document_names[pos],
+            "collection_id": index.collection_id,
+            "owner_id": index.owner_id,
+            "rrf_score": score,
+            "semantic_rank": s_rank,
+            "keyword_rank": k_rank,
+        }
+        for score, pos, s_rank, k_rank in scored[:match_count]
+    ]
+
+
+class LocalIndexCache:
+    """(소유자, 컬렉션)별 인덱스를 LRU로 보관합니다. 너무 큰 컬렉션은 TTL 동안 다시 확인하지 않습니다."""
+
+    def __init__(self, max_collections: int = LOCAL_INDEX_MAX_COLLECTIONS, ttl: float = LOCAL_INDEX_TTL):
+        self.max_collections = max_collections
+        self.ttl = ttl
+        # 값이 None이면 "로컬 인덱스로 다루기엔 큰 컬렉션"이라는 표시입니다.
+        self._entries: OrderedDict[tuple[str, str], tuple[float, CollectionIndex | None]] = OrderedDict()
+        # 로드 중인 키의 락과 그 락을 기다리거나 가진 요청 수. 요청이 모두 끝나면 함께 지웁니다.
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self._lock_users: Counter = Counter()
+        # 로드 중에 무효화되면 로드 결과를 버리기 위한 세대 번호 (로드 중인 키만 보관)
+        self._generations: Counter = Counter()
+
+    def _get_fresh(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return False, None
+        self._entries.move_to_end(key)
+        return True, entry[1]
+
+    async def get(self, client, owner_id: str, collection_id: str) -> CollectionIndex | None:
+        """인덱스를 반환합니다. 처음이면 읽어 오며, 큰 컬렉션이거나 읽기에 실패하면 None을 반환합니다."""
+        key = (owner_id, collection_id)
+        found, index = self._get_fresh(key)
+        if found:
+            return index
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._lock_users[key] += 1
+        try:
+            async with lock:
+                # 같은 컬렉션을 동시에 검색한 요청은 먼저 시작한 로드 결과를 함께 사용합니다.
+                found, index = self._get_fresh(key)
+                if found:
+                    return index
+                generation = self._generations[key]
+                try:
+                    index = await asyncio.to_thread(load_collection_index, client, owner_id, collection_id)
+                except Exception as e:
+                    logger.warning(f"Failed to load local index for collection {collection_id}: {e}")
+                    return None
+                if generation == self._generations[key]:
+                    self._entries[key] = (time.monotonic(), index)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_collections:
+                        self._entries.popitem(last=False)
+                return index
+        finally:
+            self._lock_users[key] -= 1
+            if self._lock_users[key] <= 0:
+                # 검색한 적 있는 모든 컬렉션의 락이 쌓이지 않도록 마지막 요청이 정리합니다.
+                del self._lock_users[key]
+                self._locks.pop(key, None)
+                self._generations.pop(key, None)
+
+    def invalidate(self, collection_id: str) -> None:
+        """컬렉션의 인덱스를 버립니다. 다음 검색에서 다시 읽습니다."""
+        for key in [key for key in self._entries if key[1] == collection_id]:
+            self._entries.pop(key)
+        # 진행 중인 로드는 결과를 캐시에 넣지 않게 합니다.
+        for key in [key for key in self._locks if key[1] == collection_id]:
+            self._generations[key] += 1
+
+
+local_index_cache = LocalIndexCache()
+
+
+async def search_local(client, params: dict) -> list[dict] | None:
+    """로컬 인덱스로 검색합니다. 사용할 수 없으면(꺼짐, 큰 컬렉션, 로드 실패) None을 반환하므로 RPC로 대신 검색하세요."""
+    if not LOCAL_INDEX_ENABLED:
+        return None
+    index = await local_index_cache.get(client, params["p_owner_id"], params["p_collection_id"])
+    if index is None:
+        return None
+    return await asyncio.to_thread(search_index, index, params)
+
+
+def invalidate_collection(collection_id: str) -> None:
+    local_index_cache.invalidate(collection_id)
@@ -0,0 +1,63 @@
+# PDF 추출 백엔드 벤치마크: 로컬 샘플 PDF 폴더에 대해 백엔드별 초당 페이지 수와 평균 품질 점수를 출력합니다.
+# 실행: python test/bench_pdf_extract.py <PDF 폴더> [--repeat 1]
+# 폴백 없이 각 백엔드를 단독으로 측정하고, 마지막 줄에 기본 설정(폴백 포함)의 결과를 출력합니다.
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from AIAgentForge.utils import text_extractor
+
+
+def bench(label: str, paths: list[str], repeat: int, backend: str | None, fallback: str | None) -> None:
+    best = None
+    for _ in range(repeat):
+        pages, scores, failed = 0, [], 0
+        start = time.perf_counter()
+        for path in paths:
+            try:
+                for record in text_extractor.iter_pdf_pages(path, backend=backend, fallback=fallback):
+                    pages += 1
+                    scores.append(text_extractor.text_quality(record["text"]))
+            except Exception as e:
+                failed += 1
+                print(f"  {label}: {os.path.basename(path)} 실패: {e}")
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, pages, scores, failed)
+
+    elapsed, pages, scores, failed = best
+    low = sum(1 for score in scores if score < text_extractor.PDF_MIN_QUALITY)
+    print(
+        f"{label:<20} {pages / elapsed if elapsed else 0:9.1f} pages/s  pages={pages:6d}  "
+        f"quality mean={statistics.mean(scores) if scores else 0:.3f} low={low}  failed files={failed}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("folder", help="샘플 PDF가 들어 있는 폴더")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.folder, "**", "*.pdf"), recursive=True))
+    if not paths:
+        print(f"PDF 파일이 없습니다: {args.folder}")
+        return
+    print(f"{len(paths)} files, backends={list(text_extractor.PDF_BACKENDS)}")
+
+    for name in text_extractor.PDF_BACKENDS:
+        bench(name, paths, args.repeat, backend=name, fallback="")
+    bench(
+        f"{text_extractor.PDF_EXTRACTOR_BACKEND}+{text_extractor.PDF_FALLBACK_BACKEND}",
+        paths, args.repeat, backend=None, fallback=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# 벡터 검색 지연 시간/재현율 벤치마크
+# 임시 컬렉션에 합성 섹션(1536차원 임베딩)을 저장한 뒤, 하이브리드 검색 RPC(SEARCH_RPC)를
+# ef_search 값별로 호출하여 지연 시간(p50/p95)과 정확한 최근접 대비 recall@k를 출력합니다.
+#
+# 실행 예:
+#   python test/bench_vector_search.py --owner-id <auth.users id> --sections 100000
+#   python test/bench_vector_search.py --owner-id <id> --sections 1000000 --ef 40,100,200
+#
+# SUPABASE_URL, SUPABASE_SERVICE_KEY 환경 변수가 필요합니다. 인덱스 효과를 보려면
+# SQL/create_document_sections_embedding_index를 실행하기 전/후로 각각 측정하세요.
+# 100만 섹션을 저장하는 데는 REST 전송만으로 수십 분이 걸립니다. --keep으로 데이터를 남겨 두고
+# --collection-id로 다시 측정할 수 있습니다.
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import numpy as np
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+load_dotenv()
+
+from supabase import create_client
+
+from AIAgentForge.utils.hybrid_search import SEARCH_RPC, build_search_params
+from AIAgentForge.utils.section_writer import write_sections
+
+DIM = 1536
+BATCH = 1000
+CLUSTERS = 256
+# 클러스터 중심에서 벗어나는 정도(잡음 벡터의 노름 ≈ 0.5)
+NOISE = 0.5 / np.sqrt(DIM)
+WORDS = "alpha beta gamma delta epsilon zeta eta theta iota kappa lambda 문서 검색 벡터 인덱스 성능".split()
+
+
+def make_centers(seed: int) -> np.ndarray:
+    centers = np.random.default_rng(seed).standard_normal((CLUSTERS, DIM)).astype(np.float32)
+    return centers / np.linalg.norm(centers, axis=1, keepdims=True)
+
+
+def make_vectors(rng: np.random.Generator, centers: np.ndarray, n: int) -> np.ndarray:
+    """클러스터 중심 주변의 정규화된 벡터 n개를 생성합니다."""
+    vectors = centers[rng.integers(0, CLUSTERS, n)] + NOISE * rng.standard_normal((n, DIM)).astype(np.float32)
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def make_batch(seed: int, index: int, centers: np.ndarray) -> np.ndarray:
+    """batch index번째 벡터 묶음을 결정적으로 생성합니다. (정답 계산 시 다시 생성하기 위해)"""
+    return make_vectors(np.random.default_rng((seed, index)), centers, BATCH)
+
+
+def section_id(seed: int, n: int) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_OID, f"bench-{seed}-{n}"))
+
+
+async def seed_sections(client, owner_id: str, collection_id: str, document_id: str, total: int, seed: int, centers) -> None:
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    for index in range(total // BATCH):
+        vectors = make_batch(seed, index, centers)
+        rows = [
+            {
+                "id": section_id(seed, index * BATCH + i),
+                "owner_id": owner_id,
+                "document_id": document_id,
+                "collection_id": collection_id,
+                "content": " ".join(rng.choice(WORDS, 20)),
+                "embedding": vectors[i].tolist(),
+            }
+            for i in range(BATCH)
+        ]
+        await write_sections(client, rows)
+        done = (index + 1) * BATCH
+        if done % 20000 == 0:
+            print(f"  seeded {done}/{total} ({done / (time.perf_counter() - start):.0f} rows/s)")
+
+
+def exact_top_k(queries: np.ndarray, total: int, seed: int, centers, k: int) -> list[set[str]]:
+    """모든 벡터를 배치 단위로 다시 생성하며 코사인 유사도 상위 k개를 구합니다. (메모리: 배치 크기)"""
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.zeros((len(queries), k), dtype=np.int64)
+    for index in range(total // BATCH):
+        scores = queries @ make_batch(seed, index, centers).T
+        ids = np.arange(index * BATCH, (index + 1) * BATCH)
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_ids, np.broadcast_to(ids, scores.shape)], axis=1)
+        top = np.argpartition(-merged_scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, top, axis=1)
+        best_ids = np.take_along_axis(merged_ids, top, axis=1)
+    return [{section_id(seed, int(n)) for n in row} for row in best_ids]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--owner-id", required=True, help="섹션 소유자(auth.users.id)")
+    parser.add_argument("--sections", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=30)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", default="40,100,200", help="측정할 ef_search 값 목록")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--collection-id", help="이미 저장된 벤치마크 컬렉션을 재사용합니다.")
+    parser.add_argument("--keep", action="store_true", help="측정 후 벤치마크 컬렉션을 삭제하지 않습니다.")
+    args = parser.parse_args()
+
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
+    centers = make_centers(args.seed)
+    total = args.sections // BATCH * BATCH
+
+    collection_id = args.collection_id
+    if collection_id is None:
+        collection_id = client.table("collections").insert(
+            {"name": f"bench-{total}", "owner_id": args.owner_id}
+        ).execute().data[0]["id"]
+        document_id = client.table("documents").insert(
+            {"name": "bench", "owner_id": args.owner_id, "collection_id": collection_id}
+        ).execute().data[0]["id"]
+        print(f"seeding {total} sections into collection {collection_id}")
+        asyncio.run(seed_sections(client, args.owner_id, collection_id, document_id, total, args.seed, centers))
+
+    try:
+        queries = make_vectors(np.random.default_rng(args.seed + 1), centers, args.queries)
+        print("computing exact top-k ...")
+        truth = exact_top_k(queries, total, args.seed, centers, args.k)
+
+        print(f"sections={total} queries={args.queries} k={args.k}")
+        for ef in [int(value) for value in args.ef.split(",")]:
+            latencies, recalls = [], []
+            for query, expected in zip(queries, truth):
+                # 키워드 검색 결과가 섞이지 않도록 어떤 섹션에도 없는 단어로 검색합니다.
+                params = build_search_params("zzqxv", query.tolist(), args.owner_id, collection_id, args.k, ef_search=ef)
+                start = time.perf_counter()
+                data = client.rpc(SEARCH_RPC, params=params).execute().data or []
+                latencies.append((time.perf_counter() - start) * 1000)
+                recalls.append(len({row["id"] for row in data} & expected) / args.k)
+            latencies.sort()
+            print(
+                f"ef_search={ef:<5} p50={statistics.median(latencies):7.1f}ms  "
+                f"p95={latencies[int(len(latencies) * 0.95) - 1]:7.1f}ms  recall@{args.k}={statistics.mean(recalls):.3f}"
+            )
+    finally:
+        if not args.keep and args.collection_id is None:
+            # 컬렉션을 지우면 문서와 섹션도 함께 삭제됩니다. (ON DELETE CASCADE)
+            client.table("collections").delete().eq("id", collection_id).execute()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# 하이브리드 검색 결합 설정 오프라인 평가
+# 쿼리 로그(JSONL)를 재생하여 결합 설정(fusion, 가중치, 후보 수 등)별 recall@k와 지연 시간(p50/p95)을 출력합니다.
+#
+# 쿼리 로그 형식 (한 줄에 하나):
+#   {"query": "reflex state 설명", "collection_id": "<uuid>", "relevant": ["<section id>", ...]}
+# relevant가 없는 쿼리는 지연 시간만 측정합니다.
+#
+# 설정 파일 형식 (JSON 배열, 생략하면 아래 DEFAULT_CONFIGS 사용):
+#   [{"name": "rrf", "fusion": "rrf"}, {"name": "score-0.7", "fusion": "score", "semantic_weight": 0.7, "keyword_weight": 0.3}]
+#   name 외의 키는 build_search_params의 키워드 인자입니다.
+#   "rerank": true를 주면 RERANK_CANDIDATES개를 가져와 reranker로 상위 k개를 다시 고릅니다. (RERANK_ENABLED와 같은 경로)
+#
+# 실행 예:
+#   python test/eval_hybrid_search.py queries.jsonl --owner-id <auth.users id> --k 10
+#   python test/eval_hybrid_search.py queries.jsonl --owner-id <id> --configs configs.json --repeat 3
+#
+# SUPABASE_URL, SUPABASE_SERVICE_KEY, OPENAI_API_KEY 환경 변수가 필요합니다.
+# 쿼리 임베딩은 처음 한 번만 계산하므로 측정되는 지연 시간은 RPC 호출 시간입니다.
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+load_dotenv()
+
+from supabase import create_client
+
+from AIAgentForge.utils.embedder import embed_query
+from AIAgentForge.utils.hybrid_search import SEARCH_RPC, build_search_params
+from AIAgentForge.utils.reranker import RERANK_CANDIDATES, rerank
+
+DEFAULT_CONFIGS = [
+    {"name": "rrf-depth=k", "fusion": "rrf", "semantic_count": 1, "keyword_count": 1},
+    {"name": "rrf", "fusion": "rrf"},
+    {"name": "rrf-semantic2x", "fusion": "rrf", "semantic_weight": 2.0},
+    {"name": "rrf-keyword2x", "fusion": "rrf", "keyword_weight": 2.0},
+    {"name": "score-0.5", "fusion": "score", "semantic_weight": 0.5, "keyword_weight": 0.5},
+    {"name": "score-0.7", "fusion": "score", "semantic_weight": 0.7, "keyword_weight": 0.3},
+    {"name": "rrf-depth=100", "fusion": "rrf", "semantic_count": 100, "keyword_count": 100},
+    {"name": "rrf+rerank", "fusion": "rrf", "rerank": True},
+]
+
+
+def load_queries(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    return sorted_values[max(int(len(sorted_values) * q) - 1, 0)]
+
+
+def evaluate(client, owner_id: str, queries: list[dict], embeddings: list[list[float]], config: dict, k: int, repeat: int) -> dict:
+    options = {key: value for key, value in config.items() if key not in ("name", "rerank")}
+    use_rerank = bool(config.get("rerank"))
+    match_count = max(RERANK_CANDIDATES, k) if use_rerank else k
+    latencies, recalls = [], []
+    for entry, embedding in zip(queries, embeddings):
+        params = build_search_params(entry["query"], embedding, owner_id, entry["collection_id"], match_count, **options)
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = client.rpc(SEARCH_RPC, params=params).execute().data or []
+            if use_rerank:
+                data = rerank(entry["query"], data, top_k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+        relevant = set(entry.get("relevant") or [])
+        if relevant:
+            found = {row["id"] for row in data[:k]}
+            recalls.append(len(found & relevant) / min(len(relevant), k))
+    latencies.sort()
+    return {
+        "name": config.get("name", json.dumps(options)),
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 0.95),
+        "recall": statistics.mean(recalls) if recalls else None,
+        "labeled": len(recalls),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("query_log", help="쿼리 로그(JSONL)")
+    parser.add_argument("--owner-id", required=True, help="컬렉션 소유자(auth.users.id)")
+    parser.add_argument("--configs", help="평가할 결합 설정 목록(JSON). 생략하면 기본 설정 목록을 사용합니다.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=1, help="쿼리별 반복 호출 횟수(지연 시간 측정용)")
+    args = parser.parse_args()
+
+    queries = load_queries(args.query_log)
+    if not queries:
+        print(f"쿼리가 없습니다: {args.query_log}")
+        return
+    if args.configs:
+        with open(args.configs, encoding="utf-8") as f:
+            configs = json.load(f)
+    else:
+        configs = DEFAULT_CONFIGS
+
+    client = create_client(os.environ["SUPABASE_URL"], os.environ["SUPABASE_SERVICE_KEY"])
+
+    async def embed_all() -> list[list[float]]:
+        return [await embed_query(entry["query"]) for entry in queries]
+
+    print(f"embedding {len(queries)} queries ...")
+    embeddings = asyncio.run(embed_all())
+
+    print(f"rpc={SEARCH_RPC} queries={len(queries)} k={args.k} repeat={args.repeat}")
+    for config in configs:
+        result = evaluate(client, args.owner_id, queries, embeddings, config, args.k, args.repeat)
+        recall = f"{result['recall']:.3f}" if result["recall"] is not None else "  n/a"
+        print(
+            f"{result['name']:<20} p50={result['p50']:7.1f}ms  p95={result['p95']:7.1f}ms  "
+            f"recall@{args.k}={recall} (labeled={result['labeled']})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# /api/v1/mcp/stream 부하 테스트
+# 동시 요청 수를 바꿔 가며 같은 검색 요청을 보내고, 동시성별 초당 처리량(req/s)과 지연 시간(p50/p95)을 출력합니다.
+# 이벤트 루프를 막는 호출이 없다면 req/s가 동시성에 비례해 늘어나다가 DB/임베딩 한도에서 포화됩니다.
+#
+# 실행 예 (앱 서버가 떠 있어야 합니다):
+#   python test/load_mcp_stream.py --url http://localhost:8000 --token <access token> --collection-id <uuid>
+#   python test/load_mcp_stream.py ... --concurrency 1,4,16,64 --requests 200
+#
+# 같은 질문을 반복하면 쿼리 임베딩 캐시에 적중하므로 측정값은 주로 인증 + RPC 경로의 처리량입니다.
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def one_request(client: httpx.AsyncClient, url: str, headers: dict, body: dict) -> tuple[float, bool]:
+    """SSE 스트림을 stream_end까지 읽고 (지연 시간 ms, 성공 여부)를 반환합니다."""
+    start = time.perf_counter()
+    ok = False
+    async with client.stream("POST", url, json=body, headers=headers) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return (time.perf_counter() - start) * 1000, False
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+                if event == "chunks_found":
+                    ok = True
+                elif event == "error":
+                    ok = False
+                elif event == "stream_end":
+                    break
+    return (time.perf_counter() - start) * 1000, ok
+
+
+async def run_level(url: str, headers: dict, body: dict, concurrency: int, total: int) -> None:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(i)
+        latencies, failures = [], 0
+
+        async def worker() -> None:
+            nonlocal failures
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    latency, ok = await one_request(client, url, headers, body)
+                except httpx.HTTPError:
+                    latency, ok = 0.0, False
+                if ok:
+                    latencies.append(latency)
+                else:
+                    failures += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    if latencies:
+        p50 = statistics.median(latencies)
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+    else:
+        p50 = p95 = 0.0
+    print(
+        f"concurrency={concurrency:<4} {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50={p50:7.1f}ms  p95={p95:7.1f}ms  failed={failures}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="Supabase access token (Bearer)")
+    parser.add_argument("--collection-id", required=True)
+    parser.add_argument("--query", default="하이브리드 검색은 어떻게 동작하나요?")
+    parser.add_argument("--concurrency", default="1,4,16,32", help="측정할 동시 요청 수 목록")
+    parser.add_argument("--requests", type=int, default=100, help="동시성 단계별 총 요청 수")
+    args = parser.parse_args()
+
+    url = f"{args.url.rstrip('/')}/api/v1/mcp/stream"
+    headers = {"Authorization": f"Bearer {args.token}", "Accept": "text/event-stream"}
+    body = {"query": args.query, "collection_id": args.collection_id}
+
+    for concurrency in [int(value) for value in args.concurrency.split(",")]:
+        asyncio.run(run_level(url, headers, body, concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# chunker.chunk_records_by_tokens의 제목 인식 테스트
+# tiktoken 인코딩을 내려받지 않도록 공백 단위로 토큰을 세는 인코더로 바꿔 실행합니다.
+#
+#   python -m pytest test/test_chunker.py -q
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from AIAgentForge.utils import chunker
+
+
+class _WordEncoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(chunker, "_get_encoding", lambda: _WordEncoding())
+
+
+@pytest.mark.parametrize("line", [
+    "1. Open the box",
+    "2. Plug it in",
+    "3.5 million users joined",
+    "2024. 3. 5 회의",
+    "1.2 이 절에서는 설치 방법을 설명합니다.",
+])
+def test_not_heading(line):
+    assert not chunker._is_heading(line)
+
+
+@pytest.mark.parametrize("line", [
+    "# Installation",
+    "제3장 설치",
+    "2.3.1 Hybrid Search",
+    "1.2. 개요",
+    "II. Results",
+])
+def test_heading(line):
+    assert chunker._is_heading(line)
+
+
+def test_numbered_list_stays_in_one_chunk():
+    text = "Setup\n1. Open the box\n2. Plug it in\n3. Press the power button\n4. Wait for the light"
+    chunks = list(chunker.chunk_records_by_tokens([{"text": text, "page": 1}], max_tokens=100, overlap_tokens=0))
+    assert len(chunks) == 1
+    assert chunks[0]["text"] == text
+    assert chunks[0]["heading"] is None
+
+
+def test_section_heading_starts_new_chunk():
+    text = "intro text\n2.1 Details\nbody line"
+    chunks = list(chunker.chunk_records_by_tokens([{"text": text, "page": 1}], max_tokens=100, overlap_tokens=0))
+    assert [chunk["text"] for chunk in chunks] == ["intro text", "2.1 Details\nbody line"]
+    assert chunks[1]["heading"] == "2.1 Details"
+
+
+def test_offset_counts_from_document_start():
+    records = [{"text": "# One\nfirst page", "page": 1}, {"text": "# Two\nsecond page", "page": 2}]
+    chunks = list(chunker.chunk_records_by_tokens(records, max_tokens=100, overlap_tokens=0))
+    full_text = "".join(record["text"] for record in records)
+    assert [chunk["page"] for chunk in chunks] == [1, 2]
+    for chunk in chunks:
+        assert full_text[chunk["offset"]:].startswith(chunk["text"].split("\n")[0])
+    assert chunks[1]["offset"] == len(records[0]["text"])